@@ -8,12 +8,18 @@ from app.utils.cache_manager import cache_manager
 from .utils.theme_manager import ThemeManager
 from app.plugins import get_plugin_manager
 from flask_caching import Cache
-from config.database import get_db_url, DB_TYPE, REDIS_CONFIG
+from config.database import get_db_url, DB_TYPE, REDIS_CONFIG, SMTP_CONFIG
 from sqlalchemy import event
 from app.utils.custom_pages import custom_page_manager
 from app.utils.article_url import ArticleUrlGenerator
 import jinja2
 from app.utils.gravatar import Gravatar
+from app.utils.schema import ensure_schema
+from app.utils.entity_versions import entity_versions
+from app.utils.fragment_cache import FragmentCacheExtension
+from app.utils.template_cache import init_template_cache
+from app.utils.template_context import instrument_context_processors, lazy_value, shared_value
+from app.utils.request_cache import request_memo
 
 cache = Cache()
 
@@ -38,6 +44,10 @@ def init_app_components(app):
     """初始化应用组件"""
     if not hasattr(app, '_components_initialized'):
         with app.app_context():
+            # 补建新版本新增的数据表
+            ensure_schema()
+            # 补齐模型版本号(模板片段缓存键)
+            entity_versions.seed()
             init_plugins(app)
             init_cache(app)
             # 初始化自定义页面
@@ -86,7 +96,7 @@ def init_routes(app):
         try:
             # 使用缓存检查路由状态
             route_key = f'route_status:{endpoint}'
-            route_status = cache_manager.get(route_key)
+            route_status = cache_manager.get_plain(route_key)
             
             if route_status is None:
                 route = Route.query.filter_by(
@@ -120,20 +130,99 @@ def init_routes(app):
     # 替换全局 url_for
     app.jinja_env.globals['url_for'] = custom_url_for
 
-def create_app(db_type=DB_TYPE, init_components=True):
+def create_app(db_type=DB_TYPE, init_components=True, database_url=None):
     app = Flask(__name__)
 
     # 配置
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'PPress')
-    app.config['SQLALCHEMY_DATABASE_URI'] = get_db_url(db_type)
+    # database_url / DATABASE_URL 可指向独立数据库(如基准测试数据集), 未设置时按 config/database.py
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url or os.environ.get('DATABASE_URL') or get_db_url(db_type)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
+    # 上传文件分块写入临时文件时每次读取的字节数
+    app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', 64 * 1024))
+    # 响应压缩: 是否启用、最小压缩字节数、gzip 级别、brotli 质量(需安装 Brotli)、
+    # 缓存项压缩结果的单项上限(原始字节数, 0 为不缓存)和过期秒数
+    app.config['COMPRESSION_ENABLED'] = os.environ.get('PPRESS_COMPRESSION', '1').lower() in ('1', 'true', 'yes')
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+    app.config['COMPRESSION_LEVEL'] = int(os.environ.get('COMPRESSION_LEVEL', 6))
+    app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+    app.config['COMPRESSION_CACHE_MAX_ENTRY'] = int(os.environ.get('COMPRESSION_CACHE_MAX_ENTRY', 1024 * 1024))
+    app.config['COMPRESSION_CACHE_TTL'] = int(os.environ.get('COMPRESSION_CACHE_TTL', 3600))
+    # 静态资源构建目录(flask assets build 生成的清单和 .gz/.br), 未构建时模板中的 asset_url 返回原始地址
+    app.config['ASSETS_BUILD_DIR'] = os.environ.get('ASSETS_BUILD_DIR') or os.path.join(app.instance_path, 'assets')
+    # 上传图片的衍生图: 缩小宽度列表、WebP 质量、生成进程数(0 表示在任务线程中直接生成)、正文 <img> 的 sizes 属性
+    app.config['IMAGE_DERIVATIVE_WIDTHS'] = [int(width) for width in os.environ.get('IMAGE_DERIVATIVE_WIDTHS', '480,960,1440').split(',') if width.strip()]
+    app.config['IMAGE_DERIVATIVE_QUALITY'] = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', 80))
+    app.config['IMAGE_DERIVATIVE_WORKERS'] = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2))
+    app.config['IMAGE_SRCSET_SIZES'] = os.environ.get('IMAGE_SRCSET_SIZES', '(max-width: 768px) 100vw, 768px')
+    # 模板字节码缓存目录(为空时不启用); 模板修改后是否自动重新加载, 生产环境默认关闭, 其他环境跟随 debug
+    app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'template_cache'))
+    if os.environ.get('TEMPLATES_AUTO_RELOAD'):
+        app.config['TEMPLATES_AUTO_RELOAD'] = os.environ['TEMPLATES_AUTO_RELOAD'].lower() in ('1', 'true', 'yes')
+    elif os.environ.get('FLASK_ENV') == 'production':
+        app.config['TEMPLATES_AUTO_RELOAD'] = False
+    # 模板片段缓存({% cache %}): 是否启用、默认过期秒数、模型版本号在进程内缓存的秒数(其他进程的写入最多延迟这么久生效)
+    app.config['FRAGMENT_CACHE_ENABLED'] = os.environ.get('PPRESS_FRAGMENT_CACHE', '1').lower() in ('1', 'true', 'yes')
+    app.config['FRAGMENT_CACHE_TTL'] = int(os.environ.get('FRAGMENT_CACHE_TTL', 300))
+    app.config['ENTITY_VERSION_TTL'] = float(os.environ.get('ENTITY_VERSION_TTL', 2))
+    # 严格加载模式(测试用): 加载方案之外的关系懒加载直接抛错
+    app.config['STRICT_LOADING'] = os.environ.get('STRICT_LOADING', '').lower() in ('1', 'true', 'yes')
+    # 文章正文存储: inline 存在 articles 表, table 存在 article_bodies 窄表(可压缩)
+    # 切换后执行 flask articles migrate-bodies 迁移已有数据
+    app.config['ARTICLE_BODY_STORAGE'] = os.environ.get('ARTICLE_BODY_STORAGE', 'inline')
+    app.config['ARTICLE_BODY_COMPRESS'] = os.environ.get('ARTICLE_BODY_COMPRESS', '').lower() in ('1', 'true', 'yes')
+    # 文章页的上一篇/下一篇只在同一主分类内查找
+    app.config['ADJACENT_SAME_CATEGORY'] = os.environ.get('PPRESS_ADJACENT_SAME_CATEGORY', '').lower() in ('1', 'true', 'yes')
+    # SQL 监控: 慢查询阈值(毫秒)、同一请求内相同语句达到多少次视为 N+1、是否输出 X-DB-Queries 调试头
+    app.config['SQL_SLOW_QUERY_MS'] = int(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+    app.config['SQL_DEBUG_HEADER'] = os.environ.get('SQL_DEBUG_HEADER', '').lower() in ('1', 'true', 'yes')
+    # /metrics 访问令牌(Authorization: Bearer <token>), 为空时只允许本机访问
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+    # Socket.IO 异步模式(为空时自动检测)和多 worker 间转发消息的队列地址
+    app.config['SOCKETIO_ASYNC_MODE'] = os.environ.get('SOCKETIO_ASYNC_MODE') or None
+    app.config['SOCKETIO_MESSAGE_QUEUE'] = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+    # 定时任务调度器: 是否启用、leader 选举方式(file 单机文件锁 / database 多机数据库租约)、
+    # 租约时长与调度间隔(秒)、执行历史保留天数
+    app.config['SCHEDULER_ENABLED'] = os.environ.get('PPRESS_SCHEDULER', '1').lower() in ('1', 'true', 'yes')
+    app.config['SCHEDULER_LEADER'] = os.environ.get('PPRESS_SCHEDULER_LEADER', 'file')
+    app.config['SCHEDULER_LEASE_SECONDS'] = int(os.environ.get('PPRESS_SCHEDULER_LEASE_SECONDS', 30))
+    app.config['SCHEDULER_TICK_SECONDS'] = int(os.environ.get('PPRESS_SCHEDULER_TICK_SECONDS', 5))
+    app.config['SCHEDULER_HISTORY_DAYS'] = int(os.environ.get('PPRESS_SCHEDULER_HISTORY_DAYS', 30))
+    # 后台任务队列: 后端(sqlite 本机文件 / redis 多机共享 / inline 同步执行), 默认按 USE_REDIS_QUEUE 选择;
+    # 每个进程的 worker 线程数(服务进程启动时或首次入队时启动; 0 表示只入队, 由 flask tasks worker 单独执行)、执行方式(thread / process)、
+    # 领取后未确认的超时、重试次数与首次重试间隔(秒, 之后指数增长)
+    app.config['USE_REDIS_QUEUE'] = True if os.environ.get('FLASK_ENV') == 'production' else False
+    app.config['TASK_QUEUE_BACKEND'] = os.environ.get('TASK_QUEUE_BACKEND') or ('redis' if app.config['USE_REDIS_QUEUE'] else 'sqlite')
+    app.config['TASK_QUEUE_PATH'] = os.environ.get('TASK_QUEUE_PATH', '')
+    app.config['TASK_QUEUE_WORKERS'] = int(os.environ.get('TASK_QUEUE_WORKERS', 2))
+    app.config['TASK_QUEUE_POOL'] = os.environ.get('TASK_QUEUE_POOL', 'thread')
+    app.config['TASK_QUEUE_VISIBILITY_TIMEOUT'] = int(os.environ.get('TASK_QUEUE_VISIBILITY_TIMEOUT', 300))
+    app.config['TASK_QUEUE_MAX_RETRIES'] = int(os.environ.get('TASK_QUEUE_MAX_RETRIES', 3))
+    app.config['TASK_QUEUE_RETRY_DELAY'] = int(os.environ.get('TASK_QUEUE_RETRY_DELAY', 10))
+    app.config['TASK_QUEUE_POLL_SECONDS'] = float(os.environ.get('TASK_QUEUE_POLL_SECONDS', 1))
+    # 邮件发送: smtp 真实发送 / console 只写日志; 服务器默认取 SMTP_CONFIG, 可用环境变量覆盖
+    # (本地调试可运行 flask mail sink 并设置 MAIL_HOST=127.0.0.1 MAIL_PORT=1025 MAIL_USE_TLS=0);
+    # 每分钟发送上限(0 不限)、每个任务的批量大小、SMTP 会话空闲多久后重建(秒)、连接失败的重试次数与首次间隔(秒)
+    app.config['MAIL_BACKEND'] = os.environ.get('MAIL_BACKEND', 'smtp')
+    app.config['MAIL_HOST'] = os.environ.get('MAIL_HOST', SMTP_CONFIG['host'])
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', SMTP_CONFIG['port']))
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME', SMTP_CONFIG['username'])
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', SMTP_CONFIG['password'])
+    app.config['MAIL_SENDER'] = os.environ.get('MAIL_SENDER') or app.config['MAIL_USERNAME']
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1').lower() in ('1', 'true', 'yes')
+    app.config['MAIL_TIMEOUT'] = int(os.environ.get('MAIL_TIMEOUT', 10))
+    app.config['MAIL_RATE_LIMIT'] = int(os.environ.get('MAIL_RATE_LIMIT', 60))
+    app.config['MAIL_BATCH_SIZE'] = int(os.environ.get('MAIL_BATCH_SIZE', 50))
+    app.config['MAIL_IDLE_TIMEOUT'] = int(os.environ.get('MAIL_IDLE_TIMEOUT', 60))
+    app.config['MAIL_MAX_RETRIES'] = int(os.environ.get('MAIL_MAX_RETRIES', 3))
+    app.config['MAIL_RETRY_DELAY'] = int(os.environ.get('MAIL_RETRY_DELAY', 30))
 
     # Redis配置
     app.config['REDIS_HOST'] = REDIS_CONFIG['host']
     app.config['REDIS_PORT'] = REDIS_CONFIG['port']
     app.config['REDIS_PASSWORD'] = REDIS_CONFIG['password']
-    app.config['USE_REDIS_QUEUE'] = True if os.environ.get('FLASK_ENV') == 'production' else False
 
     # 添加数据库连接选项
     if db_type == 'mysql':
@@ -168,6 +257,22 @@ def create_app(db_type=DB_TYPE, init_components=True):
     app.config['CACHE_DEFAULT_TIMEOUT'] = 300
     cache.init_app(app)
 
+    # 响应压缩(最先注册的 after_request 最后执行, 压缩在其他处理之后)
+    from app.utils.compression import init_compression
+    init_compression(app)
+
+    # SQL 监控
+    from app.utils.sql_monitor import sql_monitor
+    sql_monitor.init_app(app)
+
+    # 按需请求性能分析(后台开关)
+    from app.utils.profiler import request_profiler
+    request_profiler.init_app(app)
+
+    # 后台任务队列(入队在所有进程可用, worker 线程由服务入口或 flask tasks worker 启动)
+    from app.utils.task_queue import task_queue
+    task_queue.init_app(app)
+
     # 初始化路由（确保在注册蓝图之后）
     if init_components:
         init_app_components(app)
@@ -181,9 +286,9 @@ def create_app(db_type=DB_TYPE, init_components=True):
         from app.services.search_service import create_indices
         create_indices()
         
-        # 初始化文章自动获取定时任务
-        from app.utils.auto_fetch import init_schedulers
-        init_schedulers(app)
+        # 注册定时任务(调度线程由服务入口启动, 见 app/utils/process_state.py)
+        from app.utils.scheduler import init_scheduler
+        init_scheduler(app)
 
     # 注册蓝图
     #from .controller import auth, blog, admin, user, chat, search
@@ -195,6 +300,18 @@ def create_app(db_type=DB_TYPE, init_components=True):
     # app.register_blueprint(chat.bp)
     # app.register_blueprint(search.bp)
 
+    # 带哈希的静态资源地址(/assets)和模板函数 asset_url / asset_base_url
+    from app.utils.assets import init_assets
+    init_assets(app)
+
+    # 注册命令行命令
+    from .commands import register_commands
+    register_commands(app)
+
+    # 请求指标中间件与 /metrics(放在 Socket.IO 之后, 作为最外层 WSGI 包装)
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+
     # 注册错误处理器
     @app.errorhandler(404)
     def page_not_found(e):
@@ -288,6 +405,10 @@ def create_app(db_type=DB_TYPE, init_components=True):
 
     # 修改 Jinja2 模板加载器配置
     app.jinja_loader = ThemeManager.get_theme_loader(app)
+    # 模板字节码缓存(按主题分目录, 可用 flask themes compile 预编译)
+    init_template_cache(app)
+    # 模板片段缓存标签 {% cache key, ttl, deps %}...{% endcache %}
+    app.jinja_env.add_extension(FragmentCacheExtension)
 
 
     # 注册加密版权信息函数
@@ -300,24 +421,23 @@ def create_app(db_type=DB_TYPE, init_components=True):
     app.jinja_env.globals['ArticleUrlGenerator'] = ArticleUrlGenerator
 
     # 添加主题设置上下文处理器
-    @app.context_processor
-    def inject_theme_settings():
-        from app.utils.theme_manager import ThemeManager
-        from app.models.site_config import SiteConfig
-        
-        def get_theme_settings():
+    # theme 在模板首次访问时才读取(主题信息按站点配置和主题设置的版本号在进程内缓存)
+    def get_theme_settings():
+        def load_theme_info():
             current_theme = SiteConfig.get_config('site_theme', 'default')
-            theme_info = ThemeManager.get_theme_info(current_theme)
-            return theme_info
-            
-        return {'theme': get_theme_settings()}
+            return ThemeManager.get_theme_info(current_theme)
+
+        return shared_value('theme', ('SiteConfig', 'ThemeSettings'), load_theme_info)
 
     @app.context_processor
-    def inject_custom_pages():
+    def inject_theme_settings():
+        return {'theme': lazy_value('theme', get_theme_settings, namespace='ThemeSettings')}
+
+    def get_public_custom_pages():
+        """获取公开的自定义页面的标题和链接(自定义页面有修改后自动失效)"""
         from app.models import CustomPage
-        
-        def get_public_custom_pages():
-            """获取公开的自定义页面的标题和链接"""
+
+        def query_pages():
             pages = CustomPage.query.with_entities(
                 CustomPage.title,
                 CustomPage.route
@@ -325,9 +445,14 @@ def create_app(db_type=DB_TYPE, init_components=True):
                 status=CustomPage.STATUS_PUBLIC,
                 enabled=True
             ).order_by(CustomPage.created_at.desc()).all()
-            
+
             return [{'title': page.title, 'route': page.route} for page in pages]
-        
+
+        return request_memo('CustomPage', 'public_pages',
+                            lambda: shared_value('custom_pages', ('CustomPage',), query_pages, ttl=3600))
+
+    @app.context_processor
+    def inject_custom_pages():
         return {'get_public_custom_pages': get_public_custom_pages}
 
     # 添加错误处理
@@ -337,4 +462,7 @@ def create_app(db_type=DB_TYPE, init_components=True):
         current_app.logger.error(f"Template not found: {str(error)}")
         return render_template('errors/404.html'), 404
 
+    # 上下文处理器计时(在蓝图和插件注册完成后包装)
+    instrument_context_processors(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,2 @@
+# 基准测试: 数据集生成(dataset)、计时与结果对比(runner)、基准用例(suites)
+# 命令行入口见 app/commands.py 中的 flask bench
@@ -0,0 +1,392 @@
+import random
+from datetime import datetime, timedelta
+
+from slugify import slugify
+from sqlalchemy import create_engine
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import User, Article, ArticleBody, Tag, Category, Comment, ViewHistory, SiteConfig
+from app.models.article import article_tags, article_categories
+from app.models.article_body import body_storage_mode, body_compress_enabled, STORAGE_TABLE
+from app.utils.article_text import summarize_content
+
+# 数据集规模(文章数)
+DATASET_SIZES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+# 基准数据集的默认账号
+ADMIN_USERNAME = 'admin'
+ADMIN_PASSWORD = '123456'
+USER_PASSWORD = 'bench123'
+
+# 正文模板池大小: 正文与摘要按模板预先生成, 避免百万级数据逐篇解析 HTML
+BODY_POOL_SIZE = 400
+
+# 文章时间跨度(天)
+TIME_SPAN_DAYS = 3 * 365
+
+_CJK_PHRASES = (
+    '性能优化', '数据库索引', '缓存策略', '分布式系统', '并发编程', '消息队列', '微服务架构',
+    '前端工程化', '容器编排', '日志分析', '接口设计', '代码重构', '单元测试', '持续集成',
+    '负载均衡', '全文检索', '权限控制', '异步任务', '内存管理', '网络协议', '安全加固',
+    '数据迁移', '监控告警', '灰度发布', '读写分离', '限流熔断', '搜索引擎', '模板渲染',
+)
+_LATIN_WORDS = (
+    'python', 'flask', 'sqlalchemy', 'redis', 'mysql', 'sqlite', 'nginx', 'docker',
+    'kubernetes', 'linux', 'jinja', 'celery', 'gunicorn', 'websocket', 'http', 'json',
+    'index', 'query', 'cache', 'latency', 'throughput', 'profile', 'benchmark', 'deploy',
+)
+_SENTENCE_TAILS = ('的实践总结', '中的常见问题', '的原理分析', '踩坑记录', '入门指南', '进阶技巧', '对比评测')
+_COMMENT_TEXTS = (
+    '写得很清楚, 收藏了', '请问这个方案在生产环境验证过吗?', '感谢分享, 解决了我的问题',
+    '第二部分的例子能再详细一点吗', '我们团队也遇到过类似的情况', '学习了',
+    '有没有对应的源码地址?', '这个思路不错, 但并发高的时候要注意锁', '+1', '期待后续更新',
+)
+
+
+def _sentence(rng):
+    words = [rng.choice(_CJK_PHRASES) if rng.random() < 0.6 else rng.choice(_LATIN_WORDS)
+             for _ in range(rng.randint(6, 16))]
+    return ' '.join(words) + rng.choice(('。', '，', '！', '？'))
+
+
+def _build_body(rng):
+    """生成一篇带标题层级、段落、列表和代码块的正文"""
+    parts = [f'<p>{"".join(_sentence(rng) for _ in range(rng.randint(2, 5)))}</p>']
+    for section in range(rng.randint(2, 6)):
+        parts.append(f'<h2>{rng.choice(_CJK_PHRASES)}{rng.choice(_SENTENCE_TAILS)}</h2>')
+        for _ in range(rng.randint(1, 4)):
+            parts.append(f'<p>{"".join(_sentence(rng) for _ in range(rng.randint(2, 6)))}</p>')
+        if rng.random() < 0.5:
+            parts.append(f'<h3>{rng.choice(_LATIN_WORDS)} {rng.choice(_CJK_PHRASES)}</h3>')
+            parts.append('<ul>' + ''.join(f'<li>{_sentence(rng)}</li>' for _ in range(rng.randint(2, 5))) + '</ul>')
+        if rng.random() < 0.3:
+            parts.append(f'<pre><code>{rng.choice(_LATIN_WORDS)}.run(workers={rng.randint(1, 16)})</code></pre>')
+    return ''.join(parts)
+
+
+def _weighted_picker(rng, count, skew=1.0):
+    """按名次的幂律权重挑选 [0, count) 中的编号, 模拟热门标签/分类"""
+    cum_weights = []
+    total = 0.0
+    for rank in range(count):
+        total += 1.0 / (rank + 1) ** skew
+        cum_weights.append(total)
+    population = range(count)
+
+    def pick(k=1):
+        return rng.choices(population, cum_weights=cum_weights, k=k)
+    return pick
+
+
+def create_schema(database_url, reset=False):
+    """在目标库建表(应用实例启动时会读取站点配置, 需先于 create_app 执行)"""
+    engine = create_engine(database_url)
+    try:
+        if reset:
+            db.metadata.drop_all(engine)
+        db.metadata.create_all(engine)
+    finally:
+        engine.dispose()
+
+
+class DatasetGenerator:
+    """基准测试数据集生成器
+
+    生成用户、多级分类、标签、文章(含正文/摘要)、评论树和浏览记录,
+    全部使用 Core 批量插入(executemany), 主键预先分配, 不触发 ORM 事件;
+    分类/标签计数与评论统计在生成过程中直接算出, 分类索引最后整体重建。
+    目标库需为空库, 生成的数据固定由 seed 决定, 便于不同版本之间对比。
+    """
+
+    def __init__(self, articles, seed=42, batch_size=5000, progress=None):
+        self.articles = articles
+        self.seed = seed
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+        self.rng = random.Random(seed)
+
+        self.users = max(articles // 50, 20)
+        self.root_categories = 12
+        self.child_categories = min(max(articles // 2000, 24), 400)
+        self.leaf_categories = self.child_categories // 2
+        self.tags = min(max(articles // 20, 100), 5000)
+
+        self.counts = {}
+
+    # ---- 公共入口 ----
+
+    def prepare(self):
+        """写入站点配置; 目标库已有文章时报错"""
+        if db.session.query(Article.id).first() is not None:
+            raise ValueError('目标数据库已有文章数据, 请使用空库或加 --reset 重建')
+
+        if not db.session.query(SiteConfig.id).first():
+            SiteConfig.init_default_configs({'site_name': 'PPress Bench'})
+        # 宏基准需要访问 JSON API
+        db.session.execute(
+            SiteConfig.__table__.update().where(SiteConfig.key == 'enable_api').values(value='true'))
+        db.session.execute(
+            SiteConfig.__table__.update().where(SiteConfig.key == 'api_token_required').values(value='false'))
+        db.session.commit()
+
+    def generate(self):
+        """生成全部数据, 返回各表行数"""
+        started = datetime.now()
+        self._generate_users()
+        self._generate_categories()
+        self._generate_tags()
+        self._generate_articles()
+        self._generate_views()
+        self._update_counters()
+        self._rebuild_category_index()
+        self.counts['seconds'] = round((datetime.now() - started).total_seconds(), 1)
+        return dict(self.counts)
+
+    # ---- 内部实现 ----
+
+    def _insert(self, table, rows):
+        if rows:
+            db.session.execute(table.insert(), rows)
+
+    def _flush(self, table, rows, force=False):
+        """缓冲区达到批量大小(或 force)时写入并提交"""
+        if rows and (force or len(rows) >= self.batch_size):
+            self._insert(table, rows)
+            db.session.commit()
+            rows.clear()
+
+    def _generate_users(self):
+        now = datetime.now()
+        admin_hash = generate_password_hash(ADMIN_PASSWORD)
+        user_hash = generate_password_hash(USER_PASSWORD)
+        rows = [{
+            'id': 1, 'username': ADMIN_USERNAME, 'nickname': '昵称_admin', 'email': 'admin@bench.local',
+            'password_hash': admin_hash, 'role': 'admin', 'created_at': now, 'last_login': now
+        }]
+        for user_id in range(2, self.users + 1):
+            rows.append({
+                'id': user_id, 'username': f'bench_user{user_id}', 'nickname': f'用户{user_id}',
+                'email': f'user{user_id}@bench.local', 'password_hash': user_hash, 'role': 'user',
+                'created_at': now - timedelta(days=self.rng.randint(0, TIME_SPAN_DAYS)), 'last_login': now
+            })
+            self._flush(User.__table__, rows)
+        self._flush(User.__table__, rows, force=True)
+        self.counts['users'] = self.users
+        self.progress(f'用户: {self.users}')
+
+    def _generate_categories(self):
+        now = datetime.now()
+        rows = []
+        category_id = 0
+        roots = []
+        for index in range(self.root_categories):
+            category_id += 1
+            roots.append(category_id)
+            rows.append(self._category_row(category_id, None, index, now))
+        children = []
+        for index in range(self.child_categories):
+            category_id += 1
+            children.append(category_id)
+            rows.append(self._category_row(category_id, self.rng.choice(roots), index, now))
+        for index in range(self.leaf_categories):
+            category_id += 1
+            rows.append(self._category_row(category_id, self.rng.choice(children), index, now))
+        self._insert(Category.__table__, rows)
+        db.session.commit()
+
+        self.category_ids = [row['id'] for row in rows]
+        self.category_counts = dict.fromkeys(self.category_ids, 0)
+        self.counts['categories'] = len(rows)
+        self.progress(f'分类: {len(rows)}')
+
+    def _category_row(self, category_id, parent_id, index, now):
+        name = f'{self.rng.choice(_CJK_PHRASES)}{category_id}'
+        return {
+            'id': category_id, 'name': name, 'slug': f'bench-category-{category_id}',
+            'description': f'{name} 相关文章', 'parent_id': parent_id, 'sort_order': index,
+            'article_count': 0, 'created_at': now, 'updated_at': now,
+            'use_slug': category_id % 3 == 0
+        }
+
+    def _generate_tags(self):
+        rows = []
+        for tag_id in range(1, self.tags + 1):
+            name = f'{self.rng.choice(_LATIN_WORDS + _CJK_PHRASES)}{tag_id}'
+            rows.append({
+                'id': tag_id, 'name': name, 'slug': slugify(name) or f'tag-{tag_id}',
+                'article_count': 0, 'use_slug': tag_id % 4 == 0
+            })
+            self._flush(Tag.__table__, rows)
+        self._flush(Tag.__table__, rows, force=True)
+        self.tag_counts = [0] * (self.tags + 1)
+        self.counts['tags'] = self.tags
+        self.progress(f'标签: {self.tags}')
+
+    def _build_body_pool(self):
+        pool = []
+        for _ in range(BODY_POOL_SIZE):
+            content = _build_body(self.rng)
+            pool.append((content, summarize_content(content)))
+        return pool
+
+    def _generate_articles(self):
+        rng = self.rng
+        pool = self._build_body_pool()
+        table_mode = body_storage_mode() == STORAGE_TABLE
+        compress = body_compress_enabled()
+        encoded_pool = [ArticleBody.encode(content, compress) for content, _ in pool] if table_mode else None
+
+        pick_tag = _weighted_picker(rng, self.tags, skew=0.8)
+        pick_category = _weighted_picker(rng, len(self.category_ids), skew=0.5)
+        pick_user = _weighted_picker(rng, self.users, skew=1.1)
+
+        start = datetime.now() - timedelta(days=TIME_SPAN_DAYS)
+        step = TIME_SPAN_DAYS * 86400 / self.articles
+
+        article_rows, body_rows, tag_rows, category_rows, comment_rows = [], [], [], [], []
+        comment_id = 0
+        comment_total = 0
+
+        for article_id in range(1, self.articles + 1):
+            created_at = start + timedelta(seconds=article_id * step + rng.random() * step)
+            body_index = rng.randrange(BODY_POOL_SIZE)
+            content, summary = pool[body_index]
+            roll = rng.random()
+            status = Article.STATUS_PUBLIC if roll < 0.95 else (
+                Article.STATUS_HIDDEN if roll < 0.98 else Article.STATUS_PASSWORD)
+            category_id = self.category_ids[pick_category()[0]]
+            author_id = pick_user()[0] + 1
+
+            # 评论树: 约 40% 文章无评论, 其余根评论数量长尾分布, 每条根评论 0~4 条回复
+            comments = []
+            if rng.random() >= 0.4:
+                for _ in range(min(int(rng.expovariate(0.5)) + 1, 60)):
+                    comment_id += 1
+                    root_id = comment_id
+                    root_time = created_at + timedelta(minutes=rng.randint(5, 60 * 24 * 30))
+                    comments.append(self._comment_row(comment_id, article_id, None, None, root_time))
+                    thread = [root_id]
+                    for reply in range(rng.choice((0, 0, 1, 1, 2, 3, 4))):
+                        comment_id += 1
+                        reply_time = root_time + timedelta(minutes=rng.randint(1, 60 * 24 * 7))
+                        comments.append(self._comment_row(comment_id, article_id, root_id,
+                                                          rng.choice(thread), reply_time))
+                        thread.append(comment_id)
+            approved = [row['created_at'] for row in comments if row['status'] == 'approved']
+            comment_total += len(comments)
+            comment_rows.extend(comments)
+
+            article_rows.append({
+                'id': article_id,
+                'title': f'{rng.choice(_CJK_PHRASES)}{rng.choice(_SENTENCE_TAILS)} #{article_id}',
+                'content': '' if table_mode else content,
+                'author_id': author_id,
+                'view_count': int(rng.paretovariate(1.2) * 20),
+                'created_at': created_at,
+                'updated_at': created_at,
+                'category_id': category_id,
+                'status': status,
+                'password': '123456' if status == Article.STATUS_PASSWORD else None,
+                'allow_comment': True,
+                'comment_count': len(approved),
+                'last_commented_at': max(approved) if approved else None,
+                'excerpt': summary['excerpt'],
+                'word_count': summary['word_count'],
+                'reading_time': summary['reading_time'],
+                'toc': summary['toc'],
+            })
+            if table_mode:
+                data, compressed = encoded_pool[body_index]
+                body_rows.append({'article_id': article_id, 'revision': 1, 'compressed': compressed,
+                                  'data': data, 'updated_at': created_at})
+
+            # 标签 1~5 个; 分类: 主分类 + 30% 概率的一个附加分类
+            for tag_index in set(pick_tag(rng.randint(1, 5))):
+                tag_rows.append({'article_id': article_id, 'tag_id': tag_index + 1})
+                self.tag_counts[tag_index + 1] += 1
+            categories = {category_id}
+            if rng.random() < 0.3:
+                categories.add(self.category_ids[pick_category()[0]])
+            for extra_id in categories:
+                category_rows.append({'article_id': article_id, 'category_id': extra_id})
+                self.category_counts[extra_id] += 1
+
+            if len(article_rows) >= self.batch_size:
+                self._write_article_batch(article_rows, body_rows, tag_rows, category_rows, comment_rows)
+                if article_id % (self.batch_size * 10) == 0:
+                    self.progress(f'文章: {article_id}/{self.articles}')
+
+        self._write_article_batch(article_rows, body_rows, tag_rows, category_rows, comment_rows)
+        self.counts['articles'] = self.articles
+        self.counts['comments'] = comment_total
+        self.progress(f'文章: {self.articles}, 评论: {comment_total}')
+
+    def _comment_row(self, comment_id, article_id, parent_id, reply_to_id, created_at):
+        rng = self.rng
+        roll = rng.random()
+        status = 'approved' if roll < 0.9 else ('pending' if roll < 0.97 else 'rejected')
+        is_guest = rng.random() < 0.3
+        return {
+            'id': comment_id, 'content': rng.choice(_COMMENT_TEXTS), 'article_id': article_id,
+            'user_id': None if is_guest else rng.randint(1, self.users),
+            'created_at': created_at, 'parent_id': parent_id, 'reply_to_id': reply_to_id,
+            'guest_name': f'访客{comment_id}' if is_guest else None,
+            'guest_email': f'guest{comment_id}@bench.local' if is_guest else None,
+            'status': status
+        }
+
+    def _write_article_batch(self, article_rows, body_rows, tag_rows, category_rows, comment_rows):
+        for table, rows in ((Article.__table__, article_rows), (ArticleBody.__table__, body_rows),
+                            (article_tags, tag_rows), (article_categories, category_rows),
+                            (Comment.__table__, comment_rows)):
+            self._insert(table, rows)
+            rows.clear()
+        db.session.commit()
+
+    def _generate_views(self):
+        """浏览记录: 每篇文章平均 2 条, 偏向热门文章和活跃用户"""
+        rng = self.rng
+        total = self.articles * 2
+        pick_user = _weighted_picker(rng, self.users, skew=1.1)
+        now = datetime.now()
+        rows = []
+        for view_id in range(1, total + 1):
+            # 文章按 id 偏向较新的文章
+            article_id = self.articles - int(rng.betavariate(1, 3) * self.articles)
+            rows.append({
+                'id': view_id, 'user_id': pick_user()[0] + 1, 'article_id': max(article_id, 1),
+                'viewed_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+            })
+            self._flush(ViewHistory.__table__, rows)
+        self._flush(ViewHistory.__table__, rows, force=True)
+        self.counts['view_history'] = total
+        self.progress(f'浏览记录: {total}')
+
+    def _update_counters(self):
+        category_table = Category.__table__
+        db.session.execute(
+            category_table.update().where(category_table.c.id == db.bindparam('b_id'))
+            .values(article_count=db.bindparam('b_count')),
+            [{'b_id': key, 'b_count': value} for key, value in self.category_counts.items()]
+        )
+        tag_table = Tag.__table__
+        db.session.execute(
+            tag_table.update().where(tag_table.c.id == db.bindparam('b_id'))
+            .values(article_count=db.bindparam('b_count')),
+            [{'b_id': tag_id, 'b_count': count} for tag_id, count in enumerate(self.tag_counts) if count]
+        )
+        db.session.commit()
+
+    def _rebuild_category_index(self):
+        from app.services.category_index_service import CategoryIndexService
+
+        success, result = CategoryIndexService.rebuild_index()
+        if not success:
+            raise RuntimeError(f'重建分类索引失败: {result}')
+        self.counts['category_index'] = result
+        self.progress(f'分类索引: {result}')
@@ -0,0 +1,317 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import requests
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import Article, Category, Tag
+from app.bench.runner import git_revision
+
+# 默认路由权重(按典型博客访问比例)
+DEFAULT_MIX = {
+    'index': 20,
+    'category': 12,
+    'tag': 8,
+    'article': 35,
+    'search': 6,
+    'search_suggestions': 4,
+    'api': 13,
+    'comment': 2,
+}
+
+SEARCH_KEYWORDS = ('性能优化', '缓存策略', '数据库索引', 'flask', 'python', 'redis', 'docker', '并发')
+
+# 各类目标的采样数量
+SAMPLE_ARTICLES = 500
+SAMPLE_TAGS = 200
+MAX_INDEX_PAGES = 20
+
+_CSRF_RE = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+
+
+def parse_mix(value):
+    """解析 --mix, 例如 "article=50,index=20,comment=0"; 未列出的路由沿用默认权重"""
+    mix = dict(DEFAULT_MIX)
+    if not value:
+        return mix
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"未知路由 {name}, 可选: {', '.join(DEFAULT_MIX)}")
+        try:
+            mix[name] = max(float(weight), 0)
+        except ValueError:
+            raise ValueError(f'路由 {name} 的权重无效: {weight}')
+    if not any(mix.values()):
+        raise ValueError('所有路由权重均为 0')
+    return mix
+
+
+def percentile(ordered, percent):
+    """最近秩百分位数(ordered 需已排序)"""
+    if not ordered:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize_latencies(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput': count / elapsed if elapsed else 0.0,
+        'mean': sum(ordered) / count if count else 0.0,
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1] if ordered else 0.0,
+    }
+
+
+class RouteTargets:
+    """从数据库采样各类路由的真实 URL
+
+    命令需使用与被测实例相同的数据库配置运行(或设置 DATABASE_URL 指向它)。
+    """
+
+    def __init__(self):
+        from app.utils.article_url import ArticleUrlGenerator
+
+        public = Article.status == Article.STATUS_PUBLIC
+        total = db.session.query(func.count(Article.id)).filter(public).scalar() or 0
+        if not total:
+            raise ValueError('数据库中没有公开文章, 无法生成压测目标')
+
+        # 在 id 范围内随机取样, 避免 ORDER BY RANDOM() 全表排序
+        max_id = db.session.query(func.max(Article.id)).scalar()
+        sample_ids = random.sample(range(1, max_id + 1), min(SAMPLE_ARTICLES * 2, max_id))
+        rows = db.session.query(Article.id, Article.category_id, Article.created_at)\
+            .filter(public, Article.id.in_(sample_ids)).limit(SAMPLE_ARTICLES).all()
+        if not rows:
+            rows = db.session.query(Article.id, Article.category_id, Article.created_at)\
+                .filter(public).order_by(Article.id.desc()).limit(SAMPLE_ARTICLES).all()
+        self.articles = [
+            (row.id, ArticleUrlGenerator.generate(row.id, row.category_id, row.created_at))
+            for row in rows
+        ]
+        self.categories = [
+            category.slug if category.use_slug else str(category.id)
+            for category in Category.query.with_entities(Category.id, Category.slug, Category.use_slug)
+        ]
+        self.tags = [
+            tag.slug if tag.use_slug else str(tag.id)
+            for tag in Tag.query.with_entities(Tag.id, Tag.slug, Tag.use_slug)
+            .filter(Tag.article_count > 0).order_by(Tag.article_count.desc()).limit(SAMPLE_TAGS)
+        ]
+        self.index_pages = max(min((total + 9) // 10, MAX_INDEX_PAGES), 1)
+
+    def build(self, name, rng):
+        """返回 (method, path, form, headers)"""
+        if name == 'index':
+            # 大部分访问首页, 少量翻页
+            page = 1 if rng.random() < 0.7 else rng.randint(2, self.index_pages)
+            return 'GET', '/' if page == 1 else f'/?page={page}', None, None
+        if name == 'category' and self.categories:
+            return 'GET', f'/category/{rng.choice(self.categories)}', None, None
+        if name == 'tag' and self.tags:
+            return 'GET', f'/tag/{rng.choice(self.tags)}', None, None
+        if name == 'search':
+            return 'GET', f'/search?q={quote(rng.choice(SEARCH_KEYWORDS))}', None, None
+        if name == 'search_suggestions':
+            return 'GET', f'/search/suggestions?q={quote(rng.choice(SEARCH_KEYWORDS)[:2])}', None, None
+        if name == 'api':
+            headers = {'Accept': 'application/json'}
+            roll = rng.random()
+            if roll < 0.4:
+                return 'GET', '/', None, headers
+            if roll < 0.7 and self.categories:
+                return 'GET', f'/category/{rng.choice(self.categories)}', None, headers
+            return 'GET', rng.choice(self.articles)[1], None, headers
+        if name == 'comment':
+            article_id = rng.choice(self.articles)[0]
+            form = {
+                'content': f'压测评论 {rng.randint(1, 1000000)}',
+                'guest_name': '压测访客',
+                'guest_email': 'load@bench.local',
+            }
+            return 'POST', f'/article/{article_id}/comment', form, {'X-Requested-With': 'XMLHttpRequest'}
+        return 'GET', rng.choice(self.articles)[1], None, None
+
+
+class LoadTest:
+    """按权重混合路由, 用多个并发 worker 对运行中的实例发起请求
+
+    每个 worker 一个 HTTP 会话(保持 Cookie, 评论需要会话中的 CSRF 令牌),
+    按持续时间或总请求数停止, 汇总每个路由的吞吐量和 p50/p95/p99 延迟。
+    """
+
+    def __init__(self, base_url, targets, mix=None, workers=4, duration=30, total_requests=None,
+                 timeout=30, seed=None, progress=None):
+        self.base_url = base_url.rstrip('/')
+        self.targets = targets
+        self.mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+        self.workers = workers
+        self.duration = duration
+        self.total_requests = total_requests
+        self.timeout = timeout
+        self.seed = seed
+        self.progress = progress or (lambda message: None)
+
+        self._lock = threading.Lock()
+        self._latencies = {name: [] for name in self.mix}
+        self._errors = {name: 0 for name in self.mix}
+        self._statuses = {name: {} for name in self.mix}
+        self._issued = 0
+
+    def _next_slot(self):
+        """占用一个请求名额, 达到总请求数时返回 False"""
+        with self._lock:
+            if self.total_requests is not None and self._issued >= self.total_requests:
+                return False
+            self._issued += 1
+            return True
+
+    def _csrf_token(self, session):
+        """从首页 meta 标签读取当前会话的 CSRF 令牌"""
+        try:
+            response = session.get(self.base_url + '/', timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        match = _CSRF_RE.search(response.text)
+        return match.group(1) if match else None
+
+    def _worker(self, index, deadline):
+        rng = random.Random(None if self.seed is None else self.seed + index)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        session = requests.Session()
+        csrf_token = None
+        try:
+            while time.perf_counter() < deadline and self._next_slot():
+                name = rng.choices(names, weights)[0]
+                method, path, form, headers = self.targets.build(name, rng)
+                if method == 'POST':
+                    if csrf_token is None:
+                        csrf_token = self._csrf_token(session)
+                    headers = dict(headers or {}, **{'X-CSRFToken': csrf_token or ''})
+
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, self.base_url + path, data=form, headers=headers,
+                                               timeout=self.timeout, allow_redirects=False)
+                    response.content  # 读取完整响应体
+                    status = response.status_code
+                except requests.RequestException:
+                    status = None
+                elapsed = time.perf_counter() - started
+
+                with self._lock:
+                    statuses = self._statuses[name]
+                    statuses[str(status)] = statuses.get(str(status), 0) + 1
+                    if status is None or status >= 500:
+                        self._errors[name] += 1
+                    else:
+                        self._latencies[name].append(elapsed)
+        finally:
+            session.close()
+
+    def run(self):
+        """执行压测并返回结果字典"""
+        deadline = time.perf_counter() + (self.duration if self.duration else float('inf'))
+        started_at = datetime.now()
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(index, deadline), name=f'bench-load-{index}', daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # 每 5 秒输出一次进度
+        while any(thread.is_alive() for thread in threads):
+            next(thread for thread in threads if thread.is_alive()).join(timeout=5)
+            with self._lock:
+                done = sum(len(items) for items in self._latencies.values())
+                errors = sum(self._errors.values())
+            self.progress(f'已完成 {done} 个请求, 错误 {errors}, 用时 {time.perf_counter() - started:.0f}s')
+        elapsed = time.perf_counter() - started
+
+        routes = {
+            name: dict(summarize_latencies(self._latencies[name], self._errors[name], elapsed),
+                       weight=self.mix[name], statuses=self._statuses[name])
+            for name in self.mix
+        }
+        all_latencies = [value for items in self._latencies.values() for value in items]
+        return {
+            'version': 1,
+            'kind': 'load',
+            'datetime': started_at.isoformat(timespec='seconds'),
+            'commit_info': {'id': git_revision()},
+            'config': {
+                'base_url': self.base_url,
+                'workers': self.workers,
+                'duration': self.duration,
+                'total_requests': self.total_requests,
+                'mix': self.mix,
+            },
+            'elapsed': elapsed,
+            'routes': routes,
+            'total': summarize_latencies(all_latencies, sum(self._errors.values()), elapsed),
+        }
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    if report.get('kind') != 'load':
+        raise ValueError(f'{path} 不是压测结果文件')
+    return report
+
+
+def compare_reports(baseline, current, threshold=10.0):
+    """与基线对比: 路由 p95 延迟上升或总吞吐量下降超过 threshold% 视为回归
+
+    单个路由的吞吐量取决于权重分配, 只作参考, 不参与判断。
+
+    Returns:
+        list: [{route, p95_before, p95_after, p95_change, rps_before, rps_after, rps_change, regression}]
+    """
+    def change(before, after):
+        return (after - before) * 100 / before if before else 0.0
+
+    rows = []
+    pairs = [(name, baseline['routes'].get(name), stats) for name, stats in current['routes'].items()]
+    pairs.append(('total', baseline['total'], current['total']))
+    for name, old, new in pairs:
+        if not old or not old['requests'] or not new['requests']:
+            continue
+        p95_change = change(old['p95'], new['p95'])
+        rps_change = change(old['throughput'], new['throughput'])
+        rows.append({
+            'route': name,
+            'p95_before': old['p95'],
+            'p95_after': new['p95'],
+            'p95_change': p95_change,
+            'rps_before': old['throughput'],
+            'rps_after': new['throughput'],
+            'rps_change': rps_change,
+            'regression': p95_change > threshold or (name == 'total' and rps_change < -threshold),
+        })
+    return rows
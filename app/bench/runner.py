@@ -0,0 +1,204 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+# 每轮最短耗时(秒): 单次调用太快时一轮内重复多次, 降低计时误差
+MIN_ROUND_TIME = 0.0005
+# 校准时每轮最多重复次数
+MAX_ITERATIONS = 100000
+
+
+def compute_stats(samples):
+    """按 pytest-benchmark 的字段计算统计值(单位: 秒/次)"""
+    ordered = sorted(samples)
+    count = len(ordered)
+    mean = statistics.fmean(ordered)
+    if count >= 4:
+        quartiles = statistics.quantiles(ordered, n=4)
+        q1, q3 = quartiles[0], quartiles[2]
+    else:
+        q1, q3 = ordered[0], ordered[-1]
+    return {
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': mean,
+        'stddev': statistics.stdev(ordered) if count > 1 else 0.0,
+        'median': statistics.median(ordered),
+        'iqr': q3 - q1,
+        'q1': q1,
+        'q3': q3,
+        'rounds': count,
+        'ops': 1 / mean if mean else 0.0,
+    }
+
+
+def git_revision():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=root, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkSession:
+    """收集一次基准运行的全部结果
+
+    micro: 函数级基准, 先校准每轮重复次数, 再跑 rounds 轮取每次调用的平均耗时;
+    macro: 请求级基准, 每轮一个请求, 同时记录状态码和响应大小。
+    """
+
+    def __init__(self, rounds=20, warmup=2, progress=None):
+        self.rounds = rounds
+        self.warmup = warmup
+        self.progress = progress or (lambda message: None)
+        self.benchmarks = []
+        self.started_at = datetime.now()
+
+    def _calibrate(self, func):
+        iterations = 1
+        while iterations < MAX_ITERATIONS:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            if time.perf_counter() - started >= MIN_ROUND_TIME:
+                break
+            iterations *= 10
+        return iterations
+
+    def bench(self, name, func, group='micro', setup=None, calibrate=True, **extra):
+        """运行一个函数级基准
+
+        Args:
+            func: 被测函数(无参数)
+            setup: 每轮开始前调用(不计时), 例如清空缓存测冷路径; 设置后每轮只调用一次
+            calibrate: 是否校准每轮重复次数, 为 False 时每轮调用一次
+        """
+        try:
+            for _ in range(self.warmup):
+                if setup:
+                    setup()
+                func()
+            iterations = self._calibrate(func) if calibrate and not setup else 1
+            samples = []
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for _ in range(self.rounds):
+                    if setup:
+                        setup()
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        func()
+                    samples.append((time.perf_counter() - started) / iterations)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            result = {'name': name, 'group': group, 'iterations': iterations,
+                      'stats': compute_stats(samples), **extra}
+        except Exception as e:
+            result = {'name': name, 'group': group, 'error': str(e), **extra}
+        self.benchmarks.append(result)
+        self._report(result)
+        return result
+
+    def bench_request(self, name, client, path, method='GET', headers=None, data=None, group='macro'):
+        """通过测试客户端运行一个请求级基准"""
+        statuses = set()
+        sizes = []
+
+        def call():
+            response = client.open(path, method=method, headers=headers, data=data)
+            statuses.add(response.status_code)
+            sizes.append(len(response.get_data()))
+            response.close()
+
+        result = self.bench(name, call, group=group, calibrate=False, path=path, method=method)
+        result['status_codes'] = sorted(statuses)
+        result['response_bytes'] = max(sizes) if sizes else 0
+        return result
+
+    def _report(self, result):
+        if 'error' in result:
+            self.progress(f"{result['name']:<40} 失败: {result['error']}")
+            return
+        stats = result['stats']
+        self.progress(f"{result['name']:<40} mean {format_duration(stats['mean']):>10}  "
+                      f"median {format_duration(stats['median']):>10}  "
+                      f"stddev {format_duration(stats['stddev']):>10}")
+
+    def to_dict(self, dataset=None):
+        return {
+            'version': 1,
+            'machine_info': {
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'cpu_count': os.cpu_count(),
+            },
+            'commit_info': {'id': git_revision()},
+            'datetime': self.started_at.isoformat(timespec='seconds'),
+            'dataset': dataset or {},
+            'benchmarks': self.benchmarks,
+        }
+
+    def save(self, path, dataset=None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(dataset), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def format_duration(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f}s'
+    if seconds >= 0.001:
+        return f'{seconds * 1000:.2f}ms'
+    if seconds >= 0.000001:
+        return f'{seconds * 1000000:.2f}us'
+    return f'{seconds * 1000000000:.0f}ns'
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, metric='median', threshold=10.0):
+    """对比两次结果
+
+    Returns:
+        list: [{name, group, baseline, current, change(%), regression}], 只包含两边都成功的基准
+    """
+    baseline_map = {(item['group'], item['name']): item for item in baseline['benchmarks'] if 'stats' in item}
+    rows = []
+    for item in current['benchmarks']:
+        old = baseline_map.get((item['group'], item['name']))
+        if old is None or 'stats' not in item:
+            continue
+        before = old['stats'][metric]
+        after = item['stats'][metric]
+        change = (after - before) * 100 / before if before else 0.0
+        rows.append({
+            'name': item['name'],
+            'group': item['group'],
+            'baseline': before,
+            'current': after,
+            'change': change,
+            'regression': change > threshold,
+        })
+    return rows
+
+
+def default_output_path(instance_path, label=None):
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    name = f'{label}-{stamp}.json' if label else f'{stamp}.json'
+    return os.path.join(instance_path, 'bench', name)
+
@@ -0,0 +1,138 @@
+import itertools
+from urllib.parse import quote
+
+from flask import current_app
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import User, Article, ArticleBody, Tag, Category, Comment, ViewHistory
+from app.models.article_body import body_storage_mode
+from app.utils.cache_manager import CacheManager
+
+# ArticleUrlGenerator 基准覆盖的 URL 模式(后台可选的几种, slug 需要逐篇查询单独列出)
+URL_PATTERNS = ('article/{id}', '{year}/{month}/{day}/{id}', '{category}/{id}', 'p/{encodeid}')
+
+# 搜索基准使用的关键词(与数据集生成器的词表一致)
+SEARCH_KEYWORDS = ('性能优化', 'flask')
+
+
+def describe_dataset():
+    """当前数据库的数据规模, 写入结果文件便于区分不同数据集"""
+    counts = {}
+    for name, model in (('users', User), ('articles', Article), ('comments', Comment),
+                        ('tags', Tag), ('categories', Category), ('view_history', ViewHistory)):
+        counts[name] = db.session.query(func.count(model.id)).scalar()
+    counts['article_bodies'] = db.session.query(func.count(ArticleBody.article_id)).scalar()
+    counts['dialect'] = db.engine.dialect.name
+    counts['body_storage'] = body_storage_mode()
+    return counts
+
+
+def _sample_targets():
+    """挑选基准用到的典型数据: 评论最多的公开文章、文章最多的分类和标签"""
+    article = Article.query.filter_by(status=Article.STATUS_PUBLIC)\
+        .order_by(Article.comment_count.desc(), Article.id).first()
+    category = Category.query.order_by(Category.article_count.desc(), Category.id).first()
+    tag = Tag.query.order_by(Tag.article_count.desc(), Tag.id).first()
+    if article is None:
+        raise ValueError('数据库中没有公开文章, 请先执行 flask bench seed 生成数据集')
+    return article, category, tag
+
+
+def run_micro(session):
+    """函数级基准: CacheManager、IdEncoder、ArticleUrlGenerator、评论树分页"""
+    from app.services.blog_service import BlogService
+    from app.services.comment_service import CommentService
+    from app.utils.article_url import ArticleUrlGenerator
+    from app.utils.id_encoder import IdEncoder
+
+    article, _, _ = _sample_targets()
+    article_ids = [row.id for row in db.session.query(Article.id).order_by(Article.id).limit(1000)]
+
+    # ---- CacheManager: 使用独立实例, 不影响全局缓存 ----
+    cache = CacheManager(max_size=1000)
+    for index in range(cache._max_size):
+        cache.set(f'bench:fill:{index}', (index, 'value'))
+    cache.set('bench:tuple', (article.id, article.title))
+    cache.set('bench:model', article)
+    miss_keys = itertools.count()
+
+    session.bench('cache_manager.get.hit', lambda: cache.get('bench:tuple'), group='cache_manager')
+    session.bench('cache_manager.get.hit_model', lambda: cache.get('bench:model'), group='cache_manager')
+    session.bench('cache_manager.get.miss_factory',
+                  lambda: cache.get(f'bench:miss:{next(miss_keys)}', lambda: (1, 2)),
+                  group='cache_manager')
+    session.bench('cache_manager.set.evict',
+                  lambda: cache.set(f'bench:set:{next(miss_keys)}', (1, 2)), group='cache_manager')
+    session.bench('cache_manager.delete.wildcard_scan',
+                  lambda: cache.delete('bench:not-exists:*'), group='cache_manager')
+
+    # ---- IdEncoder ----
+    def clear_id_cache():
+        IdEncoder._encoded_cache.clear()
+        IdEncoder._decoded_cache.clear()
+
+    encoded = IdEncoder.encode(article.id)
+    session.bench('id_encoder.encode.cached', lambda: IdEncoder.encode(article.id), group='id_encoder')
+    session.bench('id_encoder.encode.cold', lambda: IdEncoder.encode(article.id),
+                  group='id_encoder', setup=clear_id_cache)
+    session.bench('id_encoder.encode.1000_ids', lambda: [IdEncoder.encode(i) for i in article_ids],
+                  group='id_encoder', setup=clear_id_cache)
+    IdEncoder.encode(article.id)
+    session.bench('id_encoder.decode.cached', lambda: IdEncoder.decode(encoded), group='id_encoder')
+
+    # ---- ArticleUrlGenerator: 逐个模式测 generate / parse ----
+    original_pattern = ArticleUrlGenerator._pattern_cache
+    try:
+        for pattern in URL_PATTERNS:
+            ArticleUrlGenerator._pattern_cache = pattern
+            url = ArticleUrlGenerator.generate(article.id, article.category_id, article.created_at)
+            session.bench(f'article_url.generate[{pattern}]',
+                          lambda: ArticleUrlGenerator.generate(article.id, article.category_id, article.created_at),
+                          group='article_url')
+            session.bench(f'article_url.parse[{pattern}]', lambda: ArticleUrlGenerator.parse(url),
+                          group='article_url')
+    finally:
+        ArticleUrlGenerator._pattern_cache = original_pattern
+
+    # ---- 评论树分页 ----
+    session.bench('get_article_comments.cached', lambda: BlogService.get_article_comments(article.id),
+                  group='comments', comments=article.comment_count)
+    session.bench('get_article_comments.cold', lambda: BlogService.get_article_comments(article.id),
+                  group='comments', setup=lambda: CommentService.invalidate(article_id=article.id),
+                  comments=article.comment_count)
+
+
+def macro_targets():
+    """宏基准的请求列表 [(名称, 路径, 请求头)]"""
+    from app.utils.article_url import ArticleUrlGenerator
+
+    article, category, tag = _sample_targets()
+    article_url = ArticleUrlGenerator.generate(article.id, article.category_id, article.created_at)
+    json_headers = {'Accept': 'application/json'}
+    targets = [
+        ('index', '/', None),
+        ('index.page_50', '/?page=50', None),
+        ('article', article_url, None),
+        ('search.suggestions', f'/search/suggestions?q={quote(SEARCH_KEYWORDS[0][:2])}', None),
+        ('api.index', '/', json_headers),
+        ('api.article', article_url, json_headers),
+    ]
+    if category is not None:
+        targets.append(('category', f'/category/{category.id}', None))
+        targets.append(('category.page_20', f'/category/{category.id}?page=20', None))
+        targets.append(('api.category', f'/category/{category.id}', json_headers))
+    if tag is not None:
+        targets.append(('tag', f'/tag/{tag.id}', None))
+    for keyword in SEARCH_KEYWORDS:
+        targets.append((f'search[{keyword}]', f'/search?q={quote(keyword)}', None))
+    return targets
+
+
+def run_macro(session, app=None):
+    """请求级基准: 通过 Flask 测试客户端以匿名访客访问主要页面"""
+    app = app or current_app._get_current_object()
+    targets = macro_targets()
+    client = app.test_client()
+    for name, path, headers in targets:
+        session.bench_request(f'route.{name}', client, path, headers=headers)
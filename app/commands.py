@@ -0,0 +1,541 @@
+import click
+from flask.cli import AppGroup
+
+category_index_cli = AppGroup('category-index', help='分类文章索引维护')
+
+
+@category_index_cli.command('rebuild')
+def rebuild_category_index():
+    """全量重建分类文章索引"""
+    from app.services.category_index_service import CategoryIndexService
+
+    success, result = CategoryIndexService.rebuild_index()
+    if not success:
+        raise click.ClickException(f'重建失败: {result}')
+    click.echo(f'分类索引重建完成, 共 {result} 行')
+
+
+comments_cli = AppGroup('comments', help='评论统计维护')
+
+
+@comments_cli.command('backfill')
+def backfill_comment_stats():
+    """按已审核评论全量回填 comment_count / last_commented_at"""
+    from app.services.comment_service import CommentService
+
+    success, result = CommentService.backfill_stats()
+    if not success:
+        raise click.ClickException(f'回填失败: {result}')
+    click.echo(f"评论统计回填完成, 文章 {len(result['articles'])} 篇, "
+               f"自定义页面 {len(result['custom_pages'])} 个有变更")
+
+
+@comments_cli.command('verify')
+def verify_comment_stats():
+    """校验评论统计, 不一致时以非零状态退出"""
+    from app.services.comment_service import CommentService
+
+    mismatches = CommentService.verify_stats()
+    total = 0
+    for name, rows in mismatches.items():
+        for row in rows:
+            click.echo(f"{name}#{row['id']}: {row['old_count']} -> {row['new_count']}")
+        total += len(rows)
+    if total:
+        raise click.ClickException(f'{total} 条评论统计不一致, 可执行 flask comments backfill 修复')
+    click.echo('评论统计一致')
+
+
+articles_cli = AppGroup('articles', help='文章数据维护')
+
+
+@articles_cli.command('rebuild-summaries')
+@click.option('--batch-size', default=200, show_default=True, help='每批处理的文章数')
+@click.option('--missing-only', is_flag=True, help='只处理尚未生成摘要的文章')
+def rebuild_article_summaries(batch_size, missing_only):
+    """重算文章摘要、字数、阅读时长和目录"""
+    from app.services.blog_service import BlogService
+
+    success, result = BlogService.rebuild_article_summaries(batch_size, only_missing=missing_only)
+    if not success:
+        raise click.ClickException(f'重算失败: {result}')
+    click.echo(f'文章摘要重算完成, 共 {result} 篇')
+
+
+@articles_cli.command('migrate-bodies')
+@click.option('--to', 'target', type=click.Choice(['table', 'inline']), required=True,
+              help='table: 移入 article_bodies; inline: 移回 articles.content')
+@click.option('--compress/--no-compress', default=None,
+              help='移入正文表时是否压缩, 默认取 ARTICLE_BODY_COMPRESS')
+@click.option('--batch-size', default=200, show_default=True, help='每批迁移的文章数')
+def migrate_article_bodies(target, compress, batch_size):
+    """在文章表与正文表之间分批迁移正文"""
+    from flask import current_app
+    from app.services.blog_service import BlogService
+
+    if compress is None:
+        compress = current_app.config.get('ARTICLE_BODY_COMPRESS', False)
+    success, result = BlogService.migrate_article_bodies(target, batch_size, compress)
+    if not success:
+        raise click.ClickException(f'迁移失败: {result}')
+    click.echo(f'正文迁移完成, 共 {result} 篇')
+    if current_app.config.get('ARTICLE_BODY_STORAGE') != target:
+        click.echo(f'提示: 请将 ARTICLE_BODY_STORAGE 设置为 {target}, 否则新保存的文章仍按原模式存储')
+
+
+bench_cli = AppGroup('bench', help='基准测试(数据集生成、运行与结果对比)')
+
+
+@bench_cli.command('seed')
+@click.option('--size', type=click.Choice(['10k', '100k', '1m']), default='10k', show_default=True,
+              help='数据集规模(文章数)')
+@click.option('--articles', type=int, default=None, help='自定义文章数, 覆盖 --size')
+@click.option('--database', default=None,
+              help='目标数据库 URL, 例如 sqlite:///instance/bench-10k.db; 默认为当前数据库')
+@click.option('--reset', is_flag=True, help='先删除目标库中的全部表再生成')
+@click.option('--seed', 'random_seed', default=42, show_default=True, help='随机种子, 相同种子生成相同数据')
+@click.option('--batch-size', default=5000, show_default=True, help='每批插入的行数')
+def bench_seed(size, articles, database, reset, random_seed, batch_size):
+    """生成基准测试数据集(用户、分类、标签、文章、评论树、浏览记录)"""
+    from flask import current_app
+    from app import create_app
+    from app.bench.dataset import DATASET_SIZES, DatasetGenerator, create_schema
+
+    target_url = database or current_app.config['SQLALCHEMY_DATABASE_URI']
+    if reset:
+        click.confirm(f'将删除 {target_url} 中的全部数据, 确定继续?', abort=True)
+
+    # 目标库可能是空库: 先建表, 再使用不加载插件/路由的精简应用实例写入数据
+    create_schema(target_url, reset=reset)
+    bench_app = create_app(init_components=False, database_url=target_url)
+    generator = DatasetGenerator(articles or DATASET_SIZES[size], seed=random_seed,
+                                 batch_size=batch_size, progress=click.echo)
+    with bench_app.app_context():
+        try:
+            generator.prepare()
+            counts = generator.generate()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    click.echo('数据集生成完成: ' + ', '.join(f'{key}={value}' for key, value in counts.items()))
+    if database:
+        click.echo(f'运行基准: DATABASE_URL={database} flask bench run')
+
+
+@bench_cli.command('run')
+@click.option('--micro/--no-micro', default=True, help='是否运行函数级基准')
+@click.option('--macro/--no-macro', default=True, help='是否运行路由基准')
+@click.option('--rounds', default=20, show_default=True, help='每个基准的轮数')
+@click.option('--warmup', default=2, show_default=True, help='每个基准的预热次数')
+@click.option('--label', default=None, help='结果标签, 用于默认文件名')
+@click.option('--output', '-o', default=None, help='结果 JSON 路径, 默认 instance/bench/<label>-<时间>.json')
+def bench_run(micro, macro, rounds, warmup, label, output):
+    """对当前数据库运行基准测试并保存 JSON 结果"""
+    from flask import current_app
+    from app.bench.runner import BenchmarkSession, default_output_path
+    from app.bench.suites import describe_dataset, run_micro, run_macro
+
+    try:
+        dataset = describe_dataset()
+        click.echo('数据集: ' + ', '.join(f'{key}={value}' for key, value in dataset.items()))
+        session = BenchmarkSession(rounds=rounds, warmup=warmup, progress=click.echo)
+        if micro:
+            run_micro(session)
+        if macro:
+            run_macro(session)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    path = session.save(output or default_output_path(current_app.instance_path, label), dataset)
+    failed = [item['name'] for item in session.benchmarks if 'error' in item]
+    click.echo(f'结果已保存: {path}')
+    if failed:
+        raise click.ClickException(f"{len(failed)} 个基准失败: {', '.join(failed)}")
+
+
+@bench_cli.command('compare')
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.argument('current', type=click.Path(exists=True, dir_okay=False))
+@click.option('--metric', type=click.Choice(['min', 'mean', 'median']), default='median', show_default=True,
+              help='对比的统计值')
+@click.option('--threshold', default=10.0, show_default=True, help='变慢超过该百分比视为回归')
+def bench_compare(baseline, current, metric, threshold):
+    """对比两份基准结果, 存在回归时以非零状态退出"""
+    from app.bench.runner import compare_results, format_duration, load_results
+
+    rows = compare_results(load_results(baseline), load_results(current), metric, threshold)
+    if not rows:
+        raise click.ClickException('两份结果没有可对比的基准')
+    for row in rows:
+        flag = '  <-- 回归' if row['regression'] else ''
+        click.echo(f"{row['name']:<45} {format_duration(row['baseline']):>10} -> "
+                   f"{format_duration(row['current']):>10}  {row['change']:+7.1f}%{flag}")
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        raise click.ClickException(f'{len(regressions)} 个基准变慢超过 {threshold}%')
+    click.echo(f'共 {len(rows)} 个基准, 无回归')
+
+
+@bench_cli.command('load')
+@click.option('--url', 'base_url', default='http://127.0.0.1:5000', show_default=True, help='被测实例地址')
+@click.option('--workers', '-w', default=8, show_default=True, help='并发 worker 数')
+@click.option('--duration', '-d', default=30, show_default=True, help='持续时间(秒), 0 表示只按 --requests 停止')
+@click.option('--requests', '-n', 'total_requests', type=int, default=None, help='总请求数上限')
+@click.option('--mix', default=None,
+              help='路由权重, 例如 "article=50,index=20,comment=0"; 可选 index/category/tag/article/'
+                   'search/search_suggestions/api/comment')
+@click.option('--timeout', default=30, show_default=True, help='单个请求超时(秒)')
+@click.option('--seed', 'random_seed', type=int, default=None, help='随机种子, 固定后请求序列可复现')
+@click.option('--label', default=None, help='结果标签, 用于默认文件名')
+@click.option('--output', '-o', default=None, help='结果 JSON 路径(可作为之后的 --baseline), 默认 instance/bench/')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='与该结果对比, p95 上升或吞吐量下降超过阈值时以非零状态退出')
+@click.option('--threshold', default=10.0, show_default=True, help='回归阈值(百分比)')
+def bench_load(base_url, workers, duration, total_requests, mix, timeout, random_seed, label, output,
+               baseline, threshold):
+    """按权重混合真实路由对运行中的实例压测, 输出各路由吞吐量和 p50/p95/p99
+
+    目标 URL 从当前数据库采样, 需与被测实例使用同一数据库;
+    comment 路由会以游客身份真实写入评论, 不需要时用 --mix comment=0 关闭。
+    """
+    from flask import current_app
+    from app.bench.load import LoadTest, RouteTargets, compare_reports, load_report, parse_mix, save_report
+    from app.bench.runner import default_output_path, format_duration
+
+    if not duration and not total_requests:
+        raise click.ClickException('--duration 为 0 时必须指定 --requests')
+    try:
+        weights = parse_mix(mix)
+        targets = RouteTargets()
+        baseline_report = load_report(baseline) if baseline else None
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f'压测 {base_url}: {workers} 个 worker, '
+               f"{f'{duration} 秒' if duration else ''}{f' 最多 {total_requests} 个请求' if total_requests else ''}")
+    report = LoadTest(base_url, targets, weights, workers=workers, duration=duration,
+                      total_requests=total_requests, timeout=timeout, seed=random_seed,
+                      progress=click.echo).run()
+
+    click.echo(f"{'路由':<20}{'请求':>8}{'错误':>6}{'req/s':>9}{'p50':>11}{'p95':>11}{'p99':>11}{'max':>11}")
+    rows = [(name, stats) for name, stats in report['routes'].items()] + [('total', report['total'])]
+    for name, stats in rows:
+        click.echo(f"{name:<20}{stats['requests']:>8}{stats['errors']:>6}{stats['throughput']:>9.1f}"
+                   f"{format_duration(stats['p50']):>11}{format_duration(stats['p95']):>11}"
+                   f"{format_duration(stats['p99']):>11}{format_duration(stats['max']):>11}")
+
+    path = save_report(report, output or default_output_path(current_app.instance_path, f"load-{label or 'run'}"))
+    click.echo(f'结果已保存: {path}')
+
+    if baseline_report:
+        click.echo(f'与基线对比 ({baseline}):')
+        if baseline_report['config']['workers'] != workers or baseline_report['config']['mix'] != report['config']['mix']:
+            click.echo('注意: 基线的 worker 数或路由权重与本次不同, 对比结果仅供参考')
+        comparison = compare_reports(baseline_report, report, threshold)
+        for row in comparison:
+            flag = '  <-- 回归' if row['regression'] else ''
+            click.echo(f"{row['route']:<20} p95 {format_duration(row['p95_before']):>10} -> "
+                       f"{format_duration(row['p95_after']):>10} ({row['p95_change']:+.1f}%)  "
+                       f"req/s {row['rps_before']:.1f} -> {row['rps_after']:.1f} ({row['rps_change']:+.1f}%){flag}")
+        regressions = [row for row in comparison if row['regression']]
+        if regressions:
+            raise click.ClickException(f'{len(regressions)} 个路由相对基线回归超过 {threshold}%')
+    if report['total']['errors']:
+        raise click.ClickException(f"压测期间出现 {report['total']['errors']} 个错误(5xx 或连接失败)")
+
+
+jobs_cli = AppGroup('jobs', help='定时任务管理')
+
+
+def _get_job(name):
+    from app.utils.scheduler import scheduler
+
+    job = scheduler.get_job(name)
+    if job is None:
+        names = ', '.join(item.name for item in scheduler.jobs)
+        raise click.ClickException(f'任务不存在: {name}, 可选: {names}')
+    return job
+
+
+@jobs_cli.command('list')
+def list_jobs():
+    """列出定时任务及其状态"""
+    from app.utils.scheduler import scheduler
+
+    for job in scheduler.get_status()['jobs']:
+        state = '暂停' if job['paused'] else '启用'
+        duration = f"{job['last_duration']:.2f}s" if job['last_duration'] is not None else '-'
+        click.echo(f"{job['name']:<18} {job['schedule']:<14} {state}  下次 {job['next_run'] or '-':<19}  "
+                   f"上次 {job['last_run'] or '-':<19} {job['last_status'] or '-':<8} {duration:>8}  {job['description']}")
+
+
+@jobs_cli.command('history')
+@click.argument('name', required=False)
+@click.option('--limit', '-n', default=20, show_default=True, help='显示条数')
+def job_history(name, limit):
+    """查看任务执行历史"""
+    from app.utils.scheduler import scheduler
+
+    if name:
+        _get_job(name)
+    for run in scheduler.get_history(name, limit):
+        duration = f'{run.duration:.2f}s' if run.duration is not None else '-'
+        click.echo(f"{run.started_at:%Y-%m-%d %H:%M:%S}  {run.job_name:<18} {run.status:<8} {duration:>8}  "
+                   f"{run.owner or '-'}  {run.result or ''}")
+
+
+@jobs_cli.command('run')
+@click.argument('name')
+def run_job(name):
+    """立即在当前进程执行一次任务(记录到执行历史)"""
+    from app.models import JobRun
+    from app.utils.scheduler import scheduler
+
+    status, result = scheduler.run_job(_get_job(name))
+    if status != JobRun.STATUS_SUCCESS:
+        raise click.ClickException(f'{name} 执行失败: {result}')
+    click.echo(f'{name} 执行完成: {result}')
+
+
+@jobs_cli.command('pause')
+@click.argument('name')
+def pause_job(name):
+    """暂停任务"""
+    from app.utils.scheduler import scheduler
+
+    _get_job(name)
+    success, result = scheduler.set_paused(name, True)
+    if not success:
+        raise click.ClickException(result)
+    click.echo(f'{name} 已暂停')
+
+
+@jobs_cli.command('resume')
+@click.argument('name')
+def resume_job(name):
+    """恢复任务"""
+    from app.utils.scheduler import scheduler
+
+    _get_job(name)
+    success, result = scheduler.set_paused(name, False)
+    if not success:
+        raise click.ClickException(result)
+    click.echo(f'{name} 已恢复')
+
+
+tasks_cli = AppGroup('tasks', help='后台任务队列')
+
+
+@tasks_cli.command('worker')
+@click.option('--threads', '-t', default=None, type=int, help='worker 线程数, 默认 TASK_QUEUE_WORKERS')
+def tasks_worker(threads):
+    """在前台运行独立的任务 worker 进程(Ctrl+C 退出)"""
+    import time
+    from flask import current_app
+    from app.utils.task_queue import task_queue
+
+    app = current_app._get_current_object()
+    if task_queue.backend_name == 'inline':
+        raise click.ClickException('TASK_QUEUE_BACKEND 为 inline, 任务在请求中同步执行, 无需 worker')
+    task_queue.start(app, workers=threads or max(app.config.get('TASK_QUEUE_WORKERS', 2), 1))
+    click.echo(f'任务 worker 已启动, 后端 {task_queue.backend_name}, 按 Ctrl+C 退出')
+    try:
+        while task_queue.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        task_queue.stop()
+
+
+@tasks_cli.command('stats')
+def tasks_stats():
+    """显示队列深度"""
+    from app.utils.task_queue import task_queue
+
+    stats = task_queue.stats()
+    click.echo(f"后端 {stats['backend']}: 待执行 {stats['ready']}, 执行中 {stats['running']}, "
+               f"延迟/等待重试 {stats['delayed']}, 失败 {stats['dead']}, "
+               f"最早任务已等待 {stats['oldest_wait']:.1f}s")
+
+
+@tasks_cli.command('dead')
+@click.option('--limit', '-n', default=50, show_default=True, help='显示条数')
+def tasks_dead(limit):
+    """列出重试次数用尽的任务"""
+    from app.utils.task_queue import task_queue
+
+    for task in task_queue.dead_tasks(limit):
+        click.echo(f'#{task.id} {task.name} 执行 {task.attempts} 次: {task.last_error}')
+
+
+@tasks_cli.command('retry')
+@click.argument('task_id', type=int, required=False)
+def tasks_retry(task_id):
+    """失败任务重新入队, 不指定 ID 时处理全部"""
+    from app.utils.task_queue import task_queue
+
+    click.echo(f'已重新入队 {task_queue.requeue_dead(task_id)} 个任务')
+
+
+@tasks_cli.command('purge')
+@click.argument('task_id', type=int, required=False)
+def tasks_purge(task_id):
+    """删除失败任务, 不指定 ID 时删除全部"""
+    from app.utils.task_queue import task_queue
+
+    click.echo(f'已删除 {task_queue.delete_dead(task_id)} 个任务')
+
+
+mail_cli = AppGroup('mail', help='邮件发送')
+
+
+@mail_cli.command('sink')
+@click.option('--host', default='127.0.0.1', show_default=True, help='监听地址')
+@click.option('--port', '-p', default=1025, show_default=True, help='监听端口')
+@click.option('--output', '-o', default=None, help='.eml 保存目录, 默认 instance/mail')
+def mail_sink(host, port, output):
+    """运行本地调试 SMTP 服务器, 收到的邮件只保存不投递(Ctrl+C 退出)"""
+    import os
+    from flask import current_app
+    from app.utils.mail_sink import MailSink
+
+    output = output or os.path.join(current_app.instance_path, 'mail')
+    sink = MailSink(host, port, output, on_message=lambda item: click.echo(
+        f"{item['sender']} -> {', '.join(item['recipients'])}: {item['subject']} ({item['path']})"))
+    click.echo(f'调试 SMTP 服务器监听 {host}:{port}, 邮件保存到 {output}')
+    click.echo(f'发送端设置 MAIL_HOST={host} MAIL_PORT={port} MAIL_USE_TLS=0')
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+@mail_cli.command('send')
+@click.argument('to')
+@click.option('--subject', '-s', default='PPress 测试邮件', show_default=True, help='主题')
+@click.option('--body', '-b', default='这是一封测试邮件。', show_default=True, help='正文')
+def mail_send(to, subject, body):
+    """按当前配置同步发送一封邮件, 用于检查 SMTP 设置"""
+    from app.utils.mailer import build_message, mailer
+
+    sent, remaining, error = mailer.deliver([build_message(to, subject, body)])
+    mailer.close()
+    if remaining:
+        raise click.ClickException(f'发送失败: {error}')
+    click.echo(f'已发送到 {to}')
+
+
+images_cli = AppGroup('images', help='上传图片衍生图')
+
+
+@images_cli.command('derive')
+@click.option('--all', 'regenerate', is_flag=True, help='重新生成全部图片, 默认只处理尚无衍生图的')
+def images_derive(regenerate):
+    """为已上传的图片生成缩小版和 WebP 版"""
+    from app.models import File
+    from app.utils.image_derivatives import derivative_pool, generate_derivatives
+
+    query = File.query.filter(File.file_type.like('images/%'))
+    if not regenerate:
+        query = query.filter(File.variants.is_(None))
+    file_ids = [file_id for (file_id,) in query.with_entities(File.id).order_by(File.id).all()]
+    failed = 0
+    try:
+        with click.progressbar(file_ids, label='生成衍生图') as bar:
+            for file_id in bar:
+                success, result = generate_derivatives(file_id)
+                if not success:
+                    failed += 1
+                    click.echo(f'\n#{file_id}: {result}', err=True)
+    finally:
+        derivative_pool.shutdown()
+    click.echo(f'处理 {len(file_ids)} 个文件, 失败 {failed} 个')
+
+
+@images_cli.command('rewrite')
+@click.option('--batch-size', default=200, show_default=True, help='每批处理的文章数')
+def images_rewrite(batch_size):
+    """按当前衍生图重写已有文章正文中 <img> 的 srcset"""
+    from app import db
+    from app.models import Article
+    from app.utils.image_derivatives import add_image_srcset
+
+    changed = 0
+    last_id = 0
+    while True:
+        articles = Article.query.filter(Article.id > last_id).order_by(Article.id).limit(batch_size).all()
+        if not articles:
+            break
+        for article in articles:
+            content = article.content
+            if '/static/uploads/' not in content:
+                continue
+            rewritten = add_image_srcset(content)
+            if rewritten != content:
+                article.content = rewritten
+                changed += 1
+            else:
+                db.session.expire(article)
+        db.session.commit()
+        last_id = articles[-1].id
+    click.echo(f'已更新 {changed} 篇文章')
+
+
+assets_cli = AppGroup('assets', help='静态资源')
+
+
+@assets_cli.command('build')
+@click.option('--output', '-o', default=None, help='构建目录, 默认 ASSETS_BUILD_DIR')
+@click.option('--no-compress', is_flag=True, help='只生成清单, 不预压缩')
+def assets_build(output, no_compress):
+    """为 app/static(含主题)和插件静态目录生成带哈希的清单, 并预压缩为 .gz/.br"""
+    from flask import current_app
+    from app.utils.assets import brotli, build_assets
+
+    manifest = build_assets(current_app._get_current_object(), output, compress=not no_compress)
+    for namespace, data in manifest['namespaces'].items():
+        files = data['files'].values()
+        compressed = sum(1 for entry in files if entry['encodings'])
+        click.echo(f"{namespace}: {len(data['files'])} 个文件, 预压缩 {compressed} 个, 目录摘要 {data['digest']}")
+    if brotli is None and not no_compress:
+        click.echo('未安装 brotli, 只生成了 .gz')
+
+
+themes_cli = AppGroup('themes', help='主题模板')
+
+
+@themes_cli.command('compile')
+@click.option('--theme', 'themes', multiple=True, help='要编译的主题(可重复), 默认当前主题')
+@click.option('--all', 'all_themes', is_flag=True, help='编译全部主题, 切换主题后无需重新编译')
+@click.option('--clear', is_flag=True, help='编译前清空字节码缓存')
+def themes_compile(themes, all_themes, clear):
+    """预编译主题和后台模板到字节码缓存, 部署后 worker 首次渲染无需编译"""
+    from flask import current_app
+    from app.utils.template_cache import compile_templates, theme_names
+
+    app = current_app._get_current_object()
+    cache = app.jinja_env.bytecode_cache
+    if cache is None:
+        raise click.ClickException('未启用字节码缓存, 请设置 TEMPLATE_BYTECODE_CACHE_DIR')
+    if all_themes:
+        themes = theme_names(app)
+    if clear:
+        cache.clear()
+    compiled, errors = compile_templates(app, list(themes) or None)
+    for name, message in errors:
+        click.echo(f'{name}: {message}', err=True)
+    click.echo(f'已编译 {compiled} 个模板, 失败 {len(errors)} 个, 缓存目录 {cache.directory}')
+
+
+def register_commands(app):
+    """注册 flask 命令行命令"""
+    app.cli.add_command(category_index_cli)
+    app.cli.add_command(comments_cli)
+    app.cli.add_command(articles_cli)
+    app.cli.add_command(bench_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(tasks_cli)
+    app.cli.add_command(mail_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(themes_cli)
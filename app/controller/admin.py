@@ -690,6 +690,122 @@ def cache_stats():
         current_app.logger.error(f"Cache stats error: {str(e)}")
         abort(500)
 
+@bp.route('/sql')
+
+@admin_required
+def sql_stats():
+    """SQL 监控"""
+    try:
+        data, error = AdminService.get_sql_stats(sort=request.args.get('sort', 'db_time'))
+        if error:
+            flash(error)
+            return redirect(url_for('admin.dashboard'))
+
+        return render_template('admin/sql.html', **data)
+
+    except Exception as e:
+        current_app.logger.error(f"SQL stats error: {str(e)}")
+        abort(500)
+
+@bp.route('/sql/reset', methods=['POST'])
+
+@admin_required
+def reset_sql_stats():
+    """清空 SQL 监控统计"""
+    from app.utils.sql_monitor import sql_monitor
+    sql_monitor.reset()
+    return jsonify({'message': 'SQL 统计已清空'}), 200
+
+@bp.route('/profiler', methods=['GET', 'POST'])
+
+@admin_required
+def profiler():
+    """请求性能分析"""
+    try:
+        if request.method == 'POST':
+            success, error = AdminService.update_profiler_settings(request.form)
+            flash('设置已保存' if success else error)
+            return redirect(url_for('admin.profiler'))
+
+        data, error = AdminService.get_profiler_data()
+        if error:
+            flash(error)
+            return redirect(url_for('admin.dashboard'))
+
+        return render_template('admin/profiler.html', **data)
+
+    except Exception as e:
+        current_app.logger.error(f"Profiler error: {str(e)}")
+        abort(500)
+
+@bp.route('/profiler/clear', methods=['POST'])
+
+@admin_required
+def profiler_clear():
+    """清空性能分析数据"""
+    from app.utils.profiler import request_profiler
+    request_profiler.clear()
+    return jsonify({'message': '分析数据已清空'}), 200
+
+@bp.route('/profiler/download/<kind>')
+
+@admin_required
+def profiler_download(kind):
+    """下载分析结果: collapsed 为折叠栈文本, pstats 为 cProfile 统计文件"""
+    from app.utils.profiler import request_profiler
+
+    if kind == 'collapsed':
+        data = request_profiler.export_collapsed()
+        mimetype, filename = 'text/plain', 'ppress-profile.folded'
+    elif kind == 'pstats':
+        data = request_profiler.export_pstats()
+        mimetype, filename = 'application/octet-stream', 'ppress-profile.pstats'
+    else:
+        abort(404)
+
+    if not data:
+        flash('暂无分析数据')
+        return redirect(url_for('admin.profiler'))
+
+    return current_app.response_class(
+        data,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@bp.route('/tasks')
+
+@admin_required
+def task_queue_stats():
+    """后台任务队列"""
+    try:
+        data, error = AdminService.get_task_queue_data()
+        if error:
+            flash(error)
+            return redirect(url_for('admin.dashboard'))
+
+        return render_template('admin/tasks.html', **data)
+
+    except Exception as e:
+        current_app.logger.error(f"Task queue stats error: {str(e)}")
+        abort(500)
+
+@bp.route('/tasks/dead/<action>', methods=['POST'])
+
+@admin_required
+def task_queue_dead(action):
+    """失败任务: retry 重新入队, delete 删除; 未指定 task_id 时处理全部"""
+    from app.utils.task_queue import task_queue
+
+    task_id = request.form.get('task_id', type=int)
+    if action == 'retry':
+        count = task_queue.requeue_dead(task_id)
+        return jsonify({'message': f'已重新入队 {count} 个任务'}), 200
+    if action == 'delete':
+        count = task_queue.delete_dead(task_id)
+        return jsonify({'message': f'已删除 {count} 个任务'}), 200
+    return jsonify({'error': '无效的操作'}), 400
+
 @bp.route('/cache/clear/category/<category>', methods=['POST'])
 
 @admin_required
@@ -1449,23 +1565,36 @@ def admin_context():
 def auto_fetch_status():
     """获取自动获取文章状态"""
 
-    from app.utils.auto_fetch import article_scheduler
-    status = article_scheduler.get_status()
+    from app.utils.scheduler import scheduler
+    status = scheduler.get_status()
+    job = next((item for item in status['jobs'] if item['name'] == 'fetch_articles'), None)
+    if job is None:
+        return jsonify({'running': False, 'schedule': None, 'next_run': None, 'last_run': None})
 
-    return jsonify(status)
+    return jsonify({
+        'running': status['running'] and not job['paused'],
+        'paused': job['paused'],
+        'schedule': job['schedule'],
+        'next_run': job['next_run'],
+        'last_run': job['last_run'],
+        'last_status': job['last_status'],
+    })
 
 @bp.route('/api/auto_fetch/toggle', methods=['POST'])
 @admin_required
 def toggle_auto_fetch():
     """切换自动获取文章状态"""
-    from app.utils.auto_fetch import article_scheduler
+    from app.utils.scheduler import scheduler
     
-    if article_scheduler.running:
-        article_scheduler.stop()
-        message = "自动获取文章已停止"
+    job = next((item for item in scheduler.get_status()['jobs'] if item['name'] == 'fetch_articles'), None)
+    if job is None:
+        message = "定时任务调度器未初始化"
     else:
-        article_scheduler.start()
-        message = "自动获取文章已启动"
+        success, result = scheduler.set_paused('fetch_articles', not job['paused'])
+        if not success:
+            message = f"切换失败: {result}"
+        else:
+            message = "自动获取文章已停止" if result else "自动获取文章已启动"
     
     flash(message)
     return redirect(url_for('admin.aiartauto'))
@@ -1,44 +1,16 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, make_response, session, jsonify
+from flask import Blueprint, render_template, request, flash, redirect, url_for, make_response, session, jsonify, current_app
 from flask_login import logout_user, login_required, current_user
 
 from app.models import User
 from app.services.auth_service import AuthService
 from app.utils.captcha import generate_captcha
 from app.utils.common import get_categories_data
-import redis
 import random
-import smtplib
-from email.mime.text import MIMEText
-from config.database import REDIS_CONFIG, SMTP_CONFIG
+from app.utils.redis_client import redis_client
+from app.utils.mailer import mailer
 
 bp = Blueprint('auth', __name__)
 
-# 创建 Redis 连接
-redis_client = redis.Redis(
-    host=REDIS_CONFIG['host'],
-    port=REDIS_CONFIG['port'],
-    password=REDIS_CONFIG['password'],
-    db=REDIS_CONFIG['db'],
-    decode_responses=True
-)
-
-def send_email(to_email, code):
-    """发送验证码邮件"""
-    try:
-        msg = MIMEText(f'您的注册验证码是：{code}，5分钟内有效。', 'plain', 'utf-8')
-        msg['Subject'] = 'PPress注册验证码'
-        msg['From'] = SMTP_CONFIG['username']
-        msg['To'] = to_email
-
-        server = smtplib.SMTP(SMTP_CONFIG['host'], SMTP_CONFIG['port'])
-        server.starttls()
-        server.login(SMTP_CONFIG['username'], SMTP_CONFIG['password'])
-        server.send_message(msg)
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"发送邮件失败: {str(e)}")
-        return False
 
 @bp.route('/auth/send_email_code', methods=['POST'])
 def send_email_code():
@@ -59,10 +31,13 @@ def send_email_code():
     redis_key = f'email_code:{email}'
     redis_client.setex(redis_key, 300, code)
     
-    # 发送验证码邮件
-    if send_email(email, code):
-        return jsonify({'success': True, 'message': '验证码已发送'})
-    return jsonify({'success': False, 'message': '验证码发送失败'})
+    # 发送验证码邮件(后台任务, 复用 SMTP 会话, 失败自动重试)
+    try:
+        mailer.send(email, 'PPress注册验证码', f'您的注册验证码是：{code}，5分钟内有效。')
+    except Exception as e:
+        current_app.logger.error(f"Enqueue email error: {str(e)}")
+        return jsonify({'success': False, 'message': '验证码发送失败'})
+    return jsonify({'success': True, 'message': '验证码已发送'})
 
 @bp.route('/captcha')
 def captcha():
@@ -1,13 +1,16 @@
 from flask import Blueprint, render_template, request, abort, current_app, url_for, flash, redirect, jsonify, \
     render_template_string
-from werkzeug.exceptions import NotFound
+from werkzeug.exceptions import NotFound, RequestEntityTooLarge
 
 from app.services.blog_service import BlogService
-from app.utils.common import get_categories_data
+from app.utils.common import get_categories_data, lazy_categories_data
+from app.utils.compression import use_cached_compression
 from flask_login import current_user, login_required
 from functools import wraps
 from app.models import CommentConfig
 from app.utils.article_url import ArticleUrlGenerator
+from app.utils.task_queue import enqueue
+from app.utils.upload_storage import MULTIPART_OVERHEAD
 from app.models import Article
 from app.models import CustomPage
 from app.models import SiteConfig
@@ -30,8 +33,12 @@ def handle_view_errors(f):
             return abort(404 if isinstance(e, NotFound) else 500)
     return decorated_function
 
-def api_response_if_requested(data):
-    """检查是否请求API响应"""
+def api_response_if_requested(data, cache_key=None):
+    """检查是否请求API响应
+
+    Args:
+        cache_key: data 来自的 cache_manager 缓存键, 响应压缩结果随该缓存项复用
+    """
     # 检查Accept头
     if request.headers.get('Accept') == 'application/json':
         # 检查API访问权限
@@ -40,6 +47,8 @@ def api_response_if_requested(data):
             if error_response:
                 return jsonify(error_response), status_code
             return None
+        if cache_key is not None:
+            use_cached_compression(cache_key)
         return jsonify(data)
     return None
 
@@ -60,15 +69,14 @@ def index():
     #     return render_template(template)
     
     # 获取文章列表
-    articles = BlogService.get_index_articles(
-        request.args.get('page', 1, type=int),
-        request.args.get('category', type=int),
-        current_user
-    )
+    page = request.args.get('page', 1, type=int)
+    category_id = request.args.get('category', type=int)
+    articles = BlogService.get_index_articles(page, category_id, current_user)
 
     # 检查是否需要返回API响应
     api_response = api_response_if_requested(
-        ApiService.format_article_list(articles)
+        ApiService.format_article_list(articles),
+        cache_key=f'index:articles:{page}:{category_id}'
     )
     if api_response:
         return api_response
@@ -91,7 +99,7 @@ def index():
     return render_template(template,
                            articles=articles,
                            **sidebar_data,
-                           **get_categories_data())
+                           **lazy_categories_data())
 
 @bp.route('/category/<id>')
 @handle_view_errors
@@ -106,11 +114,8 @@ def category(id):
     #     return render_template(template)
 
     """分类文章列表"""
-    data = BlogService.get_category_articles(
-        id,
-        request.args.get('page', 1, type=int),
-        current_user
-    )
+    page = request.args.get('page', 1, type=int)
+    data = BlogService.get_category_articles(id, page, current_user)
 
     # 检查是否需要返回API响应
     api_data = {
@@ -122,7 +127,7 @@ def category(id):
         },
         'articles': ApiService.format_article_list(data['pagination'])
     }
-    api_response = api_response_if_requested(api_data)
+    api_response = api_response_if_requested(api_data, cache_key=f'category:{id}:page:{page}')
     if api_response:
         return api_response
 
@@ -154,7 +159,7 @@ def category(id):
                            current_category=data['current_category'],
                            endpoint='blog.category',
                            **sidebar_data,
-                           **get_categories_data())
+                           **lazy_categories_data())
 
 @bp.route('/<path:path>')
 def article(path):
@@ -165,7 +170,10 @@ def article(path):
         if not article_id:
             abort(404)
             
-        article = Article.query.get_or_404(article_id)
+        # 一次性加载详情页所需数据, 后续 get_article_detail 直接复用请求级缓存
+        article = BlogService.load_article(article_id)
+        if article is None:
+            abort(404)
         
         # 检查是否需要返回API响应
         api_response = api_response_if_requested(
@@ -182,7 +190,8 @@ def article(path):
         result = BlogService.get_article_detail(article.id, password, current_user)
 
         # 获取上一篇和下一篇文章
-        prev_article, next_article = BlogService.get_adjacent_articles(article)
+        prev_article, next_article = BlogService.get_adjacent_articles(
+            article, same_category=current_app.config.get('ADJACENT_SAME_CATEGORY', False))
         
         if isinstance(result, dict) and 'error' in result:
             flash(result['error'], 'error')
@@ -197,9 +206,9 @@ def article(path):
         # 获取评论数据
         comment_data = BlogService.get_article_comments(article.id, current_user, page)
 
-        # 记录浏览历史（如果用户已登录）
+        # 记录浏览历史（如果用户已登录, 后台任务写入）
         if current_user.is_authenticated:
-            BlogService.record_view(current_user.id, article.id)
+            enqueue(BlogService.record_view, current_user.id, article.id)
         
         return render_template('blog/article.html',
                              article=result,
@@ -251,7 +260,8 @@ def tag(tag_id_or_slug):
     
     # 检查是否需要返回API响应
     api_response = api_response_if_requested(
-        ApiService.format_article_list(articles)
+        ApiService.format_article_list(articles),
+        cache_key=f'tag:{tag_id_or_slug}:articles:{page}'
     )
     if api_response:
         return api_response
@@ -394,6 +404,7 @@ def tag_suggestions():
         
     try:
         tags = BlogService.get_tag_suggestions(query)
+        use_cached_compression(f'tag_suggestions:{query}')
         return jsonify([{
             'name': tag.name,
             'count': tag.article_count
@@ -407,30 +418,33 @@ def tag_suggestions():
 @handle_view_errors
 def upload_image():
     """图片上传路由"""
-    if 'upload' not in request.files:
+    # 获取允许的文件类型
+    allowed_types = SiteConfig.get_config('upload_allowed_types', '.jpg,.jpeg,.png,.gif,.webp').split(',')
+    max_size = int(SiteConfig.get_config('upload_max_size', '10')) * 1024 * 1024  # 转换为字节
+    size_error = {'error': f'文件大小超过限制({max_size/1024/1024:.0f}MB)'}
+
+    # 在解析表单前按请求长度拒绝, 并限制解析时读取的字节数, 超限的上传不会被完整接收
+    limit = max_size + MULTIPART_OVERHEAD
+    if request.content_length and request.content_length > limit:
+        return jsonify(size_error), 413
+    request.max_content_length = limit
+    try:
+        files = request.files
+    except RequestEntityTooLarge:
+        return jsonify(size_error), 413
+
+    if 'upload' not in files:
         return jsonify({'error': '没有文件'}), 400
         
-    file = request.files['upload']
+    file = files['upload']
     if not file.filename:
         return jsonify({'error': '没有选择文件'}), 400
-        
-    # 获取允许的文件类型
-    allowed_types = SiteConfig.get_config('upload_allowed_types', '.jpg,.jpeg,.png,.gif,.webp').split(',')
-    max_size = int(SiteConfig.get_config('upload_max_size', '10')) * 1024 * 1024  # 转换为字节
     
     # 检查文件类型
     if not any(file.filename.lower().endswith(ext.lower()) for ext in allowed_types):
         return jsonify({'error': '不支持的文件类型'}), 400
         
-    # 检查文件大小 - 使用 seek 和 tell 来获取实际大小
-    file.seek(0, 2)  # 移动到文件末尾
-    file_size = file.tell()  # 获取文件大小
-    file.seek(0)  # 重置文件指针到开头
-    
-    if file_size > max_size:
-        return jsonify({'error': f'文件大小超过限制({max_size/1024/1024:.0f}MB)'}), 400
-        
-    success, result = BlogService.upload_image(file, current_user.id)
+    success, result = BlogService.upload_image(file, current_user.id, max_size)
     if success:
         return jsonify({
             'location': result,  # TinyMCE 需 location 字段
@@ -463,6 +477,7 @@ def search_suggestions():
         
     try:
         suggestions = BlogService.get_search_suggestions(query)
+        use_cached_compression(f'search_suggestions:{query}')
         return jsonify([title[0] for title in suggestions])
     except Exception as e:
         current_app.logger.error(f"Search suggestions error: {str(e)}")
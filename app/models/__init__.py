@@ -1,5 +1,6 @@
 from .user import User
 from .article import Article
+from .article_body import ArticleBody
 from .comment import Comment
 from .category import Category
 from .tag import Tag
@@ -10,12 +11,16 @@ from .file import File
 from .route import Route
 from .custom_page import CustomPage
 from .comment_config import CommentConfig
+from .category_index import CategoryArticleIndex
+from .scheduler import ScheduledJob, JobRun, SchedulerLease
+from .entity_version import EntityVersion
 
 __all__ = [
     'User',
     'Category',
     'Tag',
     'Article',
+    'ArticleBody',
     'Comment',
     'CommentConfig',
     'ViewHistory',
@@ -23,5 +28,10 @@ __all__ = [
     'Plugin',
     'File',
     'CustomPage',
-    'Route'
+    'Route',
+    'CategoryArticleIndex',
+    'ScheduledJob',
+    'JobRun',
+    'SchedulerLease',
+    'EntityVersion'
 ] 
\ No newline at end of file
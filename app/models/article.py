@@ -32,11 +32,12 @@ class Article(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False, index=True)
-    content = db.Column(db.Text, nullable=False)
+    # 内联正文; 窄表模式下为空字符串, 正文存放在 article_bodies(见 content 属性)
+    inline_content = db.Column('content', db.Text, nullable=False, default='')
     author_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), index=True)
     view_count = db.Column(db.Integer, default=0, index=True)
     created_at = db.Column(db.DateTime, default=datetime.now, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, index=True)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='SET NULL'), nullable=True, index=True)
     
     # 新增字段
@@ -46,6 +47,16 @@ class Article(db.Model):
     password = db.Column(db.String(128))  # 文章密码
     allow_comment = db.Column(db.Boolean, default=True)  # 是否允许评论
     
+    # 评论统计(反范式, 只统计已审核评论, 由评论事件维护)
+    comment_count = db.Column(db.Integer, default=0, server_default='0', index=True)
+    last_commented_at = db.Column(db.DateTime, nullable=True, index=True)
+    
+    # 保存时由正文计算的派生字段, 列表页只读这些字段而不加载 content
+    excerpt = db.Column(db.String(400), nullable=True)  # 纯文本摘要
+    word_count = db.Column(db.Integer, default=0, server_default='0')
+    reading_time = db.Column(db.Integer, default=0, server_default='0')  # 分钟
+    toc = db.Column(db.JSON, nullable=True)  # 标题目录 [{level, text, id}]
+    
     # 主分类关系
     category = db.relationship('Category', 
                              foreign_keys=[category_id],
@@ -57,10 +68,14 @@ class Article(db.Model):
                                primaryjoin="Article.id == article_categories.c.article_id",
                                secondaryjoin="article_categories.c.category_id == Category.id",
                                back_populates='related_articles',  # 对应 Category 的关系名
-                               lazy='joined')
+                               lazy='select')  # 列表/详情通过 loading_profiles 按需 selectinload
     
     tags = db.relationship('Tag', secondary=article_tags, backref=db.backref('articles', lazy=True))
     
+    # 窄表模式的正文, 访问 content 时按需加载
+    body = db.relationship('ArticleBody', uselist=False, back_populates='article',
+                           cascade='all, delete-orphan')
+    
     # 添加自定义字段
     fields = db.Column(db.JSON, nullable=True, comment='自定义字段')
     
@@ -137,6 +152,47 @@ class Article(db.Model):
             return self.categories[0] if self.categories else None
         return None
 
+    @property
+    def content(self):
+        """文章正文, 内联为空时从 article_bodies 读取"""
+        if self.inline_content:
+            return self.inline_content
+        body = self.body
+        return body.text if body is not None else ''
+
+    @content.setter
+    def content(self, value):
+        """按当前存储模式写入正文"""
+        from .article_body import ArticleBody, STORAGE_TABLE, body_storage_mode, body_compress_enabled
+        value = value or ''
+        if body_storage_mode() == STORAGE_TABLE:
+            if self.body is None:
+                self.body = ArticleBody(revision=0)
+            self.body.set_text(value, body_compress_enabled())
+            self.inline_content = ''
+        else:
+            self.inline_content = value
+            if self.body is not None:
+                self.body = None
+        # 由 before_flush 兜底检查派生字段是否已刷新
+        self._content_changed = True
+
+    @property
+    def content_revision(self):
+        """正文修订号, 内联存储时为 0"""
+        body = self.body
+        return body.revision if body is not None else 0
+
+    def refresh_summary(self):
+        """根据正文重新计算摘要、字数、阅读时长和目录"""
+        from app.utils.article_text import summarize_content
+        summary = summarize_content(self.content)
+        self.excerpt = summary['excerpt']
+        self.word_count = summary['word_count']
+        self.reading_time = summary['reading_time']
+        self.toc = summary['toc']
+        self._content_changed = False
+
     def get_field(self, key, default=None):
         """获取自定义字段值"""
         if not self.fields:
@@ -157,22 +213,25 @@ class Article(db.Model):
                 
             self.slug = slug
 
+# session.info 中待重算分类 ID 的键
+RECOUNT_CATEGORY_KEY = 'recount_category_ids'
+
+def _mark_category_recount(session, category_id):
+    """记录需要在 flush 后重算计数的分类"""
+    if session is None or category_id in (None, NO_VALUE):
+        return
+    session.info.setdefault(RECOUNT_CATEGORY_KEY, set()).add(category_id)
+
 # 将事件监听器移到文件末尾，并使用延迟导入
 def init_article_events():
-    from .category import Category
     from .tag import Tag
     
     @event.listens_for(Article, 'after_insert')
     def article_after_insert(mapper, connection, target):
         """文章添加后更新分类和标签计数"""
         try:
-            # 更新分类文章数
-            if target.category_id:
-                connection.execute(
-                    Category.__table__.update().
-                    values(article_count=Category.__table__.c.article_count + 1).
-                    where(Category.__table__.c.id == target.category_id)
-                )
+            # 标记分类, flush 结束后统一重算
+            _mark_category_recount(object_session(target), target.category_id)
             
             # 更新标签计数
             for tag in target.tags:
@@ -184,60 +243,57 @@ def init_article_events():
         except Exception as e:
             current_app.logger.error(f"Error in article_after_insert: {str(e)}")
 
+    @event.listens_for(db.session, 'before_flush')
+    def article_refresh_summary(session, flush_context, instances):
+        """正文有变更但保存路径未刷新派生字段时兜底重算"""
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Article) and obj.__dict__.get('_content_changed'):
+                obj.refresh_summary()
+
     @event.listens_for(Article, 'after_delete')
     def article_after_delete(mapper, connection, target):
-        """文章删除后更新分类和标签计数"""
+        """文章删除后标记分类重算(标签计数已在 before_delete 中扣减, 避免重复扣减)"""
         try:
-            # 更新分类文章数
-            if target.category_id:
-                connection.execute(
-                    Category.__table__.update().
-                    values(article_count=Category.__table__.c.article_count - 1).
-                    where(Category.__table__.c.id == target.category_id)
-                )
-            
-            # 更新标签数
-            for tag in target.tags:
-                connection.execute(
-                    Tag.__table__.update().
-                    values(article_count=Tag.__table__.c.article_count - 1).
-                    where(Tag.__table__.c.id == tag.id)
-                )
+            # 标记分类, flush 结束后统一重算
+            _mark_category_recount(object_session(target), target.category_id)
         except Exception as e:
             current_app.logger.error(f"Error in article_after_delete: {str(e)}")
 
     @event.listens_for(Article.category_id, 'set')
     def article_category_changed(target, value, oldvalue, initiator):
-        """文章分类变更时更新计数"""
+        """文章分类变更时标记新旧分类, 由 flush 后的批量重算统一更新计数"""
         if oldvalue == value:
             return
         
+        session = object_session(target)
+        if oldvalue is not NO_VALUE:
+            _mark_category_recount(session, oldvalue)
+        _mark_category_recount(session, value)
+
+    @event.listens_for(Article.categories, 'append')
+    def article_categories_append(target, value, initiator):
+        """添加多分类时标记重算"""
+        _mark_category_recount(object_session(target), value.id)
+
+    @event.listens_for(Article.categories, 'remove')
+    def article_categories_remove(target, value, initiator):
+        """移除多分类时标记重算"""
+        _mark_category_recount(object_session(target), value.id)
+
+    @event.listens_for(db.session, 'after_flush')
+    def recount_marked_categories(session, flush_context):
+        """flush 完成后对本次涉及的分类执行一次批量重算"""
+        category_ids = session.info.pop(RECOUNT_CATEGORY_KEY, None)
+        if not category_ids:
+            return
+        
         try:
-            session = db.session
-            
-            # 使用 select 查询而不是直接访问关系
-            if oldvalue not in (None, NO_VALUE):
-                old_count = session.query(db.func.count(Article.id))\
-                                  .filter(Article.category_id == oldvalue)\
-                                  .scalar()
-                session.execute(
-                    Category.__table__.update()
-                    .values(article_count=old_count)
-                    .where(Category.id == oldvalue)
-                )
-            
-            if value is not None:
-                new_count = session.query(db.func.count(Article.id))\
-                                  .filter(Article.category_id == value)\
-                                  .scalar()
-                session.execute(
-                    Category.__table__.update()
-                    .values(article_count=new_count)
-                    .where(Category.id == value)
-                )
-            
+            from app.services.recount_service import RecountService
+            RecountService.sync_category_counts(
+                list(category_ids), connection=session.connection()
+            )
         except Exception as e:
-            current_app.logger.error(f"Error in article_category_changed: {str(e)}")
+            current_app.logger.error(f"Error in recount_marked_categories: {str(e)}")
 
     @event.listens_for(Article.tags, 'append')
     def article_tag_append(target, value, initiator):
@@ -314,13 +370,11 @@ def init_article_events():
     def article_before_delete(mapper, connection, target):
         """文章删除前更新分类和标签计数"""
         try:
-            # 使用 connection 而不是 session 执行更新
-            if target.category_id:
-                connection.execute(
-                    Category.__table__.update()
-                    .values(article_count=Category.__table__.c.article_count - 1)
-                    .where(Category.__table__.c.id == target.category_id)
-                )
+            # 标记主分类和多分类, 删除 flush 后统一重算
+            session = object_session(target)
+            _mark_category_recount(session, target.category_id)
+            for category in target.categories:
+                _mark_category_recount(session, category.id)
             
             # 更新标签计数
             for tag in target.tags:
@@ -0,0 +1,87 @@
+import zlib
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy.orm import reconstructor
+
+from ..extensions import db
+
+# 正文存储模式: inline 存在 articles.content, table 存在 article_bodies
+STORAGE_INLINE = 'inline'
+STORAGE_TABLE = 'table'
+
+
+def body_storage_mode():
+    """当前配置的正文存储模式"""
+    if not has_app_context():
+        return STORAGE_INLINE
+    return current_app.config.get('ARTICLE_BODY_STORAGE', STORAGE_INLINE)
+
+
+def body_compress_enabled():
+    """写入 article_bodies 时是否压缩"""
+    return has_app_context() and current_app.config.get('ARTICLE_BODY_COMPRESS', False)
+
+
+class ArticleBody(db.Model):
+    """文章正文(窄表模式)
+
+    articles 表只保留状态、计数、时间等小字段, 正文单独存放,
+    可选 zlib 压缩; revision 每次写入递增, 可用于缓存失效。
+    """
+    __tablename__ = 'article_bodies'
+
+    # 小于该字节数的正文不压缩
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    revision = db.Column(db.Integer, nullable=False, default=1)
+    compressed = db.Column(db.Boolean, nullable=False, default=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    article = db.relationship('Article', back_populates='body')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._decoded = None
+
+    @reconstructor
+    def init_on_load(self):
+        self._decoded = None
+
+    @staticmethod
+    def encode(text, compress=False):
+        """编码正文
+
+        Returns:
+            tuple: (data, compressed)
+        """
+        raw = (text or '').encode('utf-8')
+        if compress and len(raw) >= ArticleBody.COMPRESS_MIN_SIZE:
+            packed = zlib.compress(raw, ArticleBody.COMPRESS_LEVEL)
+            if len(packed) < len(raw):
+                return packed, True
+        return raw, False
+
+    @staticmethod
+    def decode(data, compressed):
+        """解码正文"""
+        if data is None:
+            return ''
+        raw = zlib.decompress(data) if compressed else data
+        return raw.decode('utf-8')
+
+    @property
+    def text(self):
+        """解码后的正文, 同一份数据只解压一次"""
+        if self._decoded is None or self._decoded[0] is not self.data:
+            self._decoded = (self.data, self.decode(self.data, self.compressed))
+        return self._decoded[1]
+
+    def set_text(self, text, compress=False):
+        """写入正文并递增 revision"""
+        self.data, self.compressed = self.encode(text, compress)
+        self.revision = (self.revision or 0) + 1
+        self._decoded = None
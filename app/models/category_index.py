@@ -0,0 +1,94 @@
+from ..extensions import db
+from flask import current_app
+from sqlalchemy import event
+
+
+class CategoryArticleIndex(db.Model):
+    """分类-文章归属索引(反范式)
+
+    每篇文章对其主分类、多分类以及这些分类的所有祖先分类各有一行,
+    depth 为到最近一个直接分类的层级距离(0 表示直接归属)。
+    分类页和子分类汇总都只需扫描这一张表。
+    """
+    __tablename__ = 'category_article_index'
+
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    depth = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, index=True)
+    status = db.Column(db.String(20))
+    author_id = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index('idx_category_index_scan', 'category_id', 'depth', 'status', 'created_at'),
+        db.Index('idx_category_index_article', 'article_id'),
+    )
+
+
+# session.info 中待同步的文章 ID / 新增文章 / 是否需要整表重建
+INDEX_ARTICLE_KEY = 'category_index_article_ids'
+INDEX_NEW_ARTICLE_KEY = 'category_index_new_articles'
+INDEX_REBUILD_KEY = 'category_index_rebuild'
+
+# 影响索引内容的文章字段
+_INDEXED_ARTICLE_ATTRS = ('category_id', 'categories', 'status', 'created_at', 'author_id')
+
+
+def init_category_index_events():
+    from .article import Article
+    from .category import Category
+
+    @event.listens_for(db.session, 'before_flush')
+    def collect_category_index_changes(session, flush_context, instances):
+        """flush 前收集需要同步索引的文章和分类变更"""
+        article_ids = session.info.setdefault(INDEX_ARTICLE_KEY, set())
+        pending = []
+
+        for obj in session.new:
+            if isinstance(obj, Article):
+                pending.append(obj)
+            elif isinstance(obj, Category) and obj.parent_id is not None:
+                session.info[INDEX_REBUILD_KEY] = True
+
+        for obj in session.dirty:
+            if isinstance(obj, Article):
+                state = db.inspect(obj)
+                if any(state.attrs[attr].history.has_changes() for attr in _INDEXED_ARTICLE_ATTRS):
+                    article_ids.add(obj.id)
+            elif isinstance(obj, Category):
+                if db.inspect(obj).attrs.parent_id.history.has_changes():
+                    session.info[INDEX_REBUILD_KEY] = True
+
+        for obj in session.deleted:
+            if isinstance(obj, Article):
+                article_ids.add(obj.id)
+            elif isinstance(obj, Category):
+                session.info[INDEX_REBUILD_KEY] = True
+
+        # 新文章在 flush 之后才有 ID
+        if pending:
+            session.info.setdefault(INDEX_NEW_ARTICLE_KEY, []).extend(pending)
+
+    @event.listens_for(db.session, 'after_flush')
+    def sync_category_index(session, flush_context):
+        """flush 完成后同步索引"""
+        article_ids = session.info.pop(INDEX_ARTICLE_KEY, None) or set()
+        new_articles = session.info.pop(INDEX_NEW_ARTICLE_KEY, None) or []
+        rebuild = session.info.pop(INDEX_REBUILD_KEY, False)
+
+        article_ids.update(a.id for a in new_articles if a.id is not None)
+        if not article_ids and not rebuild:
+            return
+
+        try:
+            from app.services.category_index_service import CategoryIndexService
+            connection = session.connection()
+            if rebuild:
+                CategoryIndexService.rebuild(connection=connection)
+            else:
+                CategoryIndexService.sync_articles(article_ids, connection=connection)
+        except Exception as e:
+            current_app.logger.error(f"Error in sync_category_index: {str(e)}")
+
+# 初始化事件监听器
+init_category_index_events()
@@ -1,5 +1,7 @@
 from ..extensions import db
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
 
 class Comment(db.Model):
     __tablename__ = 'comments'
@@ -36,6 +38,13 @@ class Comment(db.Model):
                              remote_side=[id],
                              foreign_keys=[reply_to_id])
     
+    # 评论树分页: 按目标取根评论(parent_id IS NULL)并按时间排序, 回复按 parent_id 批量读取
+    __table_args__ = (
+        db.Index('idx_comment_article_tree', 'article_id', 'parent_id', 'created_at'),
+        db.Index('idx_comment_page_tree', 'custom_page_id', 'parent_id', 'created_at'),
+        db.Index('idx_comment_parent', 'parent_id', 'created_at'),
+    )
+    
     @property
     def display_name(self):
         """显示名称"""
@@ -47,4 +56,65 @@ class Comment(db.Model):
         """检查评论是否对指定用户可见"""
         if user and user.role == 'admin':
             return True
-        return self.status == 'approved'
\ No newline at end of file
+        return self.status == 'approved'
+
+
+# session.info 中待刷新评论统计的文章 / 自定义页面 ID
+STATS_ARTICLE_KEY = 'comment_stats_article_ids'
+STATS_PAGE_KEY = 'comment_stats_page_ids'
+
+def _mark_comment_target(session, article_id=None, custom_page_id=None):
+    """记录需要在 flush 后刷新评论统计的对象"""
+    if article_id is not None:
+        session.info.setdefault(STATS_ARTICLE_KEY, set()).add(article_id)
+    if custom_page_id is not None:
+        session.info.setdefault(STATS_PAGE_KEY, set()).add(custom_page_id)
+
+def init_comment_events():
+    
+    @event.listens_for(db.session, 'before_flush')
+    def collect_comment_stats_changes(session, flush_context, instances):
+        """flush 前收集评论新增、删除、状态或归属变更涉及的对象"""
+        for obj in session.new | session.deleted:
+            if isinstance(obj, Comment):
+                _mark_comment_target(
+                    session,
+                    obj.article_id if obj.article_id is not None else getattr(obj.article, 'id', None),
+                    obj.custom_page_id if obj.custom_page_id is not None else getattr(obj.custom_page, 'id', None)
+                )
+        
+        for obj in session.dirty:
+            if not isinstance(obj, Comment):
+                continue
+            state = db.inspect(obj)
+            for attr in ('status', 'article_id', 'custom_page_id'):
+                history = state.attrs[attr].history
+                if not history.has_changes():
+                    continue
+                _mark_comment_target(session, obj.article_id, obj.custom_page_id)
+                for old in history.deleted:
+                    if attr == 'article_id':
+                        _mark_comment_target(session, article_id=old)
+                    elif attr == 'custom_page_id':
+                        _mark_comment_target(session, custom_page_id=old)
+    
+    @event.listens_for(db.session, 'after_flush')
+    def sync_comment_stats(session, flush_context):
+        """flush 完成后重算涉及对象的评论统计"""
+        article_ids = session.info.pop(STATS_ARTICLE_KEY, None)
+        page_ids = session.info.pop(STATS_PAGE_KEY, None)
+        if not article_ids and not page_ids:
+            return
+        
+        try:
+            from app.services.comment_service import CommentService
+            CommentService.sync_stats(
+                article_ids=article_ids or [],
+                custom_page_ids=page_ids or [],
+                connection=session.connection()
+            )
+        except Exception as e:
+            current_app.logger.error(f"Error in sync_comment_stats: {str(e)}")
+
+# 初始化事件监听器
+init_comment_events()
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.request_cache import request_memo
 
 
 class CommentConfig(db.Model):
@@ -13,10 +14,13 @@ class CommentConfig(db.Model):
     
     @classmethod
     def get_config(cls):
-        """获取评论配置,如果不存在则创建默认配置"""
-        config = cls.query.first()
-        if not config:
-            config = cls()
-            db.session.add(config)
-            db.session.commit()
-        return config 
\ No newline at end of file
+        """获取评论配置,如果不存在则创建默认配置(同一请求内只查询一次)"""
+        def load_config():
+            config = cls.query.first()
+            if not config:
+                config = cls()
+                db.session.add(config)
+                db.session.commit()
+            return config
+        
+        return request_memo('CommentConfig', 'config', load_config) 
\ No newline at end of file
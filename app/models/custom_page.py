@@ -24,6 +24,8 @@ class CustomPage(db.Model):
     
     # 新增评论相关字段
     allow_comment = db.Column(db.Boolean, default=True, comment='是否允许评论')
+    comment_count = db.Column(db.Integer, default=0, server_default='0', comment='已审核评论数')
+    last_commented_at = db.Column(db.DateTime, nullable=True, comment='最后评论时间')
     
     @property
     def status_text(self):
@@ -0,0 +1,13 @@
+from ..extensions import db
+
+
+class EntityVersion(db.Model):
+    """实体版本号(每个模型一行)
+
+    模型有写入时在同一事务中 +1, 模板片段缓存等以版本号作为缓存键的一部分,
+    数据变化后键随之改变, 旧缓存不再命中; 版本号保存在数据库中, 多个 worker 进程共享。
+    """
+    __tablename__ = 'entity_versions'
+
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -11,6 +11,8 @@ class File(db.Model):
     file_type = db.Column(db.String(50))
     file_size = db.Column(db.Integer)
     md5 = db.Column(db.String(32), unique=True, nullable=False)
+    # 衍生图(缩小版/WebP), 与原文件同目录 [{width, height, format, name, size}]
+    variants = db.Column(db.JSON, nullable=True)
     upload_time = db.Column(db.DateTime, default=datetime.now)
     uploader_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'))
     uploader = db.relationship(
@@ -0,0 +1,55 @@
+from ..extensions import db
+
+
+class ScheduledJob(db.Model):
+    """定时任务状态(每个任务一行)
+
+    暂停标记保存在数据库中, 任意进程修改后由当前 leader 在下一次调度时读取;
+    最近一次执行结果也写在这里, 后台和 /metrics 不需要扫描执行历史。
+    """
+    __tablename__ = 'scheduled_jobs'
+
+    name = db.Column(db.String(100), primary_key=True)
+    paused = db.Column(db.Boolean, nullable=False, default=False)
+    last_run_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(20))
+    last_duration = db.Column(db.Float)
+    next_run_at = db.Column(db.DateTime)
+
+
+class JobRun(db.Model):
+    """定时任务执行历史"""
+    __tablename__ = 'job_runs'
+
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_TIMEOUT = 'timeout'
+    STATUS_SKIPPED = 'skipped'    # 达到并发上限, 本次未执行
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    scheduled_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime)
+    duration = db.Column(db.Float)
+    owner = db.Column(db.String(100))
+    result = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('idx_job_runs_job_started', 'job_name', 'started_at'),
+        db.Index('idx_job_runs_started', 'started_at'),
+    )
+
+
+class SchedulerLease(db.Model):
+    """调度器 leader 租约(数据库选主)
+
+    leader 每次调度时续期, 超过 expires_at 未续期的租约可被其他进程接管。
+    """
+    __tablename__ = 'scheduler_leases'
+
+    name = db.Column(db.String(100), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
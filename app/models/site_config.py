@@ -1,5 +1,6 @@
 from ..extensions import db
 from app.utils.cache_manager import cache_manager
+from app.utils.request_cache import request_memo
 import secrets
 
 class SiteConfig(db.Model):
@@ -103,8 +104,13 @@ class SiteConfig(db.Model):
 
     @staticmethod
     def get_config(key, default=None):
-        config = SiteConfig.query.filter_by(key=key).first()
-        return config.value if config else default 
+        # 同一请求内相同 key 只查询一次, 记录是否存在以便按调用方的 default 返回
+        def load_value():
+            config = SiteConfig.query.filter_by(key=key).first()
+            return (True, config.value) if config else (False, None)
+        
+        found, value = request_memo('SiteConfig', key, load_value)
+        return value if found else default 
     
     @staticmethod
     def get_article_url_pattern():
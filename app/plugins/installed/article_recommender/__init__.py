@@ -5,6 +5,7 @@ from app.models import Article, Tag
 from sqlalchemy import func
 from markupsafe import Markup
 from app.utils.cache_manager import cache_manager
+from app.utils.loading_profiles import with_profile
 import os
 
 class Plugin(PluginBase):
@@ -51,7 +52,7 @@ class Plugin(PluginBase):
         current_category = current_article.category
         settings = self.get_settings()  # 获取最新配置
         # 基于标签和分类查找相关文章
-        related_articles = Article.query\
+        related_articles = with_profile(Article.query, 'api')\
             .filter(Article.id != article_id)\
             .filter(
                 (Article.category_id == current_category.id) |
@@ -65,7 +66,7 @@ class Plugin(PluginBase):
         return [{
             'id': article.id,
             'title': article.title,
-            'summary': article.content[:100] if article.content else '',
+            'summary': (article.excerpt or '')[:100],
             'category': article.category.name,
             'tags': [tag.name for tag in article.tags],
             'url': ArticleUrlGenerator.generate(article.id, article.category_id, article.created_at) 
@@ -1,8 +1,9 @@
-from flask import render_template_string, current_app, url_for, send_from_directory
+from flask import render_template_string, current_app, send_from_directory
 from app import db
 from app.plugins import PluginBase
 from markupsafe import Markup
 from app.utils.cache_manager import cache_manager
+from app.utils.assets import asset_base_url
 import os
 
 class Plugin(PluginBase):
@@ -71,8 +72,8 @@ class Plugin(PluginBase):
             config['selector'] = selector
             config['height'] = height
             
-            # 获取静态文件URL
-            static_url = url_for('tinymce_editor_static', filename='').rstrip('/')
+            # 获取静态文件URL(构建清单后为带目录摘要的地址, TinyMCE 按相对路径加载的插件和皮肤也可长期缓存)
+            static_url = asset_base_url('tinymce_editor')
             
             # 构建自动保存前缀
             from flask import request
@@ -9,6 +9,9 @@ from app.models import User, Article, Comment, ViewHistory, Category, Tag, Plugi
     CommentConfig
 from app.models.article import article_categories, article_tags
 from app.utils.cache_manager import cache_manager
+from app.services.comment_service import CommentService
+from app.utils.loading_profiles import with_profile
+from app.utils.image_derivatives import add_image_srcset, variant_paths
 from app.plugins import plugin_manager
 
 import json
@@ -26,7 +29,7 @@ from app.utils.pagination import Pagination
 from threading import Lock
 
 from app.utils.route_manager import route_manager
-from sqlalchemy import text, update, func, distinct, case
+from sqlalchemy import text, case
 from app.utils.article_url import ArticleUrlGenerator
 from app.utils.id_encoder import IdEncoder
 
@@ -93,7 +96,8 @@ class AdminService:
             
             # 最近文章
             recent_articles = Article.query.options(
-                db.joinedload(Article.author)
+                db.joinedload(Article.author),
+                db.defer(Article.inline_content)
             ).order_by(Article.created_at.desc()).limit(5).all()
             
             # 组装活动数据
@@ -244,7 +248,7 @@ class AdminService:
                     query = exact_matches.union(fuzzy_matches)
             
             # 分页
-            pagination = query.order_by(Article.id.desc()).paginate(
+            pagination = with_profile(query, 'card').order_by(Article.id.desc()).paginate(
                 page=page, per_page=10, error_out=False
             )
             
@@ -322,12 +326,14 @@ class AdminService:
         try:
             comment = Comment.query.get_or_404(comment_id)
             article_id = comment.article_id
+            custom_page_id = comment.custom_page_id
             db.session.delete(comment)
             db.session.commit()
             
             # 清除相关缓存
             cache_manager.delete(f'article:{article_id}')  # 章详情缓存
             cache_manager.delete('latest_comments')        # 最新评论缓存
+            CommentService.invalidate(article_id, custom_page_id)  # 评论树缓存
             
             return True, None
             
@@ -1210,6 +1216,11 @@ class AdminService:
             # 获取件的物理路径
             file_path = os.path.join(current_app.root_path, file.file_path.lstrip('/'))
 
+            # 删除衍生图
+            for _, variant_path in variant_paths(file):
+                if os.path.exists(variant_path):
+                    os.remove(variant_path)
+
             # 删除物理文件
             if os.path.exists(file_path):
                 os.remove(file_path)
@@ -1404,6 +1415,107 @@ class AdminService:
             current_app.logger.error(f"Get cache stats error: {str(e)}")
             return None, str(e)
 
+    @staticmethod
+    def get_sql_stats(sort='db_time'):
+        """获取 SQL 监控统计(按端点汇总、N+1 记录、慢查询)"""
+        try:
+            from app.utils.sql_monitor import sql_monitor
+
+            endpoints = sql_monitor.get_endpoint_stats(sort=sort)
+            total_requests = sum(item['requests'] for item in endpoints)
+            total_queries = sum(item['queries'] for item in endpoints)
+
+            return {
+                'sql_stats': {
+                    'enabled': sql_monitor.enabled,
+                    'started_at': sql_monitor.started_at,
+                    'total_requests': total_requests,
+                    'avg_queries': round(total_queries / total_requests, 1) if total_requests else 0,
+                    'slow_query_ms': sql_monitor.slow_query_ms,
+                    'n_plus_one_threshold': sql_monitor.n_plus_one_threshold
+                },
+                'endpoints': endpoints,
+                'n_plus_one': sql_monitor.get_n_plus_one(),
+                'slow_queries': sql_monitor.get_slow_queries(),
+                'sort': sort
+            }, None
+
+        except Exception as e:
+            current_app.logger.error(f"Get sql stats error: {str(e)}")
+            return None, str(e)
+
+    @staticmethod
+    def get_profiler_data():
+        """获取请求性能分析设置和结果摘要"""
+        try:
+            from app.utils.profiler import request_profiler, sampler_supported
+
+            return {
+                'profiler_settings': request_profiler.get_settings(),
+                'profile': request_profiler.summary(),
+                'sampler_supported': sampler_supported(),
+                'endpoints': sorted(
+                    rule.endpoint for rule in current_app.url_map.iter_rules()
+                    if not rule.endpoint.startswith(('static', 'admin.'))
+                )
+            }, None
+
+        except Exception as e:
+            current_app.logger.error(f"Get profiler data error: {str(e)}")
+            return None, str(e)
+
+    @staticmethod
+    def update_profiler_settings(form_data):
+        """保存性能分析设置"""
+        try:
+            from app.utils.profiler import request_profiler, sampler_supported, MODE_SAMPLER, MODE_CPROFILE
+
+            mode = form_data.get('mode', MODE_SAMPLER)
+            if mode not in (MODE_SAMPLER, MODE_CPROFILE):
+                return False, '无效的分析模式'
+            if mode == MODE_SAMPLER and form_data.get('enabled') == 'on' and not sampler_supported():
+                return False, '当前以 gevent/eventlet 协程方式运行, 不支持调用栈采样, 请使用 cProfile 模式'
+            try:
+                sample_rate = float(form_data.get('sample_rate', 0.01))
+                interval_ms = int(form_data.get('interval_ms', 5))
+            except ValueError:
+                return False, '采样比例或间隔格式不正确'
+            if not 0 < sample_rate <= 1:
+                return False, '采样比例必须在 0 到 1 之间'
+
+            request_profiler.save_settings(
+                enabled=form_data.get('enabled') == 'on',
+                mode=mode,
+                sample_rate=sample_rate,
+                endpoint=form_data.get('endpoint', '').strip(),
+                interval_ms=max(interval_ms, 1)
+            )
+            return True, None
+
+        except Exception as e:
+            current_app.logger.error(f"Update profiler settings error: {str(e)}")
+            return False, str(e)
+
+    @staticmethod
+    def get_task_queue_data():
+        """获取后台任务队列深度、执行计数和失败任务"""
+        try:
+            from datetime import datetime
+            from app.utils.task_queue import task_queue
+
+            dead_tasks = [
+                dict(task.to_dict(), created_at=datetime.fromtimestamp(task.created_at) if task.created_at else None)
+                for task in task_queue.dead_tasks()
+            ]
+            return {
+                'queue_stats': task_queue.stats(),
+                'dead_tasks': dead_tasks,
+            }, None
+
+        except Exception as e:
+            current_app.logger.error(f"Get task queue data error: {str(e)}")
+            return None, str(e)
+
     @staticmethod
     def clear_cache_by_category(category):
         """按类别清除存"""
@@ -1776,6 +1888,7 @@ class AdminService:
             
             # 清除相关缓存
             cache_manager.delete(f'article:{comment.article_id}:*')
+            CommentService.invalidate_for(comment)
             
             return True, '评论状态已更新'
             
@@ -1988,7 +2101,8 @@ class AdminService:
                 
                 # 更新文章属性
                 article.title = title
-                article.content = content
+                article.content = add_image_srcset(content)
+                article.refresh_summary()
                 article.status = status
                 article.password = password if status == Article.STATUS_PASSWORD else None
                 article.allow_comment = form_data.get('allow_comment') == 'on'
@@ -2120,190 +2234,32 @@ class AdminService:
     @staticmethod
     def update_category_counts(category_ids=None):
         """更新分类文章数"""
-        try:
-            if not category_ids:
-                return True, []
-            
-            # 使用 SQLAlchemy 查询分类文章数
-            category_counts = db.session.query(
-                Category.id,
-                func.count(distinct(
-                    func.coalesce(Article.id, article_categories.c.article_id)
-                )).label('count')
-            ).outerjoin(
-                Article,
-                Category.id == Article.category_id
-            ).outerjoin(
-                article_categories,
-                Category.id == article_categories.c.category_id
-            ).filter(
-                Category.id.in_(category_ids)
-            ).group_by(
-                Category.id
-            ).all()
-            
-            # 记录更新的分类
-            updated = []
-            
-            # 更新每个分类的文章数
-            for category_id, count in category_counts:
-                category = Category.query.get(category_id)
-                if category and (category.article_count is None or category.article_count != count):
-                    category.article_count = count
-                    updated.append({
-                        'id': category.id,
-                        'name': category.name,
-                        'new_count': count
-                    })
-            
-            db.session.commit()
-            return True, updated
-            
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Update category counts error: {str(e)}")
-            return False, str(e)
+        if not category_ids:
+            return True, []
+
+        from app.services.recount_service import RecountService
+        return RecountService.recount_categories(category_ids)
 
     @staticmethod
     def update_tag_counts(tag_ids=None):
         """更新标签文章数"""
-        try:
-            if not tag_ids:
-                return True, []
-            
-            # 使用 SQLAlchemy 的方式查询标签文章数
-            tag_counts = db.session.query(
-                Tag.id,
-                func.count(distinct(article_tags.c.article_id)).label('count')
-            ).outerjoin(
-                article_tags, 
-                Tag.id == article_tags.c.tag_id
-            ).filter(
-                Tag.id.in_(tag_ids)
-            ).group_by(
-                Tag.id
-            ).all()
-            
-            # 记录更新的标签
-            updated = []
-            
-            # 更新每个标签的文章数
-            for tag_id, count in tag_counts:
-                tag = Tag.query.get(tag_id)
-                if tag and (tag.article_count is None or tag.article_count != count):
-                    tag.article_count = count
-                    updated.append({
-                        'id': tag.id,
-                        'name': tag.name,
-                        'new_count': count
-                    })
-            
-            db.session.commit()
-            return True, updated
-            
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Update tag counts error: {str(e)}")
-            return False, str(e)
+        if not tag_ids:
+            return True, []
+
+        from app.services.recount_service import RecountService
+        return RecountService.recount_tags(tag_ids)
 
     @staticmethod
     def update_all_category_counts():
         """更新所有分类的文章计数"""
-        try:
-            # 获取所有分类
-            categories = Category.query.all()
-            updated = []
-            
-            for category in categories:
-                # 计算文章数 - 修复 join 语句
-                count = db.session.query(
-                    func.count(distinct(
-                        func.coalesce(Article.id, article_categories.c.article_id)
-                    ))
-                ).select_from(Category).filter(
-                    Category.id == category.id
-                ).outerjoin(
-                    Article,
-                    Category.id == Article.category_id
-                ).outerjoin(
-                    article_categories,
-                    Category.id == article_categories.c.category_id
-                ).scalar()
-                
-                # 如果计数有变化,更新并记录
-                if category.article_count != count:
-                    category.article_count = count
-                    updated.append({
-                        'id': category.id,
-                        'name': category.name,
-                        'new_count': count
-                    })
-            
-            db.session.commit()
-            return True, updated
-            
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error updating all category counts: {str(e)}")
-            return False, str(e)
+        from app.services.recount_service import RecountService
+        return RecountService.recount_categories()
 
     @staticmethod
     def update_all_tag_counts():
-        """高性能更新所有标签的文章计数"""
-        try:
-            # 1. 创建子查询获取标签计数
-            tag_counts = db.session.query(
-                article_tags.c.tag_id.label('tag_id'),
-                func.count(distinct(article_tags.c.article_id)).label('count')
-            ).group_by(
-                article_tags.c.tag_id
-            ).subquery()
-
-            # 2. 获取需要更新的标签
-            updated_tags = db.session.query(Tag).outerjoin(
-                tag_counts,
-                Tag.id == tag_counts.c.tag_id
-            ).filter(
-                Tag.article_count != func.coalesce(tag_counts.c.count, 0)
-            ).with_entities(
-                Tag.id,
-                Tag.name,
-                func.coalesce(tag_counts.c.count, 0).label('new_count')
-            ).all()
-
-            if updated_tags:
-                # 3. 使用正确的 case() 语法执行批量更新
-                # 使用 coalesce 确保空值为 0
-                stmt = update(Tag).values(
-                    article_count=func.coalesce(
-                        db.session.query(
-                            func.count(distinct(article_tags.c.article_id))
-                        ).filter(
-                            article_tags.c.tag_id == Tag.id
-                        ).as_scalar(),
-                        0
-                    )
-                )
-                db.session.execute(stmt)
-
-                # 4. 提交事务
-                db.session.commit()
-
-                # 5. 返回更新的标签信息
-                return True, [
-                    {
-                        'id': tag.id,
-                        'name': tag.name,
-                        'new_count': tag.new_count
-                    } for tag in updated_tags
-                ]
-
-            return True, []
-            
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error updating all tag counts: {str(e)}")
-            return False, str(e)
+        """更新所有标签的文章计数"""
+        from app.services.recount_service import RecountService
+        return RecountService.recount_tags()
 
     @staticmethod
     def batch_delete_articles(article_ids, user_id, is_admin=False):
@@ -2344,10 +2300,16 @@ class AdminService:
                 return False, '没有找到可删除的评论'
                 
             # 删除评论
+            targets = set()
             for comment in comments:
+                targets.add((comment.article_id, comment.custom_page_id))
                 db.session.delete(comment)
                 
             db.session.commit()
+            
+            # 清除评论树缓存
+            for article_id, custom_page_id in targets:
+                CommentService.invalidate(article_id, custom_page_id)
             return True, None
             
         except Exception as e:
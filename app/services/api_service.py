@@ -11,7 +11,9 @@ class ApiService:
             'articles': [{
                 'id': article.id,
                 'title': article.title,
-                'content': article.content,
+                'excerpt': article.excerpt,
+                'word_count': article.word_count,
+                'reading_time': article.reading_time,
                 'created_at': article.created_at.strftime('%Y-%m-%d %H:%M:%S'),
                 'category': article.category.name if article.category else None,
                 'author': article.author.nickname if article.author else None,
@@ -27,6 +29,9 @@ class ApiService:
             'id': article.id,
             'title': article.title,
             'content': article.content,
+            'word_count': article.word_count,
+            'reading_time': article.reading_time,
+            'toc': article.toc or [],
             'created_at': article.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'category': article.category.name if article.category else None,
             'author': article.author.nickname if article.author else None,
@@ -6,6 +6,7 @@ from app.models import Article as Post, User, Category
 from app.extensions import db
 from slugify import slugify
 from app.services.admin_service import AdminService
+from app.utils.image_derivatives import add_image_srcset
 from collections import defaultdict
 
 # API 配置
@@ -120,7 +121,7 @@ def save_article_to_db(article_data):
         if existing_post:
             # 更新现有文章
             existing_post.title = article_data['title']
-            existing_post.content = article_data['content']
+            existing_post.content = add_image_srcset(article_data['content'])
             existing_post.updated_at = datetime.now()
         else:
             # 创建类似表单的数据对象
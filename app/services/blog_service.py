@@ -1,18 +1,25 @@
 from slugify import slugify
 
-from app.models import Article, Category, Tag, Comment, ViewHistory, File, User, CommentConfig, SiteConfig, CustomPage
+from app.models import Article, ArticleBody, Category, Tag, Comment, ViewHistory, File, User, CommentConfig, SiteConfig, CustomPage
 from app.models.article import article_tags
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 
-from app.models.article import article_categories
+from app.services.category_index_service import CategoryIndexService
+from app.services.comment_service import CommentService
 from app.utils.cache_manager import cache_manager
+from app.utils.article_neighbors import article_neighbors
+from app.utils.request_cache import request_memo
+from app.utils.template_context import lazy_value
+from app.utils.loading_profiles import with_profile
 from app import db
 import os
-import hashlib
 from flask import current_app, abort
 import random
-from app.utils.pagination import Pagination
+from app.utils.upload_storage import UploadTooLarge, content_path, stage_upload, upload_category
+from app.utils.image_derivatives import add_image_srcset, generate_derivatives
+from app.utils.task_queue import enqueue
 import json
 
 
@@ -35,11 +42,7 @@ class BlogService:
         """获取首页文章列表"""
         def query_articles():
             with db.session.no_autoflush:
-                query = Article.query.options(
-                    db.joinedload(Article.author),
-                    db.joinedload(Article.category),
-                    db.joinedload(Article.tags)
-                )
+                query = with_profile(Article.query, 'card')
                 
                 # 检查是否是管理员
                 is_admin = user and hasattr(user, 'role') and user.role == 'admin'
@@ -91,46 +94,20 @@ class BlogService:
                 if not category.use_slug:
                     abort(404)
             
-            # 构建查询
-            query = Article.query.options(
-                db.joinedload(Article.author),
-                db.joinedload(Article.tags)
-            )
-            
-            # 检查是否是管理员
-            is_admin = user and hasattr(user, 'role') and user.role == 'admin'
-            
-            if is_admin:
-                # 管理员可以看到所有文章
-                pass
-            elif user and hasattr(user, 'id'):
-                # 登录用户可以看到:
-                # 1. 所有公开文章
-                # 2. 自己的所有文章
-                query = query.filter(
-                    db.or_(
-                        Article.status == Article.STATUS_PUBLIC,  # 只显示公开文章
-                        Article.author_id == user.id  # 显示自己的所有文章
-                    )
-                )
-            else:
-                # 未登录用户只能看到公开文章
-                query = query.filter(Article.status == Article.STATUS_PUBLIC)
-            
-            # 使用 union 合并主分类和多分类的文章
-            main_category_articles = query.filter(Article.category_id == category.id)
-            multi_category_articles = query.join(article_categories).filter(article_categories.c.category_id == category.id)
+            # 构建查询: 通过分类索引一次范围扫描取出分类内文章
+            query = with_profile(Article.query, 'card')
+            query = CategoryIndexService.filter_articles(query, category.id)
             
-            # 合并查询结果
-            combined_query = main_category_articles.union(multi_category_articles)
+            # 可见性过滤(管理员不过滤, 登录用户可见公开文章和自己的文章, 游客只看公开文章)
+            visibility = CategoryIndexService.visibility_filter(user)
+            if visibility is not None:
+                query = query.filter(visibility)
             
             # 获取分页数量 - 优先使用分类设置的值
             per_page = category.per_page or 10  # 如果未设置则使用默认值10
             
-            # 排序和分页
-            paginated = combined_query\
-                .order_by(Article.created_at.desc())\
-                .paginate(page=page, per_page=per_page, error_out=False)
+            # 分页(排序已由索引的 created_at 决定)
+            paginated = query.paginate(page=page, per_page=per_page, error_out=False)
             
             # 获取分类的自定义模板
             template = None
@@ -163,15 +140,28 @@ class BlogService:
             ttl=BlogService.CACHE_TIMES['CATEGORY']
         )
 
+    @staticmethod
+    def load_article(article_id):
+        """加载文章详情页所需的全部关联数据(固定 3 条查询), 同一请求内只加载一次
+        
+        使用 detail 加载方案: 作者和主分类随文章一起 JOIN, 标签和多分类各一条 selectin 查询。
+        
+        Returns:
+            Article 或 None
+        """
+        def load():
+            return with_profile(Article.query, 'detail')\
+                .filter(Article.id == article_id).first()
+        
+        return request_memo('Article', ('detail', article_id), load)
+
     @staticmethod
     def get_article_detail(article_id, password=None, user=None):
         """获取文章详情"""
         try:
-            article = Article.query.options(
-                db.joinedload(Article.author),
-                db.joinedload(Article.tags),
-                db.joinedload(Article.categories)
-            ).get_or_404(article_id)
+            article = BlogService.load_article(article_id)
+            if article is None:
+                abort(404)
             
             # 如果文章没有 slug 且标题不为空,自动生成 slug
             if not article.slug and article.title:
@@ -206,14 +196,11 @@ class BlogService:
                     return {'need_password': True, 'article': article}
                 if password != article.password:
                     return {'error': '密码错误', 'need_password': True, 'article': article}
-                # 密码正确，获取评论数据并返回文章
-                article.comment_data = BlogService.get_article_comments(article_id, user)
+                # 密码正确，返回文章(评论数据由视图按当前页获取)
                 return article
             
             # 如果是公开或隐藏文章允许访问
             if article.status in [Article.STATUS_PUBLIC, Article.STATUS_HIDDEN]:
-                # 获取评论数据
-                article.comment_data = BlogService.get_article_comments(article_id, user)
                 return article
             
             # 其他情况返回错误
@@ -282,10 +269,10 @@ class BlogService:
         def query_random():
             count = Article.query.count()
             if count < 5:
-                return Article.query.all()
+                return Article.query.options(db.defer(Article.inline_content)).all()
             ids = random.sample(range(1, count + 1), min(5, count))
             return Article.query\
-                .options(db.joinedload(Article.author))\
+                .options(db.joinedload(Article.author), db.defer(Article.inline_content))\
                 .filter(Article.id.in_(ids))\
                 .all()
                 
@@ -328,9 +315,10 @@ class BlogService:
         view = ViewHistory(user_id=user_id, article_id=article_id)
         db.session.add(view)
         
-        # 更新浏览次数
-        article = Article.query.get(article_id)
-        article.view_count += 1
+        # 更新浏览次数(在数据库中自增, 多个 worker 并发执行时不会丢失计数)
+        Article.query.filter_by(id=article_id).update(
+            {Article.view_count: Article.view_count + 1}, synchronize_session=False
+        )
         db.session.commit()
     
     @staticmethod
@@ -338,10 +326,7 @@ class BlogService:
         """搜索文章"""
         def do_search():
             # 构建基础查询
-            base_query = Article.query.options(
-                db.joinedload(Article.author),
-                db.joinedload(Article.category)
-            )
+            base_query = with_profile(Article.query, 'card')
             
             # 搜索标题
             base_query = base_query.filter(Article.title.ilike(f'%{query}%'))
@@ -360,17 +345,10 @@ class BlogService:
             if sort == 'views':
                 base_query = base_query.order_by(Article.view_count.desc())
             elif sort == 'comments':
-                comment_counts = db.session.query(
-                    Article.id,
-                    db.func.count(Comment.id).label('comment_count')
-                ).outerjoin(Comment)\
-                 .group_by(Article.id)\
-                 .subquery()
-                
-                base_query = base_query.outerjoin(
-                    comment_counts,
-                    Article.id == comment_counts.c.id
-                ).order_by(db.desc(comment_counts.c.comment_count))
+                base_query = base_query.order_by(
+                    Article.comment_count.desc(),
+                    Article.last_commented_at.desc()
+                )
             else:  # recent
                 base_query = base_query.order_by(Article.created_at.desc())
             
@@ -395,10 +373,8 @@ class BlogService:
                 if not tag.use_slug:
                     abort(404)  # 如果设置了使用 ID 但用 slug 访问,返回 404
                 
-            return Article.query.options(
-                db.joinedload(Article.author),
-                db.joinedload(Article.category)
-            ).filter(Article.tags.any(Tag.id == tag.id))\
+            return with_profile(Article.query, 'card')\
+             .filter(Article.tags.any(Tag.id == tag.id))\
              .order_by(Article.id.desc())\
              .paginate(page=page, per_page=10, error_out=False)
             
@@ -428,65 +404,16 @@ class BlogService:
     
     @staticmethod
     def get_article_comments(article_id, user=None, page=1):
-        """获取文章评论"""
+        """获取文章评论(根评论 SQL 分页, 评论树由 CommentService 缓存)"""
         try:
             config = CommentConfig.get_config()
             is_admin = user and hasattr(user, 'role') and user.role == 'admin'
             
-            # 1. 获取所有评论
-            comments = Comment.query.filter(
-                Comment.article_id == article_id
-            ).order_by(Comment.created_at.asc()).all()
-            
-            # 2. 先收集所有评论的ID和状态
-            comment_map = {}
-            parent_comments = []
-            
-            # 3. 第一次遍历：收集所有评论
-            for comment in comments:
-                # 跳过未审核的评论（非管理员）
-                if not is_admin and comment.status != 'approved':
-                    continue
-                
-                # 将评论添加到映射中
-                comment_map[comment.id] = comment
-                comment.replies = []
-                
-                # 如果是父评论（parent_id 为 None 或空字符串）
-                if not comment.parent_id:
-                    parent_comments.append(comment)
-            
-            # 4. 第二次遍历：处理回复
-            for comment in comments:
-                if not is_admin and comment.status != 'approved':
-                    continue
-                    
-                if comment.parent_id and comment.parent_id in comment_map:
-                    parent = comment_map[comment.parent_id]
-                    parent.replies.append(comment)
-            
-            # 5. 对父评论按时间倒序排序
-            parent_comments.sort(key=lambda x: x.created_at, reverse=True)
-            
-            # 6. 对每个父评论的回复进行排序
-            for parent in parent_comments:
-                parent.replies.sort(key=lambda x: x.created_at)
-            
-            # 7. 进行分页
-            per_page = config.comments_per_page
-            total = len(parent_comments)
-            total_pages = (total + per_page - 1) // per_page
-            start = (page - 1) * per_page
-            end = start + per_page
-            paginated_comments = parent_comments[start:end]
-            
-            # 创建分页对象
-            return Pagination(
-                items=paginated_comments,
-                total=total,
+            return CommentService.get_comment_page(
+                article_id=article_id,
                 page=page,
-                per_page=per_page,
-                total_pages=total_pages
+                per_page=config.comments_per_page,
+                include_all=bool(is_admin)
             )
             
         except Exception as e:
@@ -543,6 +470,7 @@ class BlogService:
             # 清除相关缓存
             cache_manager.delete(f'article:{article_id}:*')
             cache_manager.delete('latest_comments')
+            CommentService.invalidate(article_id=article_id)
             
             return True, '评论发表成功' + ('，等待审核' if config.require_audit else '')
             
@@ -561,6 +489,9 @@ class BlogService:
             if not is_admin and comment.user_id != user_id:
                 return False, '没有权限删除此评论'
             
+            article_id = comment.article_id
+            custom_page_id = comment.custom_page_id
+            
             # 删除评论及其所有回复
             Comment.query.filter(
                 db.or_(
@@ -569,10 +500,17 @@ class BlogService:
                 )
             ).delete()
             
+            # 批量删除不触发 flush 事件, 手动刷新评论统计
+            CommentService.sync_stats(
+                article_ids=[article_id] if article_id else [],
+                custom_page_ids=[custom_page_id] if custom_page_id else []
+            )
+            
             db.session.commit()
             
             # 清除相关缓存
-            cache_manager.delete(f'article:{comment.article_id}:*')
+            cache_manager.delete(f'article:{article_id}:*')
+            CommentService.invalidate(article_id, custom_page_id)
             
             return True, '评论删除成功'
             
@@ -620,7 +558,8 @@ class BlogService:
 
                 # 更新文章基本信息
                 article.title = data['title'].strip()
-                article.content = data['content']
+                article.content = add_image_srcset(data['content'])
+                article.refresh_summary()
                 article.status = data.get('status', Article.STATUS_PUBLIC)
                 article.allow_comment = data.get('allow_comment') == 'on'
                 
@@ -733,6 +672,148 @@ class BlogService:
             db.session.rollback()
             current_app.logger.error(f"Save article error: {str(e)}")
             return False, f'保存失败: {str(e)}', None
+
+    @staticmethod
+    def rebuild_article_summaries(batch_size=200, only_missing=False):
+        """按 ID 分批重算文章摘要、字数、阅读时长和目录, 不改变 updated_at
+
+        Args:
+            only_missing: 只处理 excerpt 为空的文章(升级后回填)
+
+        Returns:
+            tuple: (success, 处理的文章数或错误信息)
+        """
+        from app.utils.article_text import summarize_content
+
+        table = Article.__table__
+        bodies = ArticleBody.__table__
+        stmt = table.update()\
+            .where(table.c.id == db.bindparam('b_id'))\
+            .values(
+                excerpt=db.bindparam('b_excerpt'),
+                word_count=db.bindparam('b_word_count'),
+                reading_time=db.bindparam('b_reading_time'),
+                toc=db.bindparam('b_toc', type_=table.c.toc.type),
+                updated_at=table.c.updated_at
+            )
+
+        try:
+            total = 0
+            last_id = 0
+            while True:
+                query = db.select(table.c.id, table.c.content, bodies.c.data, bodies.c.compressed)\
+                    .select_from(table.outerjoin(bodies, bodies.c.article_id == table.c.id))\
+                    .where(table.c.id > last_id)\
+                    .order_by(table.c.id)\
+                    .limit(batch_size)
+                if only_missing:
+                    query = query.where(table.c.excerpt.is_(None))
+                rows = db.session.execute(query).all()
+                if not rows:
+                    break
+
+                params = []
+                for row in rows:
+                    content = row.content or ArticleBody.decode(row.data, row.compressed)
+                    summary = summarize_content(content)
+                    params.append({
+                        'b_id': row.id,
+                        'b_excerpt': summary['excerpt'],
+                        'b_word_count': summary['word_count'],
+                        'b_reading_time': summary['reading_time'],
+                        'b_toc': summary['toc']
+                    })
+                db.session.execute(stmt, params)
+                db.session.commit()
+
+                total += len(rows)
+                last_id = rows[-1].id
+            return True, total
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Rebuild article summaries error: {str(e)}")
+            return False, str(e)
+
+    @staticmethod
+    def migrate_article_bodies(target, batch_size=200, compress=False):
+        """在 articles.content(inline) 与 article_bodies(table) 之间分批迁移正文
+
+        每批单独提交, 中断后重新执行会从剩余数据继续; 不改变 updated_at。
+
+        Args:
+            target: 'table' 移入正文表, 'inline' 移回文章表
+            compress: 移入正文表时是否 zlib 压缩
+
+        Returns:
+            tuple: (success, 迁移的文章数或错误信息)
+        """
+        from app.models.article_body import STORAGE_INLINE, STORAGE_TABLE
+
+        if target not in (STORAGE_INLINE, STORAGE_TABLE):
+            return False, f'未知的存储模式: {target}'
+
+        table = Article.__table__
+        bodies = ArticleBody.__table__
+
+        try:
+            total = 0
+            last_id = 0
+            while True:
+                if target == STORAGE_TABLE:
+                    rows = db.session.execute(
+                        db.select(table.c.id, table.c.content)
+                        .where(table.c.id > last_id, table.c.content != '')
+                        .order_by(table.c.id)
+                        .limit(batch_size)
+                    ).all()
+                    if not rows:
+                        break
+                    ids = [row.id for row in rows]
+                    now = datetime.now()
+                    params = []
+                    for row in rows:
+                        data, compressed = ArticleBody.encode(row.content, compress)
+                        params.append({
+                            'article_id': row.id,
+                            'revision': 1,
+                            'compressed': compressed,
+                            'data': data,
+                            'updated_at': now
+                        })
+                    db.session.execute(bodies.delete().where(bodies.c.article_id.in_(ids)))
+                    db.session.execute(bodies.insert(), params)
+                    db.session.execute(
+                        table.update()
+                        .where(table.c.id.in_(ids))
+                        .values(content='', updated_at=table.c.updated_at)
+                    )
+                else:
+                    rows = db.session.execute(
+                        db.select(bodies.c.article_id.label('id'), bodies.c.data, bodies.c.compressed)
+                        .where(bodies.c.article_id > last_id)
+                        .order_by(bodies.c.article_id)
+                        .limit(batch_size)
+                    ).all()
+                    if not rows:
+                        break
+                    ids = [row.id for row in rows]
+                    db.session.execute(
+                        table.update()
+                        .where(table.c.id == db.bindparam('b_id'))
+                        .values(content=db.bindparam('b_content'), updated_at=table.c.updated_at),
+                        [{'b_id': row.id, 'b_content': ArticleBody.decode(row.data, row.compressed)}
+                         for row in rows]
+                    )
+                    db.session.execute(bodies.delete().where(bodies.c.article_id.in_(ids)))
+                db.session.commit()
+
+                total += len(rows)
+                last_id = rows[-1].id
+            return True, total
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Migrate article bodies error: {str(e)}")
+            return False, str(e)
     
     @staticmethod
     def get_tag_suggestions(query):
@@ -745,54 +826,64 @@ class BlogService:
         return cache_manager.get(f'tag_suggestions:{query}', query_tags)
     
     @staticmethod
-    def upload_image(file, user_id):
-        """上传图片"""
+    def upload_image(file, user_id, max_size=None):
+        """上传图片/视频
+
+        分块写入临时文件并同时计算 MD5, 超过 max_size(字节)立即中止;
+        相同内容复用已有文件, 否则原子移动到按哈希分片的目录。
+        """
+        staged = None
+        target = None
         try:
-            # 生成文件内容的 MD5 哈希值
-            file_content = file.read()
-            file_hash = hashlib.md5(file_content).hexdigest()
-            file.seek(0)  # 重置文件指针
-            
+            file_ext = file.filename.rsplit('.', 1)[1].lower()
+            staged = stage_upload(file.stream, max_size)
+
             # 检查是否存在相同的文件
-            existing_file = File.query.filter_by(md5=file_hash).first()
+            existing_file = File.query.filter_by(md5=staged.md5).first()
             if existing_file:
+                staged.discard()
                 return True, existing_file.file_path
-            
-            # 生成期路径和文件名
-            date_path = datetime.now().strftime('%Y%m%d')
-            file_ext = file.filename.rsplit('.', 1)[1].lower()
-            filename = f"{file_hash}.{file_ext}"
-            
-            # 创建目录
-            upload_folder = os.path.join(current_app.static_folder, 'uploads', 'images', date_path)
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            # 保存文件
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
-            
-            # 使用相对路径
-            relative_path = f'/static/uploads/images/{date_path}/{filename}'
-            
+
+            category = upload_category(file_ext)
+            relative = content_path(category, staged.md5, file_ext)
+            target = staged.commit(relative)
+            relative_path = f'/static/uploads/{relative}'
+
             # 保存文件信息到数据库
             db_file = File(
-                filename=filename,
+                filename=f'{staged.md5}.{file_ext}',
                 original_filename=file.filename,
                 file_path=relative_path,
-                file_type='images/'+file_ext,
-                file_size=os.path.getsize(file_path),
-                md5=file_hash,
+                file_type=f'{category}/{file_ext}',
+                file_size=staged.size,
+                md5=staged.md5,
                 uploader_id=user_id
             )
             db.session.add(db_file)
             db.session.commit()
-            
+
+            # 缩小版和 WebP 在后台进程池中生成
+            if category == 'images':
+                enqueue(generate_derivatives, db_file.id)
+
             return True, relative_path
-            
+
+        except UploadTooLarge as e:
+            return False, str(e)
+        except IntegrityError:
+            # 并发上传了相同内容: 文件已由对方记录, 直接复用
+            db.session.rollback()
+            existing_file = File.query.filter_by(md5=staged.md5).first()
+            if existing_file:
+                return True, existing_file.file_path
+            return False, '文件保存失败'
         except Exception as e:
             db.session.rollback()
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            if staged:
+                staged.discard()
+                if target and os.path.exists(target) and not File.query.filter_by(md5=staged.md5).first():
+                    os.remove(target)
+            current_app.logger.error(f"Upload file error: {str(e)}")
             return False, str(e)
     
     @staticmethod
@@ -921,6 +1012,9 @@ class BlogService:
         """获取侧边栏数据
         Args:
             widgets: 需要获取的组件列表,如 ['hot_today', 'hot_week']
+
+        Returns:
+            dict: 惰性值(见 lazy_value), 模板访问时才查询, 片段缓存命中的组件不会查询
         """
         if not widgets:
             return {}
@@ -934,9 +1028,8 @@ class BlogService:
             'latest_comments': ('latest_comments', BlogService.get_latest_comments)
         }
         
-        # 使用字典推导式获取数据
         return {
-            widget_map[widget][0]: widget_map[widget][1]()
+            widget_map[widget][0]: lazy_value(f'sidebar:{widget}', widget_map[widget][1])
             for widget in widgets
             if widget in widget_map
         }
@@ -991,6 +1084,7 @@ class BlogService:
             # 清除相关缓存
             cache_manager.delete(f'custom_page_data:{page.key}:*')
             cache_manager.delete('latest_comments')
+            CommentService.invalidate(custom_page_id=page.id)
             
             return True, '评论发表成功' + ('，等待审核' if config.require_audit else '')
             
@@ -1000,26 +1094,15 @@ class BlogService:
             return False, f'评论失败: {str(e)}'
 
     @staticmethod
-    def get_adjacent_articles(article):
-        """获取上一篇和下一篇文章"""
+    def get_adjacent_articles(article, same_category=False):
+        """获取上一篇和下一篇文章(内存有序 ID 数组二分查找, 文章有变更后增量同步)
+
+        Args:
+            same_category: 是否只在文章主分类内查找
+        """
         try:
-            # 获取上一篇文章(ID较小的)
-            prev_article = Article.query.filter(
-                Article.status == 'public',
-                Article.id < article.id
-            ).order_by(
-                Article.id.desc()
-            ).first()
-            
-            # 获取下一篇文章(ID较大的)
-            next_article = Article.query.filter(
-                Article.status == 'public',
-                Article.id > article.id
-            ).order_by(
-                Article.id.asc()
-            ).first()
-            
-            return prev_article, next_article
+            category_id = article.category_id if same_category else None
+            return article_neighbors.get_adjacent(article.id, category_id)
             
         except Exception as e:
             current_app.logger.error(f"Error getting adjacent articles: {str(e)}")
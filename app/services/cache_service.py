@@ -1,16 +1,7 @@
-import redis
 import json
 from datetime import datetime
-from config.database import REDIS_CONFIG
+from app.utils.redis_client import redis_client
 
-# Redis 客户端
-redis_client = redis.Redis(
-    host=REDIS_CONFIG['host'],
-    port=REDIS_CONFIG['port'],
-    password=REDIS_CONFIG['password'],
-    db=REDIS_CONFIG['db'],
-    decode_responses=True
-)
 
 # 缓存键值常量
 POST_VIEW_COUNT_KEY = 'post:view_count'  # Hash结构: post_id -> view_count
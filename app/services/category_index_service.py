@@ -0,0 +1,201 @@
+from flask import current_app
+from sqlalchemy import select, union, func
+
+from app import db
+from app.models import Article, Category
+from app.models.article import article_categories
+from app.models.category_index import CategoryArticleIndex
+
+
+class CategoryIndexService:
+    """分类-文章归属索引的构建与查询
+
+    索引行 = 文章的直接分类(主分类 ∪ 多分类) 沿 parent_id 向上展开到所有祖先,
+    同一 (分类, 文章) 只保留最小 depth。
+    """
+
+    # 每批处理的文章数 / executemany 每批行数
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def _executor(connection=None):
+        return connection if connection is not None else db.session
+
+    @staticmethod
+    def _parent_map(connection=None):
+        """{category_id: parent_id}"""
+        table = Category.__table__
+        rows = CategoryIndexService._executor(connection).execute(
+            select(table.c.id, table.c.parent_id)
+        )
+        return {row.id: row.parent_id for row in rows}
+
+    @staticmethod
+    def _ancestors(category_id, parents):
+        """[(category_id, depth), ...] 自身 depth 为 0, 防止环形引用"""
+        chain = []
+        seen = set()
+        current, depth = category_id, 0
+        while current is not None and current not in seen and current in parents:
+            seen.add(current)
+            chain.append((current, depth))
+            current = parents[current]
+            depth += 1
+        return chain
+
+    @staticmethod
+    def _membership_rows(article_ids, connection=None):
+        """指定文章的直接分类归属, 附带文章排序/过滤字段"""
+        articles = Article.__table__
+        primary = select(
+            articles.c.id.label('article_id'),
+            articles.c.category_id.label('category_id')
+        ).where(articles.c.category_id.isnot(None), articles.c.id.in_(article_ids))
+        related = select(
+            article_categories.c.article_id.label('article_id'),
+            article_categories.c.category_id.label('category_id')
+        ).where(article_categories.c.article_id.in_(article_ids))
+        membership = union(primary, related).subquery('membership')
+
+        stmt = select(
+            membership.c.article_id,
+            membership.c.category_id,
+            articles.c.created_at,
+            articles.c.status,
+            articles.c.author_id
+        ).join(articles, articles.c.id == membership.c.article_id)
+
+        return CategoryIndexService._executor(connection).execute(stmt)
+
+    @staticmethod
+    def _build_rows(article_ids, parents, connection=None):
+        """计算指定文章的全部索引行"""
+        entries = {}
+        for row in CategoryIndexService._membership_rows(article_ids, connection):
+            for category_id, depth in CategoryIndexService._ancestors(row.category_id, parents):
+                key = (category_id, row.article_id)
+                existing = entries.get(key)
+                if existing is None or depth < existing['depth']:
+                    entries[key] = {
+                        'category_id': category_id,
+                        'article_id': row.article_id,
+                        'depth': depth,
+                        'created_at': row.created_at,
+                        'status': row.status,
+                        'author_id': row.author_id
+                    }
+        return list(entries.values())
+
+    @staticmethod
+    def _insert_rows(rows, connection=None):
+        executor = CategoryIndexService._executor(connection)
+        table = CategoryArticleIndex.__table__
+        for start in range(0, len(rows), CategoryIndexService.BATCH_SIZE):
+            executor.execute(table.insert(), rows[start:start + CategoryIndexService.BATCH_SIZE])
+
+    @staticmethod
+    def sync_articles(article_ids, connection=None, parents=None):
+        """重建指定文章的索引行(不提交事务)
+
+        Returns:
+            int: 写入的索引行数
+        """
+        ids = sorted({aid for aid in article_ids if aid is not None})
+        if not ids:
+            return 0
+
+        executor = CategoryIndexService._executor(connection)
+        table = CategoryArticleIndex.__table__
+        if parents is None:
+            parents = CategoryIndexService._parent_map(connection)
+
+        written = 0
+        for start in range(0, len(ids), CategoryIndexService.BATCH_SIZE):
+            batch = ids[start:start + CategoryIndexService.BATCH_SIZE]
+            executor.execute(table.delete().where(table.c.article_id.in_(batch)))
+            rows = CategoryIndexService._build_rows(batch, parents, connection)
+            CategoryIndexService._insert_rows(rows, connection)
+            written += len(rows)
+        return written
+
+    @staticmethod
+    def rebuild(connection=None):
+        """整表重建(不提交事务), 按文章 ID 分批处理
+
+        Returns:
+            int: 写入的索引行数
+        """
+        executor = CategoryIndexService._executor(connection)
+        articles = Article.__table__
+        parents = CategoryIndexService._parent_map(connection)
+
+        executor.execute(CategoryArticleIndex.__table__.delete())
+
+        written = 0
+        last_id = 0
+        while True:
+            batch = [row.id for row in executor.execute(
+                select(articles.c.id)
+                .where(articles.c.id > last_id)
+                .order_by(articles.c.id)
+                .limit(CategoryIndexService.BATCH_SIZE)
+            )]
+            if not batch:
+                break
+            rows = CategoryIndexService._build_rows(batch, parents, connection)
+            CategoryIndexService._insert_rows(rows, connection)
+            written += len(rows)
+            last_id = batch[-1]
+        return written
+
+    @staticmethod
+    def rebuild_index():
+        """重建索引并提交
+
+        Returns:
+            tuple: (success, 索引行数 或错误信息)
+        """
+        try:
+            written = CategoryIndexService.rebuild()
+            db.session.commit()
+            return True, written
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Rebuild category index error: {str(e)}")
+            return False, str(e)
+
+    @staticmethod
+    def filter_articles(query, category_id, include_descendants=False):
+        """将 Article 查询限定在分类内, 按索引中的 created_at 倒序"""
+        index = CategoryArticleIndex
+        query = query.join(
+            index,
+            db.and_(index.article_id == Article.id, index.category_id == category_id)
+        )
+        if not include_descendants:
+            query = query.filter(index.depth == 0)
+        return query.order_by(index.created_at.desc())
+
+    @staticmethod
+    def visibility_filter(user=None):
+        """与文章列表一致的可见性条件, 直接作用在索引列上"""
+        index = CategoryArticleIndex
+        is_admin = user and hasattr(user, 'role') and user.role == 'admin'
+        if is_admin:
+            return None
+        if user and hasattr(user, 'id'):
+            return db.or_(
+                index.status == Article.STATUS_PUBLIC,
+                index.author_id == user.id
+            )
+        return index.status == Article.STATUS_PUBLIC
+
+    @staticmethod
+    def get_rollup_counts(status=None):
+        """各分类包含子孙分类在内的去重文章数 {category_id: count}"""
+        index = CategoryArticleIndex.__table__
+        stmt = select(index.c.category_id, func.count().label('count'))\
+            .group_by(index.c.category_id)
+        if status:
+            stmt = stmt.where(index.c.status == status)
+        return {row.category_id: row.count for row in db.session.execute(stmt)}
@@ -0,0 +1,313 @@
+from flask import current_app
+from sqlalchemy import select, func, bindparam
+
+from app import db
+from app.models import Comment, User, Article, CustomPage
+from app.utils.cache_manager import cache_manager
+from app.utils.entity_versions import entity_versions
+from app.utils.pagination import Pagination
+
+
+class CommentUser:
+    """评论作者的精简快照"""
+    __slots__ = ('id', 'username', 'nickname', 'email', 'avatar')
+
+    def __init__(self, id, username, nickname, email, avatar):
+        self.id = id
+        self.username = username
+        self.nickname = nickname
+        self.email = email
+        self.avatar = avatar
+
+
+class CommentRef:
+    """被回复评论的精简快照(模板只用到作者信息)"""
+    __slots__ = ('id', 'user', 'guest_name')
+
+    def __init__(self, id, user, guest_name):
+        self.id = id
+        self.user = user
+        self.guest_name = guest_name
+
+
+class CommentNode:
+    """可缓存的评论树节点, 属性与模板中使用的 Comment 字段保持一致"""
+    __slots__ = ('id', 'content', 'created_at', 'status', 'user_id', 'user',
+                 'guest_name', 'guest_email', 'parent_id', 'reply_to_id',
+                 'reply_to', 'replies')
+
+    def __init__(self, row, user=None):
+        self.id = row.id
+        self.content = row.content
+        self.created_at = row.created_at
+        self.status = row.status
+        self.user_id = row.user_id
+        self.user = user
+        self.guest_name = row.guest_name
+        self.guest_email = row.guest_email
+        self.parent_id = row.parent_id
+        self.reply_to_id = row.reply_to_id
+        self.reply_to = None
+        self.replies = []
+
+    @property
+    def display_name(self):
+        """显示名称"""
+        if self.user:
+            return self.user.nickname or self.user.username
+        return self.guest_name or '游客'
+
+
+class CommentService:
+    """评论树读取与缓存
+
+    根评论在 SQL 中按 (目标, parent_id IS NULL, created_at) 分页,
+    当前页根评论的回复逐层用 IN 查询取回(每层一次), 组装成 CommentNode 树后缓存;
+    缓存键包含 Comment 的实体版本号, 任一进程提交评论写入后各进程的缓存都会失效。
+    """
+
+    CACHE_TTL = 300
+
+    # 只读取渲染需要的列
+    _COLUMNS = (
+        Comment.id, Comment.content, Comment.created_at, Comment.status,
+        Comment.user_id, Comment.guest_name, Comment.guest_email,
+        Comment.parent_id, Comment.reply_to_id
+    )
+
+    @staticmethod
+    def _cache_prefix(article_id=None, custom_page_id=None):
+        if article_id is not None:
+            return f'comments:article:{article_id}:'
+        return f'comments:page:{custom_page_id}:'
+
+    @staticmethod
+    def invalidate(article_id=None, custom_page_id=None):
+        """清除某篇文章/自定义页面的评论树缓存"""
+        if article_id is not None:
+            cache_manager.delete(f"{CommentService._cache_prefix(article_id=article_id)}*")
+        if custom_page_id is not None:
+            cache_manager.delete(f"{CommentService._cache_prefix(custom_page_id=custom_page_id)}*")
+
+    @staticmethod
+    def invalidate_for(comment):
+        """按评论所属对象清除缓存"""
+        CommentService.invalidate(comment.article_id, comment.custom_page_id)
+
+    @staticmethod
+    def _target_filter(article_id=None, custom_page_id=None):
+        if article_id is not None:
+            return Comment.article_id == article_id
+        return Comment.custom_page_id == custom_page_id
+
+    @staticmethod
+    def _load_users(user_ids):
+        """批量加载评论作者快照"""
+        user_ids = {uid for uid in user_ids if uid is not None}
+        if not user_ids:
+            return {}
+        rows = db.session.query(User.id, User.username, User.nickname, User.email, User.avatar)\
+            .filter(User.id.in_(user_ids)).all()
+        return {row.id: CommentUser(*row) for row in rows}
+
+    @staticmethod
+    def _build_page(article_id, custom_page_id, page, per_page, include_all):
+        target = CommentService._target_filter(article_id, custom_page_id)
+        visible = [target] if include_all else [target, Comment.status == 'approved']
+
+        # 1. 根评论总数与当前页(走 article_id/custom_page_id, parent_id, created_at 复合索引)
+        total = db.session.query(db.func.count(Comment.id))\
+            .filter(*visible, Comment.parent_id.is_(None))\
+            .scalar() or 0
+        roots = db.session.query(*CommentService._COLUMNS)\
+            .filter(*visible, Comment.parent_id.is_(None))\
+            .order_by(Comment.created_at.desc(), Comment.id.desc())\
+            .offset((page - 1) * per_page)\
+            .limit(per_page)\
+            .all()
+
+        # 2. 当前页根评论的各级回复, 每层一次 IN 查询
+        replies = []
+        parent_ids = [row.id for row in roots]
+        seen = set(parent_ids)
+        while parent_ids:
+            level = db.session.query(*CommentService._COLUMNS)\
+                .filter(*visible, Comment.parent_id.in_(parent_ids))\
+                .order_by(Comment.created_at.asc(), Comment.id.asc())\
+                .all()
+            # 数据异常(回复链成环)时不重复取回
+            level = [row for row in level if row.id not in seen]
+            seen.update(row.id for row in level)
+            replies.extend(level)
+            parent_ids = [row.id for row in level]
+
+        # 3. 被回复的评论(只需作者信息, 不受审核状态限制)
+        reply_to_ids = {row.reply_to_id for row in replies if row.reply_to_id}
+        reply_to_rows = []
+        if reply_to_ids:
+            reply_to_rows = db.session.query(Comment.id, Comment.user_id, Comment.guest_name)\
+                .filter(Comment.id.in_(reply_to_ids)).all()
+
+        # 4. 批量加载涉及的用户
+        users = CommentService._load_users(
+            [row.user_id for row in roots] +
+            [row.user_id for row in replies] +
+            [row.user_id for row in reply_to_rows]
+        )
+        reply_to_map = {
+            row.id: CommentRef(row.id, users.get(row.user_id), row.guest_name)
+            for row in reply_to_rows
+        }
+
+        # 5. 按 parent_id 组装任意层级的树(回复按层取回, 父节点总是先于子节点创建)
+        nodes = [CommentNode(row, users.get(row.user_id)) for row in roots]
+        node_map = {node.id: node for node in nodes}
+        for row in replies:
+            reply = CommentNode(row, users.get(row.user_id))
+            reply.reply_to = reply_to_map.get(row.reply_to_id)
+            node_map[row.parent_id].replies.append(reply)
+            node_map[reply.id] = reply
+
+        return nodes, total
+
+    @staticmethod
+    def get_comment_page(article_id=None, custom_page_id=None, page=1, per_page=10, include_all=False):
+        """获取一页评论树
+
+        Args:
+            include_all: 是否包含未审核评论(管理员)
+
+        Returns:
+            Pagination: items 为 CommentNode 列表
+        """
+        page = max(page or 1, 1)
+        visibility = 'all' if include_all else 'approved'
+        cache_key = f"{CommentService._cache_prefix(article_id, custom_page_id)}{visibility}:{per_page}:{page}" \
+                    f":{entity_versions.key('Comment')}"
+
+        items, total = cache_manager.get_plain(
+            cache_key,
+            default_factory=lambda: CommentService._build_page(
+                article_id, custom_page_id, page, per_page, include_all
+            ),
+            ttl=CommentService.CACHE_TTL
+        )
+
+        return Pagination(
+            items=items,
+            total=total,
+            page=page,
+            per_page=per_page,
+            total_pages=(total + per_page - 1) // per_page if total > 0 else 1
+        )
+
+    # ---- 评论统计(comment_count / last_commented_at) ----
+
+    # executemany 每批参数数量
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def _stats_targets():
+        """(统计维度名, 评论外键列, 目标表)"""
+        return (
+            ('articles', Comment.__table__.c.article_id, Article.__table__),
+            ('custom_pages', Comment.__table__.c.custom_page_id, CustomPage.__table__),
+        )
+
+    @staticmethod
+    def _diff_stats(column, table, ids=None, connection=None):
+        """按已审核评论重新计算统计, 返回与当前存储值不一致的行"""
+        executor = connection if connection is not None else db.session
+        comments = Comment.__table__
+
+        stmt = select(
+            column.label('target_id'),
+            func.count(comments.c.id).label('count'),
+            func.max(comments.c.created_at).label('last_at')
+        ).where(comments.c.status == 'approved', column.isnot(None)).group_by(column)
+        current = select(table.c.id, table.c.comment_count, table.c.last_commented_at)
+        if ids is not None:
+            stmt = stmt.where(column.in_(ids))
+            current = current.where(table.c.id.in_(ids))
+
+        stats = {row.target_id: (row.count, row.last_at) for row in executor.execute(stmt)}
+
+        diff = []
+        for row in executor.execute(current):
+            count, last_at = stats.get(row.id, (0, None))
+            if row.comment_count != count or row.last_commented_at != last_at:
+                diff.append({
+                    'id': row.id,
+                    'old_count': row.comment_count,
+                    'new_count': count,
+                    'last_commented_at': last_at
+                })
+        return diff
+
+    @staticmethod
+    def _apply_stats(table, diff, connection=None):
+        """批量写回统计, 保持 updated_at 不变(评论不算内容更新)"""
+        if not diff:
+            return
+        executor = connection if connection is not None else db.session
+        stmt = table.update()\
+            .where(table.c.id == bindparam('b_id'))\
+            .values(
+                comment_count=bindparam('b_count'),
+                last_commented_at=bindparam('b_last'),
+                updated_at=table.c.updated_at
+            )
+        params = [
+            {'b_id': item['id'], 'b_count': item['new_count'], 'b_last': item['last_commented_at']}
+            for item in diff
+        ]
+        for start in range(0, len(params), CommentService.BATCH_SIZE):
+            executor.execute(stmt, params[start:start + CommentService.BATCH_SIZE])
+
+    @staticmethod
+    def sync_stats(article_ids=None, custom_page_ids=None, connection=None):
+        """重算指定文章/自定义页面的评论统计(不提交事务)
+
+        两个参数都为 None 时重算全部。
+
+        Returns:
+            dict: {'articles': diff, 'custom_pages': diff}
+        """
+        full = article_ids is None and custom_page_ids is None
+        requested = {'articles': article_ids, 'custom_pages': custom_page_ids}
+
+        result = {}
+        for name, column, table in CommentService._stats_targets():
+            ids = None if full else [i for i in (requested[name] or []) if i is not None]
+            if ids is not None and not ids:
+                result[name] = []
+                continue
+            diff = CommentService._diff_stats(column, table, ids, connection)
+            CommentService._apply_stats(table, diff, connection)
+            result[name] = diff
+        return result
+
+    @staticmethod
+    def backfill_stats():
+        """全量回填评论统计
+
+        Returns:
+            tuple: (success, {'articles': diff, 'custom_pages': diff} 或错误信息)
+        """
+        try:
+            result = CommentService.sync_stats()
+            db.session.commit()
+            return True, result
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Backfill comment stats error: {str(e)}")
+            return False, str(e)
+
+    @staticmethod
+    def verify_stats():
+        """只校验不写入, 返回统计不一致的行"""
+        return {
+            name: CommentService._diff_stats(column, table)
+            for name, column, table in CommentService._stats_targets()
+        }
+
@@ -0,0 +1,157 @@
+from flask import current_app
+from sqlalchemy import select, union, func, bindparam
+
+from app import db
+from app.models import Article, Category, Tag
+from app.models.article import article_categories, article_tags
+
+
+class RecountService:
+    """分类/标签文章数批量重算引擎
+
+    所有计数都在一次 GROUP BY 中算出, 只对发生变化的行执行一次 executemany 更新,
+    并返回变更明细 (id, name, old_count, new_count)。
+    """
+
+    # executemany 每批参数数量
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def _category_membership(category_ids=None):
+        """分类-文章归属关系(主分类 ∪ 多分类), UNION 自动去重"""
+        articles = Article.__table__
+        primary = select(
+            articles.c.category_id.label('category_id'),
+            articles.c.id.label('article_id')
+        ).where(articles.c.category_id.isnot(None))
+        related = select(
+            article_categories.c.category_id.label('category_id'),
+            article_categories.c.article_id.label('article_id')
+        )
+
+        if category_ids:
+            primary = primary.where(articles.c.category_id.in_(category_ids))
+            related = related.where(article_categories.c.category_id.in_(category_ids))
+
+        return union(primary, related).subquery('membership')
+
+    @staticmethod
+    def compute_category_counts(category_ids=None, connection=None):
+        """计算分类文章数 {category_id: count}"""
+        membership = RecountService._category_membership(category_ids)
+        stmt = select(
+            membership.c.category_id,
+            func.count().label('count')
+        ).group_by(membership.c.category_id)
+
+        executor = connection if connection is not None else db.session
+        return {row.category_id: row.count for row in executor.execute(stmt)}
+
+    @staticmethod
+    def compute_tag_counts(tag_ids=None, connection=None):
+        """计算标签文章数 {tag_id: count}"""
+        stmt = select(
+            article_tags.c.tag_id,
+            func.count().label('count')
+        ).group_by(article_tags.c.tag_id)
+
+        if tag_ids:
+            stmt = stmt.where(article_tags.c.tag_id.in_(tag_ids))
+
+        executor = connection if connection is not None else db.session
+        return {row.tag_id: row.count for row in executor.execute(stmt)}
+
+    @staticmethod
+    def _apply_counts(table, counts, ids=None, connection=None):
+        """对比现有计数并批量写回变化的行
+
+        Returns:
+            list: 变更明细
+        """
+        executor = connection if connection is not None else db.session
+
+        current = select(table.c.id, table.c.name, table.c.article_count)
+        if ids:
+            current = current.where(table.c.id.in_(ids))
+
+        updated = []
+        for row in executor.execute(current):
+            new_count = counts.get(row.id, 0)
+            if row.article_count != new_count:
+                updated.append({
+                    'id': row.id,
+                    'name': row.name,
+                    'old_count': row.article_count,
+                    'new_count': new_count
+                })
+
+        if updated:
+            stmt = table.update()\
+                .where(table.c.id == bindparam('b_id'))\
+                .values(article_count=bindparam('b_count'))
+            params = [{'b_id': item['id'], 'b_count': item['new_count']} for item in updated]
+            for start in range(0, len(params), RecountService.BATCH_SIZE):
+                executor.execute(stmt, params[start:start + RecountService.BATCH_SIZE])
+
+        return updated
+
+    @staticmethod
+    def sync_category_counts(category_ids=None, connection=None):
+        """重算分类计数(不提交事务, 供事件监听器在 flush 中调用)"""
+        ids = [cid for cid in (category_ids or []) if cid is not None]
+        if category_ids is not None and not ids:
+            return []
+        counts = RecountService.compute_category_counts(ids, connection)
+        return RecountService._apply_counts(Category.__table__, counts, ids, connection)
+
+    @staticmethod
+    def sync_tag_counts(tag_ids=None, connection=None):
+        """重算标签计数(不提交事务)"""
+        ids = [tid for tid in (tag_ids or []) if tid is not None]
+        if tag_ids is not None and not ids:
+            return []
+        counts = RecountService.compute_tag_counts(ids, connection)
+        return RecountService._apply_counts(Tag.__table__, counts, ids, connection)
+
+    @staticmethod
+    def recount_categories(category_ids=None):
+        """重算分类文章数, category_ids 为空时重算全部
+
+        Returns:
+            tuple: (success, updated 或错误信息)
+        """
+        try:
+            updated = RecountService.sync_category_counts(category_ids)
+            db.session.commit()
+            return True, updated
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Recount categories error: {str(e)}")
+            return False, str(e)
+
+    @staticmethod
+    def recount_tags(tag_ids=None):
+        """重算标签文章数, tag_ids 为空时重算全部
+
+        Returns:
+            tuple: (success, updated 或错误信息)
+        """
+        try:
+            updated = RecountService.sync_tag_counts(tag_ids)
+            db.session.commit()
+            return True, updated
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Recount tags error: {str(e)}")
+            return False, str(e)
+
+    @staticmethod
+    def recount_all():
+        """重算全部分类和标签计数"""
+        success, categories = RecountService.recount_categories()
+        if not success:
+            return False, categories
+        success, tags = RecountService.recount_tags()
+        if not success:
+            return False, tags
+        return True, {'categories': categories, 'tags': tags}
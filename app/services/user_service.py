@@ -1,9 +1,8 @@
-from app.models import User, Article, ViewHistory, Comment, Category
-from datetime import datetime
+from app.models import User, Article, ViewHistory, Comment, Category, SiteConfig
 from app.utils.cache_manager import cache_manager
+from app.utils.loading_profiles import with_profile
+from app.utils.upload_storage import content_path, stage_upload
 from app import db
-import os
-import hashlib
 from flask import current_app
 
 class UserService:
@@ -19,13 +18,8 @@ class UserService:
     def get_user_articles(user_id, page=1):
         """获取用户的文章列表"""
         def query_articles():
-            return Article.query\
-                .options(
-                    db.joinedload(Article.author),
-                    db.joinedload(Article.category),
-                    db.joinedload(Article.tags),
-                    db.joinedload(Article.comments).joinedload(Comment.user)
-                )\
+            # 评论数使用 comment_count 字段, 不再加载评论集合
+            return with_profile(Article.query, 'card')\
                 .filter_by(author_id=user_id)\
                 .order_by(Article.id.desc(), Article.created_at.desc())\
                 .paginate(page=page, per_page=10, error_out=False)
@@ -108,28 +102,19 @@ class UserService:
             
             # 处理头像
             if avatar_file:
-                # 生成文件哈希
-                file_content = avatar_file.read()
-                file_hash = hashlib.md5(file_content).hexdigest()
-                avatar_file.seek(0)
-                
                 # 检查文件类型
                 if not avatar_file.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
                     return False, '不支持的文件类型'
-                
-                # 保存头像
-                date_path = datetime.now().strftime('%Y%m%d')
+
+                # 分块写入并计算哈希, 按内容存放(相同头像只存一份)
                 file_ext = avatar_file.filename.rsplit('.', 1)[1].lower()
-                filename = f"{file_hash}.{file_ext}"
-                
-                upload_folder = os.path.join(current_app.static_folder, 'uploads', 'avatars', date_path)
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                file_path = os.path.join(upload_folder, filename)
-                avatar_file.save(file_path)
-                
+                max_size = int(SiteConfig.get_config('upload_max_size', '10')) * 1024 * 1024
+                staged = stage_upload(avatar_file.stream, max_size)
+                relative = content_path('avatars', staged.md5, file_ext)
+                staged.commit(relative)
+
                 # 更新头像路径
-                user.avatar = f'/static/uploads/avatars/{date_path}/{filename}'
+                user.avatar = f'/static/uploads/{relative}'
             
             db.session.commit()
             
@@ -0,0 +1,237 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from threading import Lock
+
+from sqlalchemy import event, func, or_, select
+
+from app import db
+from app.models import Article, Category
+from app.models.article import article_categories
+from app.utils.entity_versions import entity_versions
+
+
+class NeighborArticle:
+    """上一篇/下一篇链接所需的文章快照"""
+    __slots__ = ('id', 'title', 'category_id', 'created_at')
+
+    def __init__(self, id, title, category_id, created_at):
+        self.id = id
+        self.title = title
+        self.category_id = category_id
+        self.created_at = created_at
+
+
+class ArticleNeighborIndex:
+    """公开文章的有序 ID 数组(全局 + 按分类), 二分查找上一篇/下一篇
+
+    首次使用时一次性构建, 之后增量维护:
+    - 本进程提交的文章写入在 after_commit 中记下文章 ID(删除的直接移出索引);
+    - Article/Category 版本号变化时(含其他进程的写入, 见 app/utils/entity_versions.py)
+      只查询记下的文章和 updated_at 在上次同步之后的文章, 逐篇更新全局数组和所属分类的数组;
+    - 公开文章数与索引不一致(如其他进程删除了文章)时整体重建。
+    """
+
+    # 增量同步时 updated_at 向前多查的秒数(容忍各服务器时钟偏差和未提交的长事务)
+    SYNC_OVERLAP = 60
+
+    def __init__(self):
+        self._lock = Lock()
+        self._ids = None            # 全局有序 ID
+        self._by_category = {}      # {category_id: 有序 ID}
+        self._memberships = {}      # {article_id: set(category_id)}
+        self._articles = {}         # {article_id: NeighborArticle}
+        self._version = None        # 索引对应的 (Article, Category) 版本号
+        self._synced_at = None
+        self._pending = set()       # 本进程已提交、待同步的文章 ID
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 重建锁(索引数据可继续使用)"""
+        self._lock = Lock()
+
+    def _ensure_built(self):
+        version = entity_versions.get('Article', 'Category')
+        if self._ids is not None and self._version == version and not self._pending:
+            return
+        with self._lock:
+            if self._ids is None:
+                self._build(version)
+            elif self._version != version or self._pending:
+                self._sync(version)
+
+    def _build(self, version):
+        """一次查询公开文章, 一次查询其多分类归属"""
+        started = datetime.now()
+        articles = Article.__table__
+        rows = db.session.execute(
+            select(articles.c.id, articles.c.title, articles.c.category_id, articles.c.created_at)
+            .where(articles.c.status == Article.STATUS_PUBLIC)
+            .order_by(articles.c.id)
+        ).all()
+        related = db.session.execute(
+            select(article_categories.c.article_id, article_categories.c.category_id)
+            .join(articles, articles.c.id == article_categories.c.article_id)
+            .where(articles.c.status == Article.STATUS_PUBLIC)
+        ).all()
+
+        article_map = {}
+        memberships = {}
+        for row in rows:
+            article_map[row.id] = NeighborArticle(row.id, row.title, row.category_id, row.created_at)
+            memberships[row.id] = {row.category_id} if row.category_id is not None else set()
+        for row in related:
+            memberships[row.article_id].add(row.category_id)
+
+        by_category = {}
+        for article_id, category_ids in memberships.items():
+            for category_id in category_ids:
+                by_category.setdefault(category_id, []).append(article_id)
+        for ids in by_category.values():
+            ids.sort()
+
+        self._articles = article_map
+        self._memberships = memberships
+        self._by_category = by_category
+        self._ids = [row.id for row in rows]
+        self._version = version
+        self._synced_at = started
+        self._pending = set()
+
+    def _sync(self, version):
+        """增量同步: 只查询待同步和 updated_at 较新的文章"""
+        started = datetime.now()
+        articles = Article.__table__
+        pending, self._pending = self._pending, set()
+        condition = articles.c.updated_at >= self._synced_at - timedelta(seconds=self.SYNC_OVERLAP)
+        if pending:
+            condition = or_(condition, articles.c.id.in_(pending))
+        rows = db.session.execute(
+            select(articles.c.id, articles.c.title, articles.c.category_id,
+                   articles.c.created_at, articles.c.status).where(condition)
+        ).all()
+
+        public = [row for row in rows if row.status == Article.STATUS_PUBLIC]
+        related = {}
+        if public:
+            for row in db.session.execute(
+                select(article_categories.c.article_id, article_categories.c.category_id)
+                .where(article_categories.c.article_id.in_([row.id for row in public]))
+            ):
+                related.setdefault(row.article_id, set()).add(row.category_id)
+
+        for article_id in pending - {row.id for row in rows}:
+            self._discard(article_id)
+        for row in rows:
+            self._discard(row.id)
+        for row in public:
+            category_ids = related.get(row.id, set())
+            if row.category_id is not None:
+                category_ids.add(row.category_id)
+            self._add(NeighborArticle(row.id, row.title, row.category_id, row.created_at), category_ids)
+
+        if self._version[1] != version[1]:
+            # 删除分类时其多分类关系被批量删除, 文章本身不一定更新
+            existing = set(db.session.execute(select(Category.__table__.c.id)).scalars())
+            for category_id in set(self._by_category) - existing:
+                for article_id in self._by_category.pop(category_id):
+                    self._memberships.get(article_id, set()).discard(category_id)
+
+        total = db.session.execute(
+            select(func.count()).select_from(articles).where(articles.c.status == Article.STATUS_PUBLIC)
+        ).scalar()
+        if total != len(self._ids):
+            self._build(version)
+            return
+        self._version = version
+        self._synced_at = started
+
+    @staticmethod
+    def _remove_sorted(ids, value):
+        index = bisect_left(ids, value)
+        if index < len(ids) and ids[index] == value:
+            ids.pop(index)
+
+    @staticmethod
+    def _insert_sorted(ids, value):
+        index = bisect_left(ids, value)
+        if index == len(ids) or ids[index] != value:
+            ids.insert(index, value)
+
+    def _discard(self, article_id):
+        self._articles.pop(article_id, None)
+        self._remove_sorted(self._ids, article_id)
+        for category_id in self._memberships.pop(article_id, set()):
+            ids = self._by_category.get(category_id)
+            if ids is not None:
+                self._remove_sorted(ids, article_id)
+
+    def _add(self, article, category_ids):
+        self._articles[article.id] = article
+        self._insert_sorted(self._ids, article.id)
+        self._memberships[article.id] = category_ids
+        for category_id in category_ids:
+            self._insert_sorted(self._by_category.setdefault(category_id, []), article.id)
+
+    def committed(self, changed, deleted):
+        """本进程提交了文章写入: 删除的立即移出索引, 其余在下次访问时同步"""
+        with self._lock:
+            if self._ids is None:
+                return
+            for article_id in deleted:
+                self._discard(article_id)
+            self._pending.update(changed - deleted)
+
+    def get_adjacent(self, article_id, category_id=None):
+        """二分查找上一篇(ID 较小)和下一篇(ID 较大)
+
+        Args:
+            category_id: 指定时只在该分类内查找
+
+        Returns:
+            tuple: (prev, next), 不存在时为 None
+        """
+        self._ensure_built()
+        with self._lock:
+            ids = self._ids if category_id is None else self._by_category.get(category_id, [])
+            left = bisect_left(ids, article_id)
+            right = bisect_right(ids, article_id)
+            prev_article = self._articles.get(ids[left - 1]) if left > 0 else None
+            next_article = self._articles.get(ids[right]) if right < len(ids) else None
+        return prev_article, next_article
+
+
+article_neighbors = ArticleNeighborIndex()
+
+# session.info 中本事务写入的文章 ID: (新增/修改, 删除)
+NEIGHBOR_CHANGES_KEY = 'article_neighbor_changes'
+
+
+@event.listens_for(db.session, 'before_flush')
+def touch_recategorized_articles(session, flush_context, instances):
+    """只修改了多分类的文章也更新 updated_at, 其他进程增量同步时才能查到"""
+    for obj in session.dirty:
+        if isinstance(obj, Article) and db.inspect(obj).attrs.categories.history.has_changes():
+            obj.updated_at = datetime.now()
+
+
+@event.listens_for(db.session, 'after_flush')
+def collect_neighbor_changes(session, flush_context):
+    """flush 后记录文章变更, 提交后再应用"""
+    changed = {obj.id for obj in session.new | session.dirty if isinstance(obj, Article) and obj.id is not None}
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Article)}
+    if changed or deleted:
+        pending = session.info.setdefault(NEIGHBOR_CHANGES_KEY, (set(), set()))
+        pending[0].update(changed)
+        pending[1].update(deleted)
+
+
+@event.listens_for(db.session, 'after_commit')
+def apply_neighbor_changes(session):
+    changes = session.info.pop(NEIGHBOR_CHANGES_KEY, None)
+    if changes:
+        article_neighbors.committed(*changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_neighbor_changes(session):
+    """回滚时丢弃未提交的变更"""
+    session.info.pop(NEIGHBOR_CHANGES_KEY, None)
@@ -0,0 +1,87 @@
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+# 摘要最大字符数(模板中再按需截断)
+EXCERPT_LENGTH = 300
+
+# 阅读速度: 中日韩字符按字计, 其它按单词计
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+_CJK_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]')
+_WORD_RE = re.compile(r'[A-Za-z0-9]+(?:[\'\-][A-Za-z0-9]+)*')
+_SPACE_RE = re.compile(r'\s+')
+
+_HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_SKIP_TAGS = {'script', 'style'}
+_BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'blockquote', 'pre', 'section', 'article'} | set(_HEADING_TAGS)
+
+
+class _ArticleTextParser(HTMLParser):
+    """提取正文纯文本和标题目录"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.toc = []
+        self._skip = 0
+        self._heading = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _HEADING_TAGS:
+            self._heading = {'level': _HEADING_TAGS[tag], 'id': dict(attrs).get('id'), 'text': []}
+        if tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag in _HEADING_TAGS and self._heading is not None:
+            text = _SPACE_RE.sub(' ', ''.join(self._heading['text'])).strip()
+            if text:
+                self.toc.append({'level': self._heading['level'], 'text': text, 'id': self._heading['id']})
+            self._heading = None
+        if tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        self.parts.append(data)
+        if self._heading is not None:
+            self._heading['text'].append(data)
+
+
+def summarize_content(content):
+    """根据文章 HTML 计算摘要、字数、阅读时长(分钟)和标题目录
+
+    Returns:
+        dict: excerpt, word_count, reading_time, toc
+    """
+    parser = _ArticleTextParser()
+    try:
+        parser.feed(content or '')
+        parser.close()
+        text = ''.join(parser.parts)
+    except Exception:
+        # 非法 HTML 时退化为简单去标签
+        text = unescape(re.sub(r'<[^>]+>', ' ', content or ''))
+    text = _SPACE_RE.sub(' ', text).strip()
+
+    cjk_count = len(_CJK_RE.findall(text))
+    word_count = len(_WORD_RE.findall(text))
+    minutes = cjk_count / CJK_CHARS_PER_MINUTE + word_count / WORDS_PER_MINUTE
+
+    excerpt = text
+    if len(excerpt) > EXCERPT_LENGTH:
+        excerpt = excerpt[:EXCERPT_LENGTH].rstrip() + '...'
+
+    return {
+        'excerpt': excerpt,
+        'word_count': cjk_count + word_count,
+        'reading_time': max(1, round(minutes)) if text else 0,
+        'toc': parser.toc
+    }
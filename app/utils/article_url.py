@@ -1,6 +1,8 @@
 from flask import current_app
+from app import db
 from app.models import SiteConfig, Category, Article
 from .id_encoder import IdEncoder
+from .request_cache import request_memo
 
 class ArticleUrlGenerator:
     """文章URL生成器"""
@@ -119,9 +121,13 @@ class ArticleUrlGenerator:
             
             # 如果匹配到 slug,通过 slug 查找文章
             if 'slug' in match.groupdict():
-                article = Article.query.filter_by(slug=match.group('slug')).first()
-                if article:
-                    return article.id
+                slug = match.group('slug')
+                article_id = request_memo(
+                    'Article', ('slug', slug),
+                    lambda: db.session.query(Article.id).filter_by(slug=slug).scalar()
+                )
+                if article_id:
+                    return article_id
             
             # 如果有分类，验证访问方式
             if 'category' in match.groupdict():
@@ -0,0 +1,340 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+
+from flask import abort, current_app, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # 未安装时只生成 gzip
+    brotli = None
+
+# 命名空间: static 为 app/static(含各主题的静态目录), 其余为插件名(app/plugins/installed/<name>/static)
+NAMESPACE_STATIC = 'static'
+
+# 不参与构建的目录(用户上传内容和临时文件)
+EXCLUDED_DIRS = {'uploads', '.tmp', '__pycache__'}
+
+# 预压缩的扩展名, 图片、字体(woff/woff2)、视频等已压缩格式不处理
+COMPRESSIBLE_EXTENSIONS = {'.js', '.mjs', '.css', '.map', '.json', '.svg', '.html', '.htm', '.txt', '.xml',
+                           '.ttf', '.otf', '.eot', '.ico', '.wasm'}
+# 小于该字节数的文件不压缩
+COMPRESS_MIN_SIZE = 1024
+
+# 压缩格式优先级及对应的文件后缀
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def asset_sources(app):
+    """各命名空间的源目录"""
+    sources = {NAMESPACE_STATIC: app.static_folder}
+    plugins_dir = os.path.join(app.root_path, 'plugins', 'installed')
+    if os.path.isdir(plugins_dir):
+        for name in sorted(os.listdir(plugins_dir)):
+            static_dir = os.path.join(plugins_dir, name, 'static')
+            if os.path.isdir(static_dir):
+                sources[name] = static_dir
+    return sources
+
+
+def _iter_files(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS and not d.startswith('.'))
+        for filename in sorted(filenames):
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, root).replace(os.sep, '/'), path
+
+
+def _file_hash(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 源文件哈希缓存: {路径: (修改时间, 大小, 哈希)}, 文件未变化时不重新计算
+_source_hashes = {}
+
+
+def _source_hash(path):
+    stat = os.stat(path)
+    cached = _source_hashes.get(path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        cached = _source_hashes[path] = (stat.st_mtime_ns, stat.st_size, _file_hash(path)[:HASH_LENGTH])
+    return cached[2]
+
+
+def hashed_name(logical, file_hash):
+    """default/js/search.js -> default/js/search.<hash>.js"""
+    directory, _, filename = logical.rpartition('/')
+    stem, dot, ext = filename.rpartition('.')
+    name = f'{stem}.{file_hash}.{ext}' if dot and stem else f'{filename}.{file_hash}'
+    return f'{directory}/{name}' if directory else name
+
+
+def _compressible(logical, path):
+    """已知文本类扩展名, 或无法识别类型但内容是 UTF-8 文本(如 default/vendor/3.4.5)"""
+    ext = os.path.splitext(logical)[1].lower()
+    if ext in COMPRESSIBLE_EXTENSIONS:
+        return True
+    if mimetypes.guess_type(logical)[0] is not None:
+        return False
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    return b'\0' not in head
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.part'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _precompress(path, target_base):
+    """生成 .br/.gz, 只保留比原文件小的; 返回生成的编码列表"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    encodings = []
+    for encoding, suffix in ENCODINGS:
+        if encoding == 'br':
+            if brotli is None:
+                continue
+            compressed = brotli.compress(data, quality=11)
+        else:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        target = target_base + suffix
+        if len(compressed) < len(data) * 0.95:
+            _write_atomic(target, compressed)
+            encodings.append(encoding)
+        elif os.path.exists(target):
+            os.remove(target)
+    return encodings
+
+
+def _reusable(old, entry, target_base):
+    """内容未变且压缩文件齐全时沿用上次的压缩结果(安装 brotli 后会补生成 .br)"""
+    if not old or not old['encodings'] or old['hashed'] != entry['hashed'] \
+            or (brotli is not None and 'br' not in old['encodings']):
+        return False
+    suffixes = dict(ENCODINGS)
+    return all(os.path.exists(target_base + suffixes[encoding]) for encoding in old['encodings'])
+
+
+def build_assets(app, output_dir=None, compress=True, progress=None):
+    """构建静态资源清单, 并把可压缩文件的 .gz/.br 写入构建目录
+
+    构建目录结构: <output>/manifest.json 和 <output>/<命名空间>/<原路径>.gz|.br;
+    原文件仍从源目录读取, 内容未变(哈希相同)的压缩文件沿用上次结果。
+
+    Returns:
+        dict: 清单内容
+    """
+    output_dir = output_dir or app.config['ASSETS_BUILD_DIR']
+    previous = _load_manifest(os.path.join(output_dir, MANIFEST_NAME)) or {}
+    namespaces = {}
+    for namespace, root in asset_sources(app).items():
+        old_files = previous.get('namespaces', {}).get(namespace, {}).get('files', {})
+        files = {}
+        namespace_digest = hashlib.md5()
+        for logical, path in _iter_files(root):
+            file_hash = _file_hash(path)[:HASH_LENGTH]
+            namespace_digest.update(f'{logical}:{file_hash}\n'.encode())
+            entry = {'hashed': hashed_name(logical, file_hash), 'size': os.path.getsize(path), 'encodings': []}
+            target_base = os.path.join(output_dir, namespace, *logical.split('/'))
+            if compress and entry['size'] >= COMPRESS_MIN_SIZE and _compressible(logical, path):
+                old = old_files.get(logical)
+                if _reusable(old, entry, target_base):
+                    entry['encodings'] = old['encodings']
+                else:
+                    entry['encodings'] = _precompress(path, target_base)
+            files[logical] = entry
+            if progress:
+                progress(namespace, logical)
+        namespaces[namespace] = {'digest': namespace_digest.hexdigest()[:HASH_LENGTH], 'files': files}
+
+    manifest = {'built_at': time.time(), 'namespaces': namespaces}
+    _write_atomic(os.path.join(output_dir, MANIFEST_NAME),
+                  json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8'))
+    return manifest
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class AssetManifest:
+    """运行时的资源清单: 逻辑路径 -> 带哈希的 URL, 以及反向查找
+
+    清单在 flask assets build 时生成, 进程启动时加载; 清单不存在时 asset_url 退回原始地址。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path = None
+        self._mtime = None
+        self._checked = 0
+        self._namespaces = {}
+        self._reverse = {}
+
+    def init_app(self, app):
+        self._path = os.path.join(app.config['ASSETS_BUILD_DIR'], MANIFEST_NAME)
+        self.reload()
+
+    def reload(self):
+        """加载清单, 清单文件未变化时跳过"""
+        try:
+            mtime = os.path.getmtime(self._path) if self._path else None
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        manifest = _load_manifest(self._path) if mtime else None
+        namespaces = (manifest or {}).get('namespaces', {})
+        reverse = {
+            namespace: {entry['hashed']: logical for logical, entry in data['files'].items()}
+            for namespace, data in namespaces.items()
+        }
+        with self._lock:
+            self._namespaces, self._reverse, self._mtime = namespaces, reverse, mtime
+
+    def _maybe_reload(self):
+        # 最多每 5 秒检查一次清单文件, 重新构建后无需重启即可生效
+        now = time.monotonic()
+        if now - self._checked > 5:
+            self._checked = now
+            self.reload()
+
+    def lookup(self, namespace, logical):
+        self._maybe_reload()
+        return self._namespaces.get(namespace, {}).get('files', {}).get(logical)
+
+    def digest(self, namespace):
+        self._maybe_reload()
+        return self._namespaces.get(namespace, {}).get('digest')
+
+    def resolve(self, namespace, hashed):
+        """带哈希的路径 -> (逻辑路径, 清单项)"""
+        self._maybe_reload()
+        logical = self._reverse.get(namespace, {}).get(hashed)
+        if logical is None:
+            return None, None
+        return logical, self._namespaces[namespace]['files'][logical]
+
+
+asset_manifest = AssetManifest()
+
+
+def _fallback_url(namespace, logical):
+    if namespace == NAMESPACE_STATIC:
+        return url_for('static', filename=logical)
+    return f'/plugin/{namespace}/static/{logical}'
+
+
+def asset_url(logical, namespace=NAMESPACE_STATIC):
+    """模板函数: 资源的带哈希 URL(可长期缓存), 未构建清单或源文件在构建后被修改时返回原始地址"""
+    entry = asset_manifest.lookup(namespace, logical)
+    source_dir = asset_sources(current_app).get(namespace) if entry is not None else None
+    if source_dir is None:
+        return _fallback_url(namespace, logical)
+    # 与 _assets_view 的校验一致: 哈希与当前源文件不符的地址会被拒绝(404), 不能输出
+    source = os.path.join(source_dir, *logical.split('/'))
+    if not os.path.isfile(source) or hashed_name(logical, _source_hash(source)) != entry['hashed']:
+        return _fallback_url(namespace, logical)
+    return url_for('assets', filename=f"{namespace}/{entry['hashed']}")
+
+
+def asset_base_url(namespace=NAMESPACE_STATIC):
+    """模板函数: 整个目录的版本化前缀(不以 / 结尾)
+
+    用于按相对路径再加载其他文件的资源包(如 TinyMCE 的插件和皮肤), 目录内任一文件变化时前缀改变。
+    """
+    digest = asset_manifest.digest(namespace)
+    if digest is None:
+        return _fallback_url(namespace, '').rstrip('/')
+    return url_for('assets', filename=f'{namespace}@{digest}/').rstrip('/')
+
+
+def _accepted_encodings():
+    accepted = request.accept_encodings
+    return [encoding for encoding, _ in ENCODINGS if accepted[encoding]]
+
+
+def _assets_view(filename):
+    """/assets/<命名空间>/<带哈希路径> 或 /assets/<命名空间>@<目录摘要>/<原路径>"""
+    namespace, _, path = filename.partition('/')
+    if not path:
+        abort(404)
+    immutable = True
+    by_directory = '@' in namespace
+    if by_directory:
+        namespace, _, digest = namespace.partition('@')
+        logical, entry = path, asset_manifest.lookup(namespace, path)
+        # 摘要与当前清单不一致(旧页面引用)时仍返回当前文件, 但不长期缓存
+        immutable = digest == asset_manifest.digest(namespace)
+    else:
+        logical, entry = asset_manifest.resolve(namespace, path)
+    sources = asset_sources(current_app)
+    if entry is None or namespace not in sources:
+        abort(404)
+
+    source = os.path.join(sources[namespace], *logical.split('/'))
+    if not os.path.isfile(source):
+        abort(404)
+    # 源文件在构建后被修改: 带哈希的地址不能返回与哈希不符的内容, 构建目录中的压缩文件也已过期;
+    # 目录前缀地址返回当前文件, 但不使用压缩文件且不长期缓存
+    current = hashed_name(logical, _source_hash(source)) == entry['hashed']
+    if not current:
+        if not by_directory:
+            abort(404)
+        immutable = False
+    mimetype = mimetypes.guess_type(logical)[0] or 'application/octet-stream'
+    path_to_send, encoding = source, None
+    available = entry.get('encodings', []) if current else []
+    for candidate in _accepted_encodings():
+        if candidate in available:
+            suffix = dict(ENCODINGS)[candidate]
+            compressed = os.path.join(current_app.config['ASSETS_BUILD_DIR'], namespace,
+                                      *logical.split('/')) + suffix
+            if os.path.isfile(compressed):
+                path_to_send, encoding = compressed, candidate
+                break
+
+    response = send_file(path_to_send, mimetype=mimetype, conditional=True, etag=True,
+                         max_age=IMMUTABLE_MAX_AGE if immutable else 300)
+    if immutable:
+        response.cache_control.immutable = True
+    response.cache_control.public = True
+    if available:
+        response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_assets(app):
+    """加载资源清单, 注册 /assets 路由和模板函数"""
+    asset_manifest.init_app(app)
+    app.add_url_rule('/assets/<path:filename>', 'assets', _assets_view)
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.jinja_env.globals['asset_base_url'] = asset_base_url
@@ -75,6 +75,29 @@ class CacheManager:
                     return default_factory()
             return None
 
+    def get_plain(self, key, default_factory=None, ttl=None):
+        """获取普通值缓存(dict/list/tuple 等), 不做分页对象和 SQLAlchemy 对象的有效性检查
+
+        get 会把带 items 属性的值(包括 dict)当作分页对象检查, 缓存普通数据时使用本方法。
+        """
+        try:
+            with self._lock:
+                if key in self._cache and self._is_expired(key):
+                    self._cache.pop(key, None)
+                    self._expires.pop(key, None)
+                if key in self._cache:
+                    self._hits += 1
+                    return self._cache[key]
+                self._misses += 1
+            if default_factory is None:
+                return None
+        except Exception as e:
+            current_app.logger.error(f"Cache get error: {str(e)}")
+            if default_factory is None:
+                return None
+        with db.session.no_autoflush:
+            return self.set(key, default_factory(), ttl)
+
     def set(self, key, value, ttl=None):
         """设置缓存"""
         try:
@@ -118,6 +141,11 @@ class CacheManager:
             self._hits = 0
             self._misses = 0
 
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 重建锁并清空继承的缓存(其中可能有绑定父进程会话的 ORM 对象)"""
+        self._lock = Lock()
+        self.clear()
+
     def _is_expired(self, key):
         """检查是否过期"""
         return key in self._expires and time() > self._expires[key]
@@ -1,5 +1,7 @@
 from app.models import Category
 from app.utils.cache_manager import cache_manager
+from app.services.category_index_service import CategoryIndexService
+from app.utils.template_context import lazy_value
 
 def get_categories_data():
     """获取分类数据，返回字典格式"""
@@ -17,14 +19,11 @@ def get_categories_data():
         # 构建分类树
         tree = []
 
-        # 统计文章数
+        # 统计文章数: 分类索引已按祖先展开, 一次 GROUP BY 即得包含子分类的去重总数
+        rollup_counts = CategoryIndexService.get_rollup_counts()
         article_counts = {}
         for category in categories:
-            # 计算包含子分类的总文章数
-            total_count = category.article_count or 0  # 处理 None 值
-            for child in category.get_descendants():
-                total_count += child.article_count or 0  # 处理 None 值
-            article_counts[category.id] = total_count
+            article_counts[category.id] = rollup_counts.get(category.id, 0)
 
             # 重新构建树形结构
             if category.parent_id is None:
@@ -50,3 +49,11 @@ def get_categories_data():
         ttl=3600  # 缓存1小时
     )
 
+
+def lazy_categories_data():
+    """get_categories_data 的惰性版本, 模板访问时才取数据, 分类导航片段缓存命中时不会查询"""
+    data = lazy_value('categories', get_categories_data)
+    return {
+        key: lazy_value(f'categories:{key}', lambda key=key: data[key])
+        for key in ('categories', 'article_counts', 'all_categories')
+    }
@@ -0,0 +1,129 @@
+import gzip
+import threading
+
+from flask import current_app, g, request
+
+from app.utils.cache_manager import cache_manager
+
+try:
+    import brotli
+except ImportError:  # 未安装时只协商 gzip
+    brotli = None
+
+# 压缩的响应类型, 图片、视频、压缩包等已压缩格式不处理
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript', 'text/csv',
+    'application/json', 'application/javascript', 'application/xml', 'application/rss+xml',
+    'application/atom+xml', 'application/ld+json', 'application/manifest+json', 'image/svg+xml',
+}
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESSION_BROTLI_QUALITY', 5))
+    return gzip.compress(data, compresslevel=config.get('COMPRESSION_LEVEL', 6), mtime=0)
+
+
+class CompressionStats:
+    """压缩计数: 压缩/跳过的响应数, 以及缓存项压缩结果的命中/未命中次数"""
+
+    def __init__(self):
+        self._reset_state()
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'compressed': 0, 'skipped': 0}
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 重建锁并清零计数"""
+        self._reset_state()
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+compression_stats = CompressionStats()
+
+# 压缩结果在 cache_manager 中的键后缀: <缓存键>:compressed:<编码>, 按前缀通配删除缓存时一并清除
+COMPRESSED_KEY_SUFFIX = ':compressed:'
+
+
+def use_cached_compression(cache_key):
+    """标记本次响应由 cache_manager 中的缓存项 cache_key 生成(如页面 API 的 JSON)
+
+    压缩时把压缩结果与原始内容一起存在该缓存键旁, 同一缓存项再次命中时直接复用;
+    未标记的响应(含 CSRF 令牌等每次不同的内容)每次现压缩, 不缓存。
+    """
+    g.compression_cache_key = cache_key
+
+
+def _compress_cached(cache_key, data, encoding, config):
+    """取缓存项的压缩结果; 原始内容不一致(缓存项已更新)时重新压缩并覆盖"""
+    key = f'{cache_key}{COMPRESSED_KEY_SUFFIX}{encoding}'
+    cached = cache_manager.get_plain(key)
+    if cached is not None and cached[0] == data:
+        compression_stats.count('hits')
+        return cached[1]
+    compression_stats.count('misses')
+    compressed = _compress(data, encoding, config)
+    # 过大的响应不缓存, 避免挤掉其他缓存项
+    if len(data) <= config.get('COMPRESSION_CACHE_MAX_ENTRY', 1024 * 1024):
+        cache_manager.set(key, (data, compressed), config.get('COMPRESSION_CACHE_TTL', 3600))
+    return compressed
+
+
+def _negotiate():
+    """按 Accept-Encoding 选择编码, br 优先"""
+    accepted = request.accept_encodings
+    candidates = (('br', 'gzip') if brotli is not None else ('gzip',))
+    best = max(candidates, key=lambda encoding: accepted[encoding])
+    return best if accepted[best] > 0 else None
+
+
+def compress_response(response):
+    """after_request: 对可压缩的 HTML/JSON 等响应做 gzip/br 压缩"""
+    config = current_app.config
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    # 内容是否压缩取决于请求头, 缓存需按 Accept-Encoding 区分
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = _negotiate()
+    if encoding is None or len(data) < config.get('COMPRESSION_MIN_SIZE', 500):
+        return response
+
+    cache_key = g.get('compression_cache_key')
+    if cache_key is not None:
+        compressed = _compress_cached(cache_key, data, encoding, config)
+    else:
+        compressed = _compress(data, encoding, config)
+    if len(compressed) >= len(data):
+        compression_stats.count('skipped')
+        return response
+    compression_stats.count('compressed')
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # 强 ETag 需区分编码
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def init_compression(app):
+    """注册响应压缩
+
+    after_request 按注册的逆序执行, 需在其他 after_request 之前注册, 保证最后压缩。
+    """
+    if app.config.get('COMPRESSION_ENABLED'):
+        app.after_request(compress_response)
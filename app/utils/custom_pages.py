@@ -2,12 +2,11 @@ import os
 from flask import render_template, current_app, request, abort
 from flask_login import login_required, current_user
 
-from app import db
-from app.models import CustomPage, Comment
+from app.models import CustomPage
 from app.models.site_config import SiteConfig
 from app.utils.cache_manager import cache_manager
 from app.models.comment_config import CommentConfig
-from app.utils.pagination import Pagination
+from app.services.comment_service import CommentService
 
 class CustomPageMiddleware:
     def __init__(self, wsgi_app, flask_app):
@@ -80,26 +79,6 @@ def render_custom_page(page):
         page_data = cache_manager.get(cache_key)
         
         if page_data is None:
-            # 获取评论数据并分页
-            comments_query = Comment.query.filter_by(
-                custom_page_id=page.id
-            ).order_by(Comment.created_at.desc())
-            
-            # 非管理员只能看到已审核的评论
-            if not (current_user.is_authenticated and current_user.role == 'admin'):
-                comments_query = comments_query.filter_by(status='approved')
-            
-            # 获取评论及其回复
-            comments = comments_query.options(
-                db.joinedload(Comment.user),
-                db.joinedload(Comment.parent),
-                db.joinedload(Comment.reply_to)
-            ).paginate(
-                page=current_page,
-                per_page=comment_config.comments_per_page,
-                error_out=False
-            )
-            
             # 准备页面数据
             page_data = dict(
                 title=page.title,
@@ -117,58 +96,12 @@ def render_custom_page(page):
             # 缓存页面数据
             cache_manager.set(cache_key, page_data)
             
-        # 重新获取评论分页数据（因为分页对象不能被缓存）
-        # 1. 获取所有评论
-        comments = Comment.query.filter(
-            Comment.custom_page_id == page.id
-        ).order_by(Comment.created_at.asc()).all()
-        
-        # 2. 先收集所有评论的ID和状态
-        comment_map = {}
-        parent_comments = []
-        
-        # 3. 第一次遍历：收集所有评论
-        for comment in comments:
-            # 跳过未审核的评论（非管理员）
-            if not (current_user.is_authenticated and current_user.role == 'admin'):
-                if comment.status != 'approved':
-                    continue
-            
-            # 将评论添加到映射中
-            comment_map[comment.id] = comment
-            comment.replies = []
-            
-            # 如果是父评论
-            if not comment.parent_id:
-                parent_comments.append(comment)
-        
-        # 4. 第二次遍历：处理回复
-        for comment in comments:
-            if comment.parent_id and comment.id in comment_map:
-                parent = comment_map.get(comment.parent_id)
-                if parent:
-                    parent.replies.append(comment)
-        
-        # 5. 对父评论按时间倒序排序
-        parent_comments.sort(key=lambda x: x.created_at, reverse=True)
-        
-        # 6. 对每个父评论的回复按时间正序排序
-        for parent in parent_comments:
-            parent.replies.sort(key=lambda x: x.created_at)
-        
-        # 7. 创建分页对象
-        per_page = comment_config.comments_per_page
-        total = len(parent_comments)
-        total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-        start = (current_page - 1) * per_page
-        end = start + per_page
-        
-        comments = Pagination(
-            items=parent_comments[start:end],
-            total=total,
+        # 评论树: 根评论 SQL 分页, 结果由 CommentService 缓存
+        comments = CommentService.get_comment_page(
+            custom_page_id=page.id,
             page=current_page,
-            per_page=per_page,
-            total_pages=total_pages
+            per_page=comment_config.comments_per_page,
+            include_all=user_state == 'admin'
         )
         
         # 在渲染模板时传入当前主题信息
@@ -0,0 +1,148 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.entity_version import EntityVersion
+from app.utils.request_cache import request_memo, request_memo_clear
+
+# 不维护版本号的模型: 版本号表自身和定时任务状态;
+# 浏览记录每次访问都会写入, 依赖它的内容(今日热门等)按 ttl 过期
+EXCLUDED_MODELS = {'EntityVersion', 'ScheduledJob', 'JobRun', 'SchedulerLease', 'ViewHistory'}
+
+# 只修改这些计数字段的批量 UPDATE(如浏览数自增)不改变版本号
+COUNTER_COLUMNS = {'view_count'}
+
+# session.info 中记录本事务有写入、提交后需增加版本号的模型名
+_PENDING_KEY = 'entity_versions_pending'
+
+
+def model_names():
+    """需要维护版本号的模型名"""
+    return sorted({mapper.class_.__name__ for mapper in db.Model.registry.mappers} - EXCLUDED_MODELS)
+
+
+class EntityVersions:
+    """模型版本号: 模型有写入的事务提交后版本号 +1
+
+    flush 时只在 session.info 中记下写入的模型, 事务提交后(after_commit)再用独立的短事务执行一条 UPDATE;
+    版本号行不参与写入事务, 并发的写入事务不会因争抢同一行而串行或死锁, 回滚的事务不增加版本号。
+    数据先于版本号提交: 两者之间读到新数据的请求可能按旧版本号写入缓存, 版本号增加后该缓存即失效;
+    进程在两者之间退出时版本号不增加, 依赖它的缓存要到 ttl 过期后才更新。
+    读取时一次查出全部版本号, 进程内缓存 ENTITY_VERSION_TTL 秒, 同一请求内只读一次,
+    本进程提交写入后立即重新读取, 其他进程的写入最多延迟 ttl 秒可见。
+    """
+
+    def __init__(self):
+        self._reset_state()
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._loaded_at = None
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 重建锁并丢弃继承的版本号"""
+        self._reset_state()
+
+    def seed(self, initial=0):
+        """补齐缺少的版本号行(启动时调用), 返回新增的模型名
+
+        只在这里插入; 提交后只做 UPDATE, 不与其他进程争抢插入同一行。
+        """
+        table = EntityVersion.__table__
+        try:
+            with db.engine.begin() as conn:
+                existing = set(conn.execute(select(table.c.name)).scalars())
+                missing = [name for name in model_names() if name not in existing]
+                if missing:
+                    conn.execute(table.insert(), [{'name': name, 'version': initial} for name in missing])
+        except IntegrityError:
+            # 其他进程同时补齐
+            return []
+        return missing
+
+    def _load(self):
+        ttl = current_app.config.get('ENTITY_VERSION_TTL', 2)
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > ttl:
+            rows = db.session.execute(select(EntityVersion.name, EntityVersion.version)).all()
+            with self._lock:
+                self._versions = dict(rows)
+                self._loaded_at = now
+        return self._versions
+
+    def get(self, *names):
+        """各模型当前的版本号, 没有记录的模型为 0"""
+        versions = request_memo('EntityVersion', 'all', self._load)
+        return tuple(versions.get(name, 0) for name in names)
+
+    def key(self, *names):
+        """版本号组成的缓存键片段, 如 Article.12,Comment.5"""
+        return ','.join(f'{name}.{version}' for name, version in zip(names, self.get(*names)))
+
+    def bump(self, session, names):
+        """记下 session 当前事务写入的模型, 提交后各增加一次版本号"""
+        names = set(names) - EXCLUDED_MODELS
+        if names:
+            session.info.setdefault(_PENDING_KEY, set()).update(names)
+
+    def committed(self, names):
+        """本进程的写入已提交: 在独立的短事务中增加版本号, 下次读取时重新查询"""
+        table = EntityVersion.__table__
+        try:
+            with db.engine.begin() as conn:
+                result = conn.execute(
+                    update(table).where(table.c.name.in_(sorted(names))).values(version=table.c.version + 1))
+            if result.rowcount < len(names):
+                # 运行中新增的模型(如插件)没有版本号行, 补上后从 1 开始
+                self.seed(initial=1)
+        except Exception as e:
+            # 数据已提交, 不能因版本号失败而报错; 依赖的缓存按 ttl 过期
+            current_app.logger.error(f"Entity version bump error: {str(e)}")
+        with self._lock:
+            self._loaded_at = None
+        request_memo_clear('EntityVersion')
+
+    def stats(self):
+        with self._lock:
+            return dict(self._versions)
+
+
+entity_versions = EntityVersions()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_flushed_models(session, flush_context):
+    names = {type(obj).__name__ for obj in session.new | session.deleted}
+    names.update(type(obj).__name__ for obj in session.dirty if session.is_modified(obj))
+    entity_versions.bump(session, names)
+
+
+@event.listens_for(db.session, 'after_bulk_update')
+def _bump_bulk_updated(update_context):
+    columns = {getattr(column, 'key', column) for column in update_context.values}
+    if columns and columns <= COUNTER_COLUMNS:
+        return
+    entity_versions.bump(update_context.session, [update_context.mapper.class_.__name__])
+
+
+@event.listens_for(db.session, 'after_bulk_delete')
+def _bump_bulk_deleted(delete_context):
+    entity_versions.bump(delete_context.session, [delete_context.mapper.class_.__name__])
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    names = session.info.pop(_PENDING_KEY, None)
+    if names:
+        entity_versions.committed(names)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    """回滚时丢弃记下的模型, 版本号不变"""
+    session.info.pop(_PENDING_KEY, None)
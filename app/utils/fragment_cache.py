@@ -0,0 +1,76 @@
+import os
+
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.utils.cache_manager import cache_manager
+from app.utils.entity_versions import entity_versions
+
+# 缓存键前缀, 可用 cache_manager.delete('fragment:*') 清除全部片段
+KEY_PREFIX = 'fragment:'
+
+
+def template_location(name, filename):
+    """模板在模板目录下的相对路径(含主题目录, 如 default/index.html)
+
+    主题加载器按主题内的相对路径加载, 各主题的模板名相同, 只能按文件路径区分。
+    """
+    if not filename:
+        return name
+    marker = f'{os.sep}templates{os.sep}'
+    path = os.path.abspath(filename)
+    if marker in path:
+        return path.rsplit(marker, 1)[1].replace(os.sep, '/')
+    return path.replace(os.sep, '/')
+
+
+def _key_part(value):
+    if isinstance(value, (list, tuple)):
+        return ':'.join(map(str, value))
+    return str(value)
+
+
+def fragment_key(key, deps, location):
+    """片段缓存键: 模板位置 + 自定义键 + 依赖模型的版本号"""
+    if isinstance(deps, str):
+        deps = [deps]
+    versions = entity_versions.key(*deps) if deps else ''
+    return f'{KEY_PREFIX}{location}:{_key_part(key)}:{versions}'
+
+
+class FragmentCacheExtension(Extension):
+    """模板片段缓存: {% cache key, ttl, deps %}...{% endcache %}
+
+    - key: 字符串或列表, 片段内容随之变化的值都要放进来(如 ['nav', request.endpoint]);
+    - ttl: 过期秒数, 省略或为 none 时使用 FRAGMENT_CACHE_TTL;
+    - deps: 依赖的模型名(字符串或列表, 如 ['Article', 'Comment']), 这些模型有写入提交后缓存自动失效。
+
+    缓存键还包含模板文件路径(含主题目录)和行号, 不同主题、不同位置使用相同的 key 不会冲突。
+    片段内用 {% set %} 设置的变量不会带出片段。
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while len(args) < 3 and parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        while len(args) < 3:
+            args.append(nodes.Const(None))
+        args.append(nodes.Const(f'{template_location(parser.name, parser.filename)}:{lineno}'))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, deps, location, caller):
+        config = current_app.config
+        if not config.get('FRAGMENT_CACHE_ENABLED', True):
+            return caller()
+        cache_key = fragment_key(key, deps, location)
+        cached = cache_manager.get(cache_key)
+        if cached is not None:
+            return Markup(cached)
+        rendered = caller()
+        cache_manager.set(cache_key, str(rendered), ttl or config.get('FRAGMENT_CACHE_TTL', 300))
+        return rendered
@@ -0,0 +1,224 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+# 生成衍生图的格式(原图格式为 GIF 动图、SVG 等时跳过)
+DERIVABLE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'bmp'}
+
+_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_SRC_RE = re.compile(r'\ssrc\s*=\s*(["\'])(.*?)\1', re.IGNORECASE | re.DOTALL)
+_SRCSET_ATTR_RE = re.compile(r'\s(?:srcset|sizes)\s*=\s*(["\']).*?\1', re.IGNORECASE | re.DOTALL)
+# 编辑器可能把地址转成 ../static/uploads/... 或带域名的绝对地址
+_UPLOAD_PATH_RE = re.compile(r'(?:^|/)(static/uploads/[^?#]+)')
+
+
+def render_derivatives(source_path, widths, quality):
+    """在进程池子进程中执行: 生成缩小版和 WebP 版, 与原图放在同一目录
+
+    对每个小于原图宽度的 width 生成 <原名>-<width>w.webp, 另生成原尺寸的 <原名>.webp;
+    原图本身是 WebP 时不重新编码原尺寸版本(会覆盖原图), 直接把原图记为原尺寸版本(original 为 True)。
+
+    Returns:
+        list: [{'width', 'height', 'format', 'name', 'size'}], 按宽度升序
+    """
+    from PIL import Image, ImageOps
+
+    stem, ext = os.path.splitext(source_path)
+    source_is_webp = ext.lower() == '.webp'
+    variants = []
+    with Image.open(source_path) as image:
+        if getattr(image, 'is_animated', False):
+            return variants
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        targets = [(width, f'{stem}-{width}w.webp') for width in sorted(set(widths)) if width < image.width]
+        if not source_is_webp:
+            targets.append((image.width, f'{stem}.webp'))
+        for width, path in targets:
+            if width == image.width:
+                resized = image
+            else:
+                resized = image.resize((width, max(1, round(image.height * width / image.width))),
+                                       Image.Resampling.LANCZOS)
+            temp_path = f'{path}.part'
+            resized.save(temp_path, 'WEBP', quality=quality, method=4)
+            os.replace(temp_path, path)
+            variants.append({
+                'width': resized.width,
+                'height': resized.height,
+                'format': 'webp',
+                'name': os.path.basename(path),
+                'size': os.path.getsize(path),
+            })
+        if source_is_webp:
+            variants.append({
+                'width': image.width,
+                'height': image.height,
+                'format': 'webp',
+                'name': os.path.basename(source_path),
+                'size': os.path.getsize(source_path),
+                'original': True,
+            })
+    return variants
+
+
+class DerivativePool:
+    """衍生图生成进程池
+
+    缩放和编码是 CPU 密集操作, 放到独立进程中执行, 不占用请求线程和 GIL;
+    进程数由 IMAGE_DERIVATIVE_WORKERS 限制, 首次使用时创建, 为 0 时在调用线程中直接执行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 继承的进程池属于父进程, 直接丢弃"""
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self, workers):
+        with self._lock:
+            if self._executor is None:
+                # spawn 启动, 避免子进程继承本进程的线程和连接
+                self._executor = ProcessPoolExecutor(max_workers=workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def run(self, source_path):
+        config = current_app.config
+        args = (source_path, config.get('IMAGE_DERIVATIVE_WIDTHS', [480, 960, 1440]),
+                config.get('IMAGE_DERIVATIVE_QUALITY', 80))
+        workers = config.get('IMAGE_DERIVATIVE_WORKERS', 2)
+        if workers <= 0:
+            return render_derivatives(*args)
+        try:
+            return self._get_executor(workers).submit(render_derivatives, *args).result()
+        except BrokenProcessPool:
+            # 子进程异常退出后进程池不可再用, 丢弃后由任务重试
+            self.shutdown(wait=False)
+            raise
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+derivative_pool = DerivativePool()
+
+
+def _absolute_path(file_path):
+    return os.path.join(current_app.root_path, file_path.lstrip('/'))
+
+
+def variant_paths(file):
+    """衍生图的 URL 和绝对路径(不含记为原尺寸版本的原图)"""
+    base = file.file_path.rsplit('/', 1)[0]
+    return [(f"{base}/{variant['name']}", _absolute_path(f"{base}/{variant['name']}"))
+            for variant in file.variants or [] if not variant.get('original')]
+
+
+def generate_derivatives(file_id):
+    """任务队列执行: 生成上传图片的衍生图并记录到 File.variants"""
+    from app import db
+    from app.models import File
+
+    file = File.query.get(file_id)
+    if file is None:
+        return True, '文件已删除'
+    ext = file.file_path.rsplit('.', 1)[-1].lower()
+    if ext not in DERIVABLE_EXTENSIONS:
+        return True, f'{ext} 不生成衍生图'
+    source = _absolute_path(file.file_path)
+    if not os.path.exists(source):
+        return False, f'原文件不存在: {file.file_path}'
+
+    file.variants = derivative_pool.run(source)
+    db.session.commit()
+    # 编辑器中上传后通常在衍生图生成之前就保存了文章, 此时补上 srcset
+    rewritten = rewrite_articles_using(file.file_path, file.upload_time)
+    return True, f'{file.file_path} 生成 {len(file.variants)} 个衍生图, 更新 {rewritten} 篇文章'
+
+
+def rewrite_articles_using(file_path, since=None):
+    """给引用了 file_path 的文章补上 srcset, 返回更新的文章数
+
+    正文可能压缩存放在 article_bodies 中, 无法用 LIKE 查找; 引用上传文件的文章一定在上传之后保存过,
+    按 updated_at(有索引)筛选出候选文章后逐篇检查。
+    """
+    from app import db
+    from app.models import Article
+
+    query = Article.query
+    if since is not None:
+        query = query.filter(Article.updated_at >= since)
+    changed = 0
+    for article in query.order_by(Article.id).all():
+        content = article.content
+        if file_path not in content:
+            continue
+        rewritten = add_image_srcset(content)
+        if rewritten != content:
+            article.content = rewritten
+            changed += 1
+    if changed:
+        db.session.commit()
+    return changed
+
+
+def build_srcset(file):
+    """按 File.variants 生成 srcset 属性值, 无衍生图时返回 None"""
+    if not file.variants:
+        return None
+    base = file.file_path.rsplit('/', 1)[0]
+    return ', '.join(f"{base}/{variant['name']} {variant['width']}w" for variant in file.variants)
+
+
+def _upload_path(tag):
+    """<img> 引用的本站上传文件路径(/static/uploads/...), 不是上传文件时返回 None"""
+    src = _SRC_RE.search(tag)
+    match = _UPLOAD_PATH_RE.search(src.group(2)) if src else None
+    return f'/{match.group(1)}' if match else None
+
+
+def add_image_srcset(html):
+    """给正文中引用本站上传图片的 <img> 加上 srcset/sizes(保存正文时调用)
+
+    已有 srcset 的按当前衍生图重写; 衍生图尚未生成的图片保持原样,
+    可在生成后执行 flask images rewrite 补上。
+    """
+    if not html or '<img' not in html.lower():
+        return html
+    sources = {path: None for path in map(_upload_path, _IMG_TAG_RE.findall(html)) if path}
+    if not sources:
+        return html
+
+    from app import db
+    from app.models import File
+
+    # 在属性赋值中查询, 不触发 autoflush 写入未完成的对象
+    with db.session.no_autoflush:
+        for file in File.query.filter(File.file_path.in_(list(sources))).all():
+            sources[file.file_path] = build_srcset(file)
+    sizes = current_app.config.get('IMAGE_SRCSET_SIZES', '(max-width: 768px) 100vw, 768px')
+
+    def rewrite(match):
+        tag = match.group(0)
+        srcset = sources.get(_upload_path(tag))
+        if not srcset:
+            return tag
+        tag = _SRCSET_ATTR_RE.sub('', tag)
+        end = -2 if tag.endswith('/>') else -1
+        return f'{tag[:end].rstrip()} srcset="{srcset}" sizes="{sizes}"{tag[end:]}'
+
+    return _IMG_TAG_RE.sub(rewrite, html)
@@ -0,0 +1,72 @@
+from flask import current_app, has_app_context
+from sqlalchemy.orm import joinedload, selectinload, raiseload, defer
+
+from app.models import Article
+
+
+def _defer_content():
+    """列表不读取内联正文, 摘要使用保存时计算的 excerpt; 严格模式下访问正文直接报错"""
+    return defer(Article.inline_content, raiseload=is_strict_loading())
+
+
+def _card():
+    """列表卡片: 作者/主分类为多对一直接 JOIN, 集合关系用 selectin 避免分页行膨胀"""
+    return [
+        _defer_content(),
+        joinedload(Article.author),
+        joinedload(Article.category),
+        selectinload(Article.tags),
+        selectinload(Article.categories),
+    ]
+
+
+def _detail():
+    """文章详情页: 与卡片相同的关联加正文表(窄表模式), 评论由 CommentService 单独分页读取"""
+    return [
+        joinedload(Article.author),
+        joinedload(Article.category),
+        joinedload(Article.body),
+        selectinload(Article.tags),
+        selectinload(Article.categories),
+    ]
+
+
+def _api():
+    """接口/插件输出: 只需要作者、主分类名和标签名, 正文按需单独读取"""
+    return [
+        _defer_content(),
+        joinedload(Article.author),
+        joinedload(Article.category),
+        selectinload(Article.tags),
+    ]
+
+
+# 加载方案注册表: 名称 -> 返回 loader option 列表的函数
+LOADING_PROFILES = {
+    'card': _card,
+    'detail': _detail,
+    'api': _api,
+}
+
+
+def register_profile(name, factory):
+    """注册(或覆盖)加载方案, 供插件使用"""
+    LOADING_PROFILES[name] = factory
+
+
+def is_strict_loading():
+    """严格模式: 方案外的关系一律 raiseload, 模板触发计划外懒加载时直接报错"""
+    return has_app_context() and current_app.config.get('STRICT_LOADING', False)
+
+
+def profile_options(name):
+    """获取加载方案对应的 loader options"""
+    options = list(LOADING_PROFILES[name]())
+    if is_strict_loading():
+        options.append(raiseload('*'))
+    return options
+
+
+def with_profile(query, name):
+    """为 Article 查询应用加载方案"""
+    return query.options(*profile_options(name))
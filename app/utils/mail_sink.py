@@ -0,0 +1,140 @@
+import os
+import socket
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from email.header import decode_header, make_header
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """最简 SMTP 会话: 支持 EHLO/HELO、AUTH PLAIN(任意口令)、MAIL、RCPT、DATA、RSET、NOOP、QUIT"""
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        sink = self.server.sink
+        with sink._lock:
+            sink.sessions += 1
+            sink._connections.add(self.connection)
+        try:
+            self._session(sink)
+        finally:
+            with sink._lock:
+                sink._connections.discard(self.connection)
+
+    def _session(self, sink):
+        sender, recipients = None, []
+        self._reply('220 ppress-mail-sink ESMTP')
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                if command == 'EHLO':
+                    self._reply('250-ppress-mail-sink')
+                    self._reply('250-8BITMIME')
+                    self._reply('250 AUTH PLAIN')
+                else:
+                    self._reply('250 ppress-mail-sink')
+            elif command == 'AUTH':
+                self._reply('235 2.7.0 Authentication successful')
+            elif command == 'MAIL':
+                sender, recipients = line.split(':', 1)[1].strip(), []
+                self._reply('250 OK')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[1].strip())
+                self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                sink.store(sender, recipients, b''.join(lines))
+                sender, recipients = None, []
+                self._reply('250 OK: queued')
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self._reply('250 OK')
+            elif command == 'NOOP':
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class MailSink:
+    """本地调试用 SMTP 服务器, 收到的邮件写成 .eml 文件而不投递
+
+    配合 MAIL_HOST/MAIL_PORT 指向它, MAIL_USE_TLS=0 使用。
+    """
+
+    def __init__(self, host='127.0.0.1', port=1025, output_dir=None, on_message=None):
+        self.output_dir = output_dir
+        self.on_message = on_message
+        self.messages = []
+        self.sessions = 0
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _SinkHandler)
+        self._server.sink = self
+        self._thread = None
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def store(self, sender, recipients, data):
+        message = message_from_bytes(data)
+        item = {
+            'sender': sender,
+            'recipients': recipients,
+            'subject': str(make_header(decode_header(message.get('Subject', '')))),
+            'data': data,
+        }
+        with self._lock:
+            self.messages.append(item)
+            count = len(self.messages)
+        if self.output_dir:
+            path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{count}.eml")
+            with open(path, 'wb') as f:
+                f.write(data)
+            item['path'] = path
+        if self.on_message:
+            self.on_message(item)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """在后台线程运行"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mail-sink', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止监听并断开已有会话"""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
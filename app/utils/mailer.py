@@ -0,0 +1,193 @@
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+
+from flask import current_app
+
+# 发送方式: smtp 为真实发送, console 只写日志(开发调试)
+BACKEND_SMTP = 'smtp'
+BACKEND_CONSOLE = 'console'
+
+# 连接类错误: 重连后重试; 其他 SMTP 错误(如收件人被拒)重试无意义, 直接丢弃该封
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError,
+                      smtplib.SMTPAuthenticationError, OSError)
+
+
+def build_message(to, subject, body, subtype='plain'):
+    """邮件内容(可 JSON 序列化, 作为队列任务参数)"""
+    return {'to': to, 'subject': subject, 'body': body, 'subtype': subtype}
+
+
+class RateLimiter:
+    """令牌桶限速, rate 为每分钟允许的数量"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = None
+        self._updated = time.monotonic()
+
+    def acquire(self, rate):
+        if not rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._tokens is None:
+                    self._tokens = float(rate)
+                self._tokens = min(float(rate), self._tokens + (now - self._updated) * rate / 60)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * 60 / rate
+            time.sleep(wait)
+
+
+class Mailer:
+    """邮件发送器
+
+    send / send_many 只把邮件写入后台任务队列, 请求立即返回; 任务 worker 中每个进程
+    复用一个已登录的 SMTP 会话连续发送(空闲超过 MAIL_IDLE_TIMEOUT 秒后重建),
+    按 MAIL_RATE_LIMIT 限速。连接失败时未发出的邮件按 MAIL_RETRY_DELAY 指数退避重新入队,
+    MAIL_MAX_RETRIES 次后转入任务队列的失败列表。
+    """
+
+    def __init__(self):
+        self._reset_state()
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._smtp = None
+        self._last_used = 0
+        self._limiter = RateLimiter()
+        self._counters = {'sent': 0, 'rejected': 0, 'connections': 0}
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 继承的 SMTP 连接属于父进程, 直接丢弃"""
+        self._reset_state()
+
+    # ---- 入队 ----
+
+    def send(self, to, subject, body, subtype='plain'):
+        """异步发送一封邮件, 返回任务 ID"""
+        return self.send_many([build_message(to, subject, body, subtype)])[0]
+
+    def send_many(self, messages):
+        """异步批量发送, 每 MAIL_BATCH_SIZE 封一个任务(同一会话内连续发送)
+
+        Returns:
+            list: 各批次的任务 ID
+        """
+        from app.utils.task_queue import task_queue
+
+        size = max(current_app.config.get('MAIL_BATCH_SIZE', 50), 1)
+        # 重试由 deliver_mail 按未发出的邮件重新入队, 避免整批重发
+        return [
+            task_queue.submit(deliver_mail, (messages[start:start + size],), max_retries=0)
+            for start in range(0, len(messages), size)
+        ]
+
+    # ---- 发送 ----
+
+    def _mime(self, message, config):
+        mime = MIMEText(message['body'], message.get('subtype', 'plain'), 'utf-8')
+        mime['Subject'] = message['subject']
+        mime['From'] = config.get('MAIL_SENDER') or config.get('MAIL_USERNAME')
+        mime['To'] = message['to']
+        mime['Date'] = formatdate(localtime=True)
+        mime['Message-ID'] = make_msgid()
+        return mime
+
+    def _connection(self, config):
+        if self._smtp is not None and time.monotonic() - self._last_used > config.get('MAIL_IDLE_TIMEOUT', 60):
+            self._close()
+        if self._smtp is None:
+            smtp = smtplib.SMTP(config['MAIL_HOST'], config['MAIL_PORT'], timeout=config.get('MAIL_TIMEOUT', 10))
+            try:
+                if config.get('MAIL_USE_TLS'):
+                    smtp.starttls()
+                if config.get('MAIL_USERNAME') and config.get('MAIL_PASSWORD'):
+                    smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self._counters['connections'] += 1
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _send_one(self, mime, config):
+        """发送一封, 连接失效时重连一次"""
+        for attempt in (1, 2):
+            try:
+                self._connection(config).send_message(mime)
+                self._last_used = time.monotonic()
+                return
+            except _CONNECTION_ERRORS:
+                self._close()
+                if attempt == 2:
+                    raise
+
+    def deliver(self, messages):
+        """在当前进程同步发送
+
+        Returns:
+            tuple: (已处理数量, 未发出的邮件, 错误信息); 未发出的邮件只在连接类错误时出现
+        """
+        config = current_app.config
+        if config.get('MAIL_BACKEND') == BACKEND_CONSOLE:
+            for message in messages:
+                current_app.logger.info(f"[mail] To: {message['to']} Subject: {message['subject']}\n{message['body']}")
+            return len(messages), [], None
+
+        rate = config.get('MAIL_RATE_LIMIT', 0)
+        with self._lock:
+            for index, message in enumerate(messages):
+                self._limiter.acquire(rate)
+                try:
+                    self._send_one(self._mime(message, config), config)
+                    self._counters['sent'] += 1
+                except _CONNECTION_ERRORS as e:
+                    current_app.logger.error(f"Send mail error: {str(e)}")
+                    return index, messages[index:], str(e)
+                except smtplib.SMTPException as e:
+                    # 收件人被拒、内容被拒等: 重试无意义
+                    self._counters['rejected'] += 1
+                    current_app.logger.error(f"Mail to {message['to']} rejected: {str(e)}")
+        return len(messages), [], None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, connected=self._smtp is not None)
+
+
+mailer = Mailer()
+
+
+def deliver_mail(messages, attempt=1):
+    """任务队列执行的发送任务: 未发出的部分按指数退避重新入队"""
+    from app.utils.task_queue import task_queue
+
+    sent, remaining, error = mailer.deliver(messages)
+    if not remaining:
+        return True, f'已发送 {sent} 封'
+
+    config = current_app.config
+    if attempt > config.get('MAIL_MAX_RETRIES', 3):
+        return False, f'{len(remaining)} 封邮件发送失败: {error}'
+    delay = config.get('MAIL_RETRY_DELAY', 30) * 2 ** (attempt - 1)
+    task_queue.submit(deliver_mail, (remaining, attempt + 1), max_retries=0, delay=delay)
+    return True, f'已发送 {sent} 封, {len(remaining)} 封 {delay} 秒后重试: {error}'
@@ -0,0 +1,408 @@
+import hmac
+import time
+from threading import Lock
+
+from flask import Response, abort, current_app, g, request, template_rendered, before_render_template
+
+# WSGI environ 中由中间件放入、Flask 请求钩子回填(端点、数据库/渲染耗时)的字典;
+# 下游中间件可能浅拷贝 environ, 因此回填到同一个字典而不是直接写 environ
+ENV_KEY = 'ppress.metrics'
+
+# 请求耗时直方图的桶(秒)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 未匹配到路由(404、静态资源以外的 WSGI 请求等)时使用的端点标签
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+# 未配置 METRICS_TOKEN 时允许访问 /metrics 的地址
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def _escape(value):
+    """Prometheus 标签值转义"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class Histogram:
+    """累积桶直方图"""
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """进程内请求指标
+
+    数据只保存在当前进程, 多 worker 部署时每个进程分别导出,
+    由 Prometheus 按实例抓取后聚合。
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._durations = {}        # {endpoint: Histogram}
+            self._requests = {}         # {(endpoint, method, status): count}
+            self._response_bytes = {}   # {endpoint: bytes}
+            self._db_time = {}          # {endpoint: seconds}
+            self._render_time = {}      # {endpoint: seconds}
+            self._context_time = {}     # {上下文处理器/惰性值: [次数, seconds]}
+            self.in_flight = 0
+            self.socketio_connections = 0
+            self.started_at = time.time()
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 重建锁并清空从主进程继承的计数"""
+        self._lock = Lock()
+        self.reset()
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, endpoint, method, status, duration, response_bytes, db_time, render_time):
+        with self._lock:
+            self.in_flight -= 1
+            histogram = self._durations.get(endpoint)
+            if histogram is None:
+                histogram = self._durations[endpoint] = Histogram()
+            histogram.observe(duration)
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._response_bytes[endpoint] = self._response_bytes.get(endpoint, 0) + response_bytes
+            self._db_time[endpoint] = self._db_time.get(endpoint, 0.0) + db_time
+            self._render_time[endpoint] = self._render_time.get(endpoint, 0.0) + render_time
+
+    def context_observed(self, name, duration):
+        """记录一次上下文处理器调用或惰性上下文值计算的耗时"""
+        with self._lock:
+            entry = self._context_time.get(name)
+            if entry is None:
+                entry = self._context_time[name] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += duration
+
+    def socketio_connected(self):
+        with self._lock:
+            self.socketio_connections += 1
+
+    def socketio_disconnected(self):
+        with self._lock:
+            self.socketio_connections = max(self.socketio_connections - 1, 0)
+
+    # ---- 导出 ----
+
+    def _http_lines(self):
+        lines = []
+        with self._lock:
+            durations = {key: (list(h.counts), h.total, h.count) for key, h in self._durations.items()}
+            requests = dict(self._requests)
+            response_bytes = dict(self._response_bytes)
+            db_time = dict(self._db_time)
+            render_time = dict(self._render_time)
+            context_time = {name: tuple(entry) for name, entry in self._context_time.items()}
+            in_flight = self.in_flight
+            socketio_connections = self.socketio_connections
+
+        lines.append('# HELP ppress_http_requests_total HTTP 请求数')
+        lines.append('# TYPE ppress_http_requests_total counter')
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(f'ppress_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+        lines.append('# HELP ppress_http_request_duration_seconds HTTP 请求耗时')
+        lines.append('# TYPE ppress_http_request_duration_seconds histogram')
+        for endpoint, (counts, total, count) in sorted(durations.items()):
+            for bound, bucket_count in zip(DURATION_BUCKETS, counts):
+                lines.append(f'ppress_http_request_duration_seconds_bucket'
+                             f'{_labels(endpoint=endpoint, le=bound)} {bucket_count}')
+            lines.append(f'ppress_http_request_duration_seconds_bucket{_labels(endpoint=endpoint, le="+Inf")} {count}')
+            lines.append(f'ppress_http_request_duration_seconds_sum{_labels(endpoint=endpoint)} {total:.6f}')
+            lines.append(f'ppress_http_request_duration_seconds_count{_labels(endpoint=endpoint)} {count}')
+
+        lines.append('# HELP ppress_http_requests_in_flight 正在处理的请求数')
+        lines.append('# TYPE ppress_http_requests_in_flight gauge')
+        lines.append(f'ppress_http_requests_in_flight {in_flight}')
+
+        lines.append('# HELP ppress_http_response_bytes_total 响应体字节数')
+        lines.append('# TYPE ppress_http_response_bytes_total counter')
+        for endpoint, value in sorted(response_bytes.items()):
+            lines.append(f'ppress_http_response_bytes_total{_labels(endpoint=endpoint)} {value}')
+
+        lines.append('# HELP ppress_http_db_seconds_total 请求内数据库耗时')
+        lines.append('# TYPE ppress_http_db_seconds_total counter')
+        for endpoint, value in sorted(db_time.items()):
+            lines.append(f'ppress_http_db_seconds_total{_labels(endpoint=endpoint)} {value:.6f}')
+
+        lines.append('# HELP ppress_http_render_seconds_total 请求内模板渲染耗时(不含渲染期间的数据库耗时)')
+        lines.append('# TYPE ppress_http_render_seconds_total counter')
+        for endpoint, value in sorted(render_time.items()):
+            lines.append(f'ppress_http_render_seconds_total{_labels(endpoint=endpoint)} {value:.6f}')
+
+        lines.append('# HELP ppress_template_context_calls_total 模板上下文处理器调用和惰性值计算次数')
+        lines.append('# TYPE ppress_template_context_calls_total counter')
+        for name, (calls, _) in sorted(context_time.items()):
+            lines.append(f'ppress_template_context_calls_total{_labels(processor=name)} {calls}')
+
+        lines.append('# HELP ppress_template_context_seconds_total 模板上下文处理器和惰性值耗时(含其中的数据库耗时)')
+        lines.append('# TYPE ppress_template_context_seconds_total counter')
+        for name, (_, seconds) in sorted(context_time.items()):
+            lines.append(f'ppress_template_context_seconds_total{_labels(processor=name)} {seconds:.6f}')
+
+        lines.append('# HELP ppress_socketio_connections 当前 Socket.IO 连接数')
+        lines.append('# TYPE ppress_socketio_connections gauge')
+        lines.append(f'ppress_socketio_connections {socketio_connections}')
+        return lines
+
+    @staticmethod
+    def _cache_lines():
+        from app.utils.cache_manager import cache_manager
+
+        stats = cache_manager.stats
+        return [
+            '# HELP ppress_cache_entries 内存缓存条目数',
+            '# TYPE ppress_cache_entries gauge',
+            f"ppress_cache_entries {stats['size']}",
+            '# HELP ppress_cache_max_entries 内存缓存容量',
+            '# TYPE ppress_cache_max_entries gauge',
+            f"ppress_cache_max_entries {stats['max_size']}",
+            '# HELP ppress_cache_hits_total 缓存命中次数',
+            '# TYPE ppress_cache_hits_total counter',
+            f"ppress_cache_hits_total {stats['hits']}",
+            '# HELP ppress_cache_misses_total 缓存未命中次数',
+            '# TYPE ppress_cache_misses_total counter',
+            f"ppress_cache_misses_total {stats['misses']}",
+        ]
+
+    @staticmethod
+    def _compression_lines():
+        from app.utils.compression import compression_stats
+
+        stats = compression_stats.stats()
+        return [
+            '# HELP ppress_compression_responses_total 压缩的响应数(skipped 为压缩后不变小而原样返回)',
+            '# TYPE ppress_compression_responses_total counter',
+            f"ppress_compression_responses_total{_labels(result='compressed')} {stats['compressed']}",
+            f"ppress_compression_responses_total{_labels(result='skipped')} {stats['skipped']}",
+            '# HELP ppress_compression_cache_hits_total 压缩结果缓存命中次数',
+            '# TYPE ppress_compression_cache_hits_total counter',
+            f"ppress_compression_cache_hits_total {stats['hits']}",
+            '# HELP ppress_compression_cache_misses_total 压缩结果缓存未命中次数',
+            '# TYPE ppress_compression_cache_misses_total counter',
+            f"ppress_compression_cache_misses_total {stats['misses']}",
+        ]
+
+    @staticmethod
+    def _scheduler_lines():
+        from app.utils.scheduler import scheduler
+
+        snapshot = scheduler.metrics_snapshot()
+        lines = [
+            '# HELP ppress_scheduler_leader 本进程是否为定时任务 leader',
+            '# TYPE ppress_scheduler_leader gauge',
+            f"ppress_scheduler_leader {1 if snapshot['leader'] else 0}",
+            '# HELP ppress_scheduler_jobs 已注册任务数',
+            '# TYPE ppress_scheduler_jobs gauge',
+            f"ppress_scheduler_jobs {len(snapshot['jobs'])}",
+            '# HELP ppress_scheduler_job_running 运行中的任务实例数',
+            '# TYPE ppress_scheduler_job_running gauge',
+        ]
+        for name in snapshot['jobs']:
+            lines.append(f"ppress_scheduler_job_running{_labels(job=name)} {snapshot['running'].get(name, 0)}")
+        lines.extend([
+            '# HELP ppress_scheduler_job_runs_total 任务执行次数(按结果)',
+            '# TYPE ppress_scheduler_job_runs_total counter',
+        ])
+        for name, stats in sorted(snapshot['stats'].items()):
+            for status, count in sorted(stats['runs'].items()):
+                lines.append(f'ppress_scheduler_job_runs_total{_labels(job=name, status=status)} {count}')
+        lines.extend([
+            '# HELP ppress_scheduler_job_last_duration_seconds 上次执行耗时',
+            '# TYPE ppress_scheduler_job_last_duration_seconds gauge',
+        ])
+        for name, stats in sorted(snapshot['stats'].items()):
+            if stats['last_duration'] is not None:
+                lines.append(f"ppress_scheduler_job_last_duration_seconds{_labels(job=name)} {stats['last_duration']:.6f}")
+        lines.extend([
+            '# HELP ppress_scheduler_job_last_run_timestamp_seconds 上次执行时间',
+            '# TYPE ppress_scheduler_job_last_run_timestamp_seconds gauge',
+        ])
+        for name, stats in sorted(snapshot['stats'].items()):
+            if stats['last_run'] is not None:
+                lines.append(f"ppress_scheduler_job_last_run_timestamp_seconds{_labels(job=name)} "
+                             f"{stats['last_run'].timestamp():.0f}")
+        return lines
+
+    @staticmethod
+    def _task_queue_lines():
+        from app.utils.task_queue import task_queue
+
+        stats = task_queue.stats()
+        lines = [
+            '# HELP ppress_task_queue_depth 队列中的任务数(按状态)',
+            '# TYPE ppress_task_queue_depth gauge',
+        ]
+        for state in ('ready', 'delayed', 'running', 'dead'):
+            lines.append(f'ppress_task_queue_depth{_labels(state=state)} {stats[state]}')
+        lines.extend([
+            '# HELP ppress_task_queue_oldest_wait_seconds 最早的待执行任务已等待时间',
+            '# TYPE ppress_task_queue_oldest_wait_seconds gauge',
+            f"ppress_task_queue_oldest_wait_seconds {stats['oldest_wait']:.3f}",
+            '# HELP ppress_task_queue_tasks_total 本进程执行的任务数(按结果)',
+            '# TYPE ppress_task_queue_tasks_total counter',
+        ])
+        for result in ('succeeded', 'retried', 'failed'):
+            lines.append(f'ppress_task_queue_tasks_total{_labels(result=result)} {stats[result]}')
+        return lines
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = [
+            '# HELP ppress_process_start_time_seconds 指标起始时间',
+            '# TYPE ppress_process_start_time_seconds gauge',
+            f'ppress_process_start_time_seconds {self.started_at:.3f}',
+        ]
+        lines.extend(self._http_lines())
+        for collector in (self._cache_lines, self._compression_lines, self._scheduler_lines, self._task_queue_lines):
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                current_app.logger.error(f"Collect metrics error: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+class _ResponseIterable:
+    """包装响应体, 统计字节数并在 close 时记录指标"""
+
+    def __init__(self, iterable, on_close):
+        self._iterable = iterable
+        self._on_close = on_close
+        self.bytes = 0
+
+    def __iter__(self):
+        for chunk in self._iterable:
+            self.bytes += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+        finally:
+            self._on_close(self.bytes)
+
+
+class MetricsMiddleware:
+    """记录请求耗时、状态码、并发数和响应大小的 WSGI 中间件
+
+    端点名、数据库耗时和渲染耗时由 Flask 请求钩子写入 environ[ENV_KEY]。
+    """
+
+    def __init__(self, wsgi_app, registry=metrics):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        status_holder = {}
+        info = environ[ENV_KEY] = {}
+
+        def _start_response(status, headers, exc_info=None):
+            status_holder['status'] = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        def _finish(response_bytes):
+            self.registry.request_finished(
+                info.get('endpoint') or UNMATCHED_ENDPOINT,
+                environ.get('REQUEST_METHOD', 'GET'),
+                status_holder.get('status', '500'),
+                time.perf_counter() - started,
+                response_bytes,
+                info.get('db_time', 0.0),
+                info.get('render_time', 0.0)
+            )
+
+        self.registry.request_started()
+        try:
+            iterable = self.wsgi_app(environ, _start_response)
+        except Exception:
+            status_holder.setdefault('status', '500')
+            _finish(0)
+            raise
+        return _ResponseIterable(iterable, _finish)
+
+
+# ---- Flask 侧: 端点、渲染耗时 ----
+
+def _record_endpoint(response):
+    info = request.environ.get(ENV_KEY)
+    if info is not None:
+        info['endpoint'] = request.endpoint or UNMATCHED_ENDPOINT
+        info['render_time'] = g.get('_metrics_render_time', 0.0)
+    return response
+
+
+def _template_started(sender, template, context, **extra):
+    from app.utils.sql_monitor import sql_monitor
+
+    stack = g.setdefault('_metrics_render_stack', [])
+    stats = sql_monitor.current_request_stats()
+    stack.append((time.perf_counter(), stats.total_time if stats else 0.0))
+
+
+def _template_finished(sender, template, context, **extra):
+    from app.utils.sql_monitor import sql_monitor
+
+    stack = g.get('_metrics_render_stack')
+    if not stack:
+        return
+    started, db_before = stack.pop()
+    if stack:
+        # 嵌套渲染只统计最外层
+        return
+    stats = sql_monitor.current_request_stats()
+    db_during = (stats.total_time if stats else 0.0) - db_before
+    elapsed = time.perf_counter() - started - db_during
+    g._metrics_render_time = g.get('_metrics_render_time', 0.0) + max(elapsed, 0.0)
+
+
+def _metrics_view():
+    """未配置 METRICS_TOKEN 时只允许本机访问, 配置后需带 Authorization: Bearer <token>"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(403)
+    elif request.remote_addr not in LOCAL_ADDRESSES:
+        abort(403)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_metrics(app):
+    """安装指标中间件并注册 /metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app)
+    app.after_request(_record_endpoint)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    app.add_url_rule('/metrics', 'metrics', _metrics_view)
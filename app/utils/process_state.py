@@ -0,0 +1,81 @@
+import os
+
+from app.extensions import db
+
+
+def reset_process_state():
+    """重置模块级单例中的进程内状态
+
+    preload 模式下应用在主进程创建后 fork 出 worker, 子进程会继承主进程的锁、
+    缓存(可能含绑定主进程会话的 ORM 对象)、连接和线程状态, 在 fork 后逐一重置。
+    """
+    from app.utils.article_neighbors import article_neighbors
+    from app.utils.article_url import ArticleUrlGenerator
+    from app.utils.cache_manager import cache_manager
+    from app.utils.compression import compression_stats
+    from app.utils.entity_versions import entity_versions
+    from app.utils.id_encoder import IdEncoder
+    from app.utils.image_derivatives import derivative_pool
+    from app.utils.mailer import mailer
+    from app.utils.metrics import metrics
+    from app.utils.profiler import request_profiler
+    from app.utils.redis_client import reset_redis_client
+    from app.utils.route_manager import RouteManager
+    from app.utils.scheduler import scheduler
+    from app.utils.sql_monitor import sql_monitor
+    from app.utils.task_queue import task_queue
+
+    cache_manager.reset_after_fork()
+    compression_stats.reset_after_fork()
+    IdEncoder.clear_cache()
+    ArticleUrlGenerator.clear_cache()
+    RouteManager.reset_after_fork()
+    reset_redis_client()
+    metrics.reset_after_fork()
+    sql_monitor.reset_after_fork()
+    request_profiler.reset_after_fork()
+    scheduler.reset_after_fork()
+    task_queue.reset_after_fork()
+    mailer.reset_after_fork()
+    derivative_pool.reset_after_fork()
+    entity_versions.reset_after_fork()
+    article_neighbors.reset_after_fork()
+
+
+def dispose_engines(app, close=True):
+    """释放数据库连接池
+
+    Args:
+        close: 主进程中为 True(正常关闭连接); 子进程中为 False,
+               只丢弃继承的连接而不关闭, 避免影响仍在使用同一 socket 的其他进程
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+
+def start_background_tasks(app):
+    """在服务进程中启动后台任务(定时任务调度器、任务队列 worker 线程)
+
+    只由服务入口调用: run.py 直接运行时和 gunicorn 的 post_fork 钩子, create_app 不会启动。
+    每个 worker 都运行调度线程, 由调度器自身选出 leader 执行定时任务,
+    leader 所在 worker 退出后其他 worker 接手, 见 app/utils/scheduler.py;
+    队列任务由各 worker 的线程竞争领取, 见 app/utils/task_queue.py。
+
+    Returns:
+        bool: 本进程是否启动了后台任务
+    """
+    from app.utils.scheduler import start_scheduler
+    from app.utils.task_queue import task_queue
+
+    started = start_scheduler(app)
+    task_queue.start(app)
+    return started or task_queue.running
+
+
+def init_worker_process(app):
+    """worker 进程 fork 后的初始化(gunicorn post_fork 钩子调用)"""
+    reset_process_state()
+    dispose_engines(app, close=False)
+    if start_background_tasks(app):
+        app.logger.info(f"后台任务在 worker {os.getpid()} 中启动")
@@ -0,0 +1,368 @@
+import atexit
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, request
+
+# 采样模式: sampler 为后台线程定时抓取请求线程调用栈(开销低), cprofile 为确定性分析
+MODE_SAMPLER = 'sampler'
+MODE_CPROFILE = 'cprofile'
+
+DEFAULT_SETTINGS = {
+    'enabled': False,
+    'mode': MODE_SAMPLER,
+    'sample_rate': 0.01,     # 被分析的请求比例
+    'endpoint': '',          # 只分析该端点, 为空时不限
+    'interval_ms': 5,        # sampler 模式的采样间隔
+    'generation': 0,         # 清空数据时递增, 各进程据此丢弃内存中的旧数据
+}
+
+# 不参与分析的端点
+_SKIP_ENDPOINTS = ('static',)
+_SKIP_PREFIXES = ('admin.profiler',)
+
+# g 上保存当前请求分析状态的属性名
+_PROFILE_ATTR = '_request_profile'
+
+# 设置文件检查间隔(秒)
+SETTINGS_CHECK_INTERVAL = 5
+
+# 结果写出间隔(秒): 请求结束时最多每隔这么久写一次文件, 下载和进程退出时另行写出
+FLUSH_INTERVAL = 10
+
+
+def sampler_supported():
+    """调用栈采样是否可用
+
+    采样线程按线程 ID 从 sys._current_frames() 取请求的调用栈; gevent/eventlet 打补丁后
+    请求运行在协程中, 线程 ID 对应不到真实线程, 只能使用 cProfile 模式。
+    """
+    for name in ('gevent.monkey', 'eventlet.patcher'):
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        checker = getattr(module, 'is_module_patched', None)
+        if checker and checker('threading'):
+            return False
+    return True
+
+
+class RequestProfiler:
+    """按比例或按端点对线上请求做性能分析, 结果聚合为火焰图(折叠栈)和 pstats
+
+    设置保存在 instance/profiler/settings.json, 各 worker 定期读取, 后台切换无需重启;
+    每个进程的结果每隔 FLUSH_INTERVAL 秒写入同目录下的 samples-<pid>.folded / cprofile-<pid>.prof, 下载时合并。
+    调用栈采样不支持 gevent/eventlet 协程, 见 sampler_supported()。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._settings = dict(DEFAULT_SETTINGS)
+        self._settings_checked = 0
+        self._settings_mtime = None
+        self._flushed_at = 0
+        self._dirty = False
+        self._directory = None
+        self._root = None
+        self._reset_data()
+
+        # sampler 状态
+        self._active = {}                 # {thread_id: endpoint}
+        self._wakeup = threading.Event()
+        self._sampler_thread = None
+        self._frame_names = {}
+
+    def _reset_data(self):
+        self._stacks = Counter()
+        self._stats = None
+        self._requests = 0
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 采样线程不会随 fork 复制, 重建锁和采样状态"""
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler_thread = None
+        self._active = {}
+        self._settings_checked = 0
+        self._flushed_at = 0
+        self._dirty = False
+        self._reset_data()
+
+    def init_app(self, app):
+        self._directory = os.path.join(app.instance_path, 'profiler')
+        self._root = os.path.dirname(app.root_path)
+        app.before_request(self._start_request)
+        app.teardown_request(self._finish_request)
+        atexit.register(self.flush)
+
+    # ---- 设置 ----
+
+    @property
+    def settings_path(self):
+        return os.path.join(self._directory, 'settings.json')
+
+    def get_settings(self):
+        """读取设置(每 SETTINGS_CHECK_INTERVAL 秒最多检查一次文件)"""
+        now = time.time()
+        if self._directory and now - self._settings_checked >= SETTINGS_CHECK_INTERVAL:
+            self._settings_checked = now
+            try:
+                mtime = os.path.getmtime(self.settings_path)
+            except OSError:
+                mtime = None
+            if mtime != self._settings_mtime:
+                self._load_settings(mtime)
+        return self._settings
+
+    def _load_settings(self, mtime):
+        settings = dict(DEFAULT_SETTINGS)
+        if mtime is not None:
+            try:
+                with open(self.settings_path, encoding='utf-8') as f:
+                    settings.update(json.load(f))
+            except (OSError, ValueError) as e:
+                current_app.logger.error(f"Load profiler settings error: {str(e)}")
+        with self._lock:
+            if settings['generation'] != self._settings['generation']:
+                self._reset_data()
+            self._settings = settings
+            self._settings_mtime = mtime
+
+    def save_settings(self, **changes):
+        """更新设置并写入文件"""
+        settings = dict(self.get_settings())
+        settings.update(changes)
+        os.makedirs(self._directory, exist_ok=True)
+        with open(self.settings_path, 'w', encoding='utf-8') as f:
+            json.dump(settings, f, ensure_ascii=False)
+        self._settings_checked = 0
+        return self.get_settings()
+
+    def clear(self):
+        """清空所有进程的分析数据"""
+        settings = self.save_settings(generation=self.get_settings()['generation'] + 1)
+        for name in self._data_files():
+            try:
+                os.remove(os.path.join(self._directory, name))
+            except OSError:
+                pass
+        return settings
+
+    # ---- 请求钩子 ----
+
+    def _should_profile(self, settings):
+        endpoint = request.endpoint
+        if not endpoint or endpoint in _SKIP_ENDPOINTS or endpoint.startswith(_SKIP_PREFIXES):
+            return False
+        if settings['endpoint'] and endpoint != settings['endpoint']:
+            return False
+        return random.random() < float(settings['sample_rate'])
+
+    def _start_request(self):
+        settings = self.get_settings()
+        if not settings['enabled'] or not self._should_profile(settings):
+            return
+
+        if settings['mode'] == MODE_CPROFILE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # 同一时刻只能有一个 cProfile 在运行(并发请求时跳过)
+                return
+            setattr(g, _PROFILE_ATTR, (MODE_CPROFILE, profile))
+        else:
+            if not sampler_supported():
+                return
+            thread_id = threading.get_ident()
+            with self._lock:
+                self._active[thread_id] = request.endpoint
+            setattr(g, _PROFILE_ATTR, (MODE_SAMPLER, thread_id))
+            self._ensure_sampler()
+
+    def _finish_request(self, exc=None):
+        state = g.pop(_PROFILE_ATTR, None)
+        if state is None:
+            return
+        mode, handle = state
+        try:
+            if mode == MODE_CPROFILE:
+                handle.disable()
+                with self._lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(handle)
+                    else:
+                        self._stats.add(handle)
+                    self._requests += 1
+            else:
+                with self._lock:
+                    self._active.pop(handle, None)
+                    self._requests += 1
+            self._dirty = True
+            if time.time() - self._flushed_at >= FLUSH_INTERVAL:
+                self.flush()
+        except Exception as e:
+            current_app.logger.error(f"Profile request error: {str(e)}")
+
+    # ---- 调用栈采样 ----
+
+    def _ensure_sampler(self):
+        self._wakeup.set()
+        if self._sampler_thread is None or not self._sampler_thread.is_alive():
+            self._sampler_thread = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+            self._sampler_thread.start()
+
+    def _frame_name(self, code):
+        name = self._frame_names.get(code)
+        if name is None:
+            filename = code.co_filename
+            if self._root and filename.startswith(self._root):
+                filename = os.path.relpath(filename, self._root)
+            elif 'site-packages' in filename:
+                filename = filename.split('site-packages', 1)[1].lstrip(os.sep)
+            name = f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ',')
+            self._frame_names[code] = name
+        return name
+
+    def _sample_loop(self):
+        while True:
+            self._wakeup.wait()
+            interval = max(int(self._settings.get('interval_ms', 5)), 1) / 1000
+            time.sleep(interval)
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._wakeup.clear()
+                    continue
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, endpoint in active.items():
+                frame = frames.get(thread_id)
+                names = []
+                while frame is not None:
+                    names.append(self._frame_name(frame.f_code))
+                    frame = frame.f_back
+                names.append(endpoint)
+                stacks.append(';'.join(reversed(names)))
+            with self._lock:
+                self._stacks.update(stacks)
+
+    # ---- 结果 ----
+
+    def _data_files(self):
+        try:
+            return [name for name in os.listdir(self._directory)
+                    if name.endswith(('.folded', '.prof'))]
+        except OSError:
+            return []
+
+    def flush(self):
+        """写出本进程的聚合结果(没有新数据时跳过)"""
+        if not self._dirty or not self._directory:
+            return
+        self._dirty = False
+        self._flushed_at = time.time()
+        os.makedirs(self._directory, exist_ok=True)
+        pid = os.getpid()
+        with self._lock:
+            stacks = dict(self._stacks)
+            stats = self._stats
+            requests = self._requests
+            if stats is not None:
+                stats.dump_stats(os.path.join(self._directory, f'cprofile-{pid}.prof'))
+        if stacks:
+            path = os.path.join(self._directory, f'samples-{pid}.folded')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f'# requests {requests}\n')
+                for stack, count in stacks.items():
+                    f.write(f'{stack} {count}\n')
+
+    def collapsed_stacks(self):
+        """合并各进程的折叠栈
+
+        其他进程的结果最多延迟 FLUSH_INTERVAL 秒写出, 本进程的结果先写出再读取。
+
+        Returns:
+            tuple: (Counter{stack: samples}, 分析的请求数)
+        """
+        self.flush()
+        stacks = Counter()
+        requests = 0
+        for name in self._data_files():
+            if not name.endswith('.folded'):
+                continue
+            with open(os.path.join(self._directory, name), encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip('\n')
+                    if line.startswith('# requests '):
+                        requests += int(line.rsplit(' ', 1)[1])
+                        continue
+                    stack, _, count = line.rpartition(' ')
+                    if stack:
+                        stacks[stack] += int(count)
+        return stacks, requests
+
+    def export_collapsed(self):
+        """折叠栈文本(flamegraph.pl / speedscope 可直接读取)"""
+        stacks, _ = self.collapsed_stacks()
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+    def merged_stats(self):
+        """合并各进程的 pstats, 没有数据时返回 None"""
+        self.flush()
+        files = [os.path.join(self._directory, name) for name in self._data_files() if name.endswith('.prof')]
+        if not files:
+            return None
+        return pstats.Stats(*files)
+
+    def export_pstats(self):
+        """合并后的 pstats 二进制数据"""
+        stats = self.merged_stats()
+        if stats is None:
+            return None
+        os.makedirs(self._directory, exist_ok=True)
+        path = os.path.join(self._directory, f'export-{os.getpid()}.pstats')
+        try:
+            stats.dump_stats(path)
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def summary(self, limit=30):
+        """后台展示用摘要: 采样热点函数和 pstats 文本"""
+        stacks, sampled_requests = self.collapsed_stacks()
+        total = sum(stacks.values())
+        self_samples = Counter()
+        for stack, count in stacks.items():
+            self_samples[stack.rsplit(';', 1)[-1]] += count
+        hot_frames = [
+            {'frame': frame, 'samples': count, 'percent': round(count * 100 / total, 1)}
+            for frame, count in self_samples.most_common(limit)
+        ]
+
+        stats_text = ''
+        stats = self.merged_stats()
+        if stats is not None:
+            buffer = io.StringIO()
+            stats.stream = buffer
+            stats.sort_stats('cumulative').print_stats(limit)
+            stats_text = buffer.getvalue()
+
+        return {
+            'total_samples': total,
+            'sampled_requests': sampled_requests,
+            'hot_frames': hot_frames,
+            'stats_text': stats_text
+        }
+
+
+request_profiler = RequestProfiler()
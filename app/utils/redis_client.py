@@ -0,0 +1,17 @@
+import redis
+
+from config.database import REDIS_CONFIG
+
+# 全站共用一个 Redis 客户端(一个连接池), 各模块从这里导入
+redis_client = redis.Redis(
+    host=REDIS_CONFIG['host'],
+    port=REDIS_CONFIG['port'],
+    password=REDIS_CONFIG['password'],
+    db=REDIS_CONFIG['db'],
+    decode_responses=True
+)
+
+
+def reset_redis_client():
+    """fork 后丢弃从父进程继承的连接, 子进程按需重新建立"""
+    redis_client.connection_pool.reset()
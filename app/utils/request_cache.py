@@ -0,0 +1,66 @@
+from flask import g, has_request_context
+from sqlalchemy import event
+
+from app.extensions import db
+
+# g 上保存请求级缓存的属性名
+_MEMO_ATTR = '_request_memo'
+
+_MISSING = object()
+
+
+def _store():
+    """当前请求的缓存字典, 不在请求中时返回 None"""
+    if not has_request_context():
+        return None
+    store = g.get(_MEMO_ATTR)
+    if store is None:
+        store = {}
+        setattr(g, _MEMO_ATTR, store)
+    return store
+
+
+def request_memo(namespace, key, factory):
+    """请求级缓存: 同一请求内相同 (namespace, key) 只计算一次
+
+    namespace 通常为模型名, 该模型有写入 flush 时整组失效。
+    不在请求上下文中(命令行、定时任务)时直接调用 factory。
+    """
+    store = _store()
+    if store is None:
+        return factory()
+
+    bucket = store.setdefault(namespace, {})
+    value = bucket.get(key, _MISSING)
+    if value is _MISSING:
+        value = factory()
+        bucket[key] = value
+    return value
+
+
+def request_memo_set(namespace, key, value):
+    """写入请求级缓存"""
+    store = _store()
+    if store is not None:
+        store.setdefault(namespace, {})[key] = value
+
+
+def request_memo_clear(namespace=None):
+    """清除请求级缓存(指定 namespace 或全部)"""
+    store = _store()
+    if store is None:
+        return
+    if namespace is None:
+        store.clear()
+    else:
+        store.pop(namespace, None)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _expire_flushed_namespaces(session, flush_context):
+    """有实体写入时清除对应模型名下的请求级缓存, 避免同一请求内读到旧值"""
+    store = g.get(_MEMO_ATTR) if has_request_context() else None
+    if not store:
+        return
+    for obj in session.new | session.dirty | session.deleted:
+        store.pop(type(obj).__name__, None)
@@ -21,6 +21,13 @@ class RouteManager:
     def __init__(self):
         self._route_lock = Lock()
 
+    @classmethod
+    def reset_after_fork(cls):
+        """fork 后在子进程调用: 重建锁(父进程中可能正被持有)"""
+        cls._lock = Lock()
+        if cls._instance is not None:
+            cls._instance._route_lock = Lock()
+
     def refresh_routes(self):
         """刷新自定义路由"""
         # 使用缓存检查是否需要刷新
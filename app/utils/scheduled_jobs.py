@@ -0,0 +1,48 @@
+def _fetch_articles():
+    from app.services.article_api_service import fetch_and_save_articles
+
+    return fetch_and_save_articles("热门")
+
+
+def _recount_counts():
+    from app.services.recount_service import RecountService
+
+    success, result = RecountService.recount_all()
+    if not success:
+        return False, result
+    return True, f"分类 {len(result['categories'])} 个、标签 {len(result['tags'])} 个计数有变更"
+
+
+def _backfill_comment_stats():
+    from app.services.comment_service import CommentService
+
+    success, result = CommentService.backfill_stats()
+    if not success:
+        return False, result
+    return True, f"文章 {len(result['articles'])} 篇、自定义页面 {len(result['custom_pages'])} 个评论统计有变更"
+
+
+def _rebuild_category_index():
+    from app.services.category_index_service import CategoryIndexService
+
+    return CategoryIndexService.rebuild_index()
+
+
+def register_jobs(scheduler, app):
+    """注册内置定时任务
+
+    首次注册时的暂停状态写入 scheduled_jobs, 之后在后台或 flask jobs pause/resume 中切换。
+    """
+    # 文章自动获取: 与之前一样默认只在生产环境开启
+    scheduler.add_job('fetch_articles', _fetch_articles, cron='0 * * * *', jitter=60, timeout=600,
+                      paused=app.config.get('FLASK_ENV') != 'production',
+                      description='通过 API 获取并发布文章')
+    scheduler.add_job('recount_counts', _recount_counts, cron='30 3 * * *', jitter=300, timeout=1800,
+                      description='重算分类和标签文章数')
+    scheduler.add_job('comment_stats', _backfill_comment_stats, cron='45 3 * * *', jitter=300, timeout=1800,
+                      description='校正文章和页面的评论统计')
+    scheduler.add_job('category_index', _rebuild_category_index, cron='0 4 * * 0', jitter=300, timeout=3600,
+                      description='全量重建分类文章索引')
+    scheduler.add_job('prune_job_runs', scheduler.prune_history, cron='15 4 * * *',
+                      args=(app.config.get('SCHEDULER_HISTORY_DAYS', 30),),
+                      description='清理过期的任务执行历史')
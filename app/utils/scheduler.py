@@ -0,0 +1,595 @@
+import atexit
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# leader 选举方式: file 为同一台机器上的文件锁, database 为数据库行租约(多台机器共用一个库)
+LEADER_FILE = 'file'
+LEADER_DATABASE = 'database'
+
+# 数据库租约名称
+LEASE_NAME = 'scheduler'
+
+# cron 别名
+_CRON_ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+# (字段名, 最小值, 最大值); 星期 0 和 7 都表示周日
+_CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+# 执行结果写入历史时的最大长度
+RESULT_MAX_LENGTH = 500
+
+
+class CronExpression:
+    """5 字段 cron 表达式: 分 时 日 月 星期
+
+    支持 *、数字、a-b 范围、逗号列表、/n 步长和 @daily 等别名;
+    日和星期同时限定时按 cron 惯例任一匹配即可。时间为服务器本地时间。
+    """
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        fields = _CRON_ALIASES.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'cron 表达式需要 5 个字段: {expression}')
+        parsed = [self._parse_field(text, name, low, high) for text, (name, low, high) in zip(fields, _CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(0 if value == 7 else value for value in weekdays)
+        self._day_any = fields[2] == '*'
+        self._weekday_any = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(text, name, low, high):
+        values = set()
+        for part in text.split(','):
+            expr, _, step = part.partition('/')
+            try:
+                step = int(step) if step else 1
+                if expr == '*':
+                    start, end = low, high
+                elif '-' in expr:
+                    start, end = (int(value) for value in expr.split('-', 1))
+                else:
+                    start = int(expr)
+                    # "5/15" 表示从 5 开始每 15 一次
+                    end = high if step != 1 else start
+            except ValueError:
+                raise ValueError(f'cron 字段 {name} 无效: {text}')
+            if step <= 0 or start < low or end > high or start > end:
+                raise ValueError(f'cron 字段 {name} 超出范围({low}-{high}): {text}')
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        # datetime.weekday() 周一为 0, cron 周日为 0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._day_any:
+            return weekday_ok
+        if self._weekday_any:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        """moment 之后(不含)的下一个执行时间"""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 防止 "0 0 30 2 *" 这类永远不会到来的表达式死循环
+        limit = moment + timedelta(days=366 * 5)
+        while moment <= limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f'cron 表达式没有可执行时间: {self.expression}')
+
+    def __str__(self):
+        return self.expression
+
+
+class Job:
+    """定时任务定义
+
+    Args:
+        cron / interval: cron 表达式或固定间隔(秒), 二选一
+        max_instances: 同时运行的实例上限, 上一次未结束时本次记为 skipped
+        jitter: 每次执行随机推迟 0~jitter 秒, 避免多个任务同时触发
+        timeout: 超时(秒), 超时的执行记为 timeout 并告警(线程无法强制终止, 结束前仍占用并发名额)
+        paused: 首次注册时是否为暂停状态(之后以数据库中的状态为准)
+    """
+
+    def __init__(self, name, func, cron=None, interval=None, args=(), kwargs=None,
+                 max_instances=1, jitter=0, timeout=None, paused=False, description=''):
+        if (cron is None) == (interval is None):
+            raise ValueError(f'任务 {name} 需要指定 cron 或 interval 其中之一')
+        self.name = name
+        self.func = func
+        self.cron = CronExpression(cron) if cron else None
+        self.interval = interval
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.max_instances = max_instances
+        self.jitter = jitter
+        self.timeout = timeout
+        self.paused = paused
+        self.description = description
+
+    @property
+    def schedule(self):
+        return str(self.cron) if self.cron else f'every {self.interval}s'
+
+    def next_run(self, now, last_run=None):
+        """计算下一次执行时间
+
+        cron 任务取 now 之后的下一个时间点(leader 切换期间错过的执行不补跑);
+        interval 任务从上次执行时间起算, 从未执行过时立即执行。
+        """
+        if self.cron:
+            moment = self.cron.next_after(now)
+        elif last_run:
+            moment = max(last_run + timedelta(seconds=self.interval), now)
+        else:
+            moment = now
+        if self.jitter:
+            moment += timedelta(seconds=random.uniform(0, self.jitter))
+        return moment
+
+
+class Scheduler:
+    """带 leader 选举的定时任务调度器
+
+    每个进程都运行一个调度线程, 但只有 leader 执行任务: 同一台机器上的多个 worker 用
+    instance/scheduler.lock 文件锁选主, 多台机器共用数据库时用 scheduler_leases 行租约。
+    leader 退出后其他进程在下一次调度(文件锁)或租约过期后(数据库)接管。
+    执行历史写入 job_runs, 每个任务的暂停状态和最近结果写入 scheduled_jobs。
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._stop = threading.Event()
+        self._thread = None
+        self._app = None
+        self._owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._lock_file = None
+        self._is_leader = False
+        self._next_runs = {}
+        self._running = {}          # {job_name: 运行中的实例数}
+        self._active = {}           # {run_id: (job, 开始时间 monotonic, 是否已超时)}
+        self._stats = {}            # {job_name: {'runs': {status: count}, 'last_duration', 'last_run'}}
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 调度线程和文件锁不随 fork 继承, 恢复为未启动状态"""
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    # ---- 注册 ----
+
+    def add_job(self, name, func, **options):
+        """注册任务, 同名任务覆盖"""
+        job = Job(name, func, **options)
+        with self._lock:
+            self._jobs[name] = job
+        return job
+
+    def get_job(self, name):
+        return self._jobs.get(name)
+
+    @property
+    def jobs(self):
+        return list(self._jobs.values())
+
+    @property
+    def is_leader(self):
+        return self._is_leader
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---- 启动/停止 ----
+
+    def start(self, app):
+        """启动调度线程"""
+        if self.running:
+            return
+        self._app = app
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ppress-scheduler', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        app.logger.info(f"定时任务调度器已启动, 选主方式: {app.config.get('SCHEDULER_LEADER')}")
+
+    def stop(self):
+        """停止调度线程并释放 leader"""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+        if self._is_leader and self._app is not None:
+            try:
+                with self._app.app_context():
+                    self._release()
+            except Exception:
+                pass
+        self._is_leader = False
+
+    def _run(self):
+        app = self._app
+        tick = app.config.get('SCHEDULER_TICK_SECONDS', 5)
+        while not self._stop.is_set():
+            wait = tick
+            try:
+                with app.app_context():
+                    wait = self._tick(tick)
+            except Exception as e:
+                app.logger.error(f"Scheduler tick error: {str(e)}")
+            self._stop.wait(wait)
+
+    # ---- leader 选举 ----
+
+    def _elect(self):
+        """获取或续期 leader, 返回本进程当前是否为 leader"""
+        if current_app.config.get('SCHEDULER_LEADER') == LEADER_DATABASE:
+            return self._acquire_lease()
+        return self._acquire_file_lock()
+
+    def _acquire_file_lock(self):
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            # 没有 fcntl 的平台只有单进程部署, 直接作为 leader
+            return True
+        os.makedirs(current_app.instance_path, exist_ok=True)
+        lock_file = open(os.path.join(current_app.instance_path, 'scheduler.lock'), 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(self._owner)
+        lock_file.flush()
+        self._lock_file = lock_file
+        return True
+
+    def _acquire_lease(self):
+        """续期或接管过期的租约; 多台机器的时钟需要同步(NTP)"""
+        from app.models import SchedulerLease
+
+        table = SchedulerLease.__table__
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=current_app.config.get('SCHEDULER_LEASE_SECONDS', 30))
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                table.update()
+                .where(table.c.name == LEASE_NAME)
+                .where(or_(table.c.owner == self._owner, table.c.expires_at < now))
+                .values(owner=self._owner, expires_at=expires_at)
+            )
+            if result.rowcount:
+                return True
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(table.insert().values(name=LEASE_NAME, owner=self._owner, expires_at=expires_at))
+            return True
+        except IntegrityError:
+            return False
+
+    def _release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        if current_app.config.get('SCHEDULER_LEADER') == LEADER_DATABASE:
+            from app.models import SchedulerLease
+
+            table = SchedulerLease.__table__
+            with db.engine.begin() as conn:
+                conn.execute(table.delete().where(table.c.name == LEASE_NAME).where(table.c.owner == self._owner))
+
+    # ---- 调度 ----
+
+    def _job_states(self):
+        """读取各任务的数据库状态, 缺少的行按注册时的默认暂停状态补建"""
+        from app.models import ScheduledJob
+
+        states = {row.name: row for row in ScheduledJob.query.all()}
+        missing = [job for job in self.jobs if job.name not in states]
+        if missing:
+            for job in missing:
+                db.session.add(ScheduledJob(name=job.name, paused=job.paused))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+            states = {row.name: row for row in ScheduledJob.query.all()}
+        return states
+
+    def _tick(self, tick):
+        """一次调度: 选主、派发到期任务、检查超时; 返回距下一次调度的秒数"""
+        leader = self._elect()
+        if leader != self._is_leader:
+            self._is_leader = leader
+            self._next_runs = {}
+            if leader:
+                current_app.logger.info(f"定时任务调度器成为 leader: {self._owner}")
+        if not leader:
+            return tick
+
+        states = self._job_states()
+        now = datetime.now()
+        for job in self.jobs:
+            state = states.get(job.name)
+            if state is not None and state.paused:
+                self._next_runs.pop(job.name, None)
+                continue
+            next_run = self._next_runs.get(job.name)
+            if next_run is None:
+                next_run = job.next_run(now, state.last_run_at if state else None)
+                self._next_runs[job.name] = next_run
+                self._save_next_run(job.name, next_run)
+            if next_run <= now:
+                self._dispatch(job, next_run)
+                next_run = job.next_run(now, now)
+                self._next_runs[job.name] = next_run
+                self._save_next_run(job.name, next_run)
+
+        self._check_timeouts()
+        if not self._next_runs:
+            return tick
+        until_next = (min(self._next_runs.values()) - datetime.now()).total_seconds()
+        return min(max(until_next, 0.5), tick)
+
+    def _save_next_run(self, name, next_run):
+        from app.models import ScheduledJob
+
+        table = ScheduledJob.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.name == name).values(next_run_at=next_run))
+
+    def _dispatch(self, job, scheduled_at):
+        """在独立线程中执行任务, 达到并发上限时只记录 skipped"""
+        from app.models import JobRun
+
+        with self._lock:
+            running = self._running.get(job.name, 0)
+            if running < job.max_instances:
+                self._running[job.name] = running + 1
+                running = None
+        if running is not None:
+            current_app.logger.warning(f"任务 {job.name} 仍有 {running} 个实例在运行, 跳过本次执行")
+            self._record_skipped(job, scheduled_at)
+            self._count(job.name, JobRun.STATUS_SKIPPED)
+            return
+        threading.Thread(target=self._execute, args=(self._app, job, scheduled_at),
+                         name=f'ppress-job-{job.name}', daemon=True).start()
+
+    def _record_skipped(self, job, scheduled_at):
+        from app.models import JobRun
+
+        now = datetime.now()
+        with db.engine.begin() as conn:
+            conn.execute(JobRun.__table__.insert().values(
+                job_name=job.name, status=JobRun.STATUS_SKIPPED, scheduled_at=scheduled_at,
+                started_at=now, finished_at=now, duration=0, owner=self._owner,
+            ))
+
+    def _execute(self, app, job, scheduled_at):
+        try:
+            with app.app_context():
+                self.run_job(job, scheduled_at=scheduled_at)
+        except Exception as e:
+            app.logger.error(f"Scheduler execute {job.name} error: {str(e)}")
+        finally:
+            with self._lock:
+                self._running[job.name] = max(self._running.get(job.name, 1) - 1, 0)
+
+    def run_job(self, job, scheduled_at=None):
+        """在当前应用上下文中执行一次任务并记录历史(也用于手动执行)
+
+        任务函数按项目惯例返回 (success, result) 时, success 为 False 记为失败。
+
+        Returns:
+            tuple: (状态, 结果或错误信息)
+        """
+        from app.models import JobRun, ScheduledJob
+
+        runs = JobRun.__table__
+        started_at = datetime.now()
+        with db.engine.begin() as conn:
+            run_id = conn.execute(runs.insert().values(
+                job_name=job.name, status=JobRun.STATUS_RUNNING, scheduled_at=scheduled_at,
+                started_at=started_at, owner=self._owner,
+            )).inserted_primary_key[0]
+        with self._lock:
+            self._active[run_id] = (job, time.monotonic(), False)
+
+        started = time.perf_counter()
+        try:
+            result = job.func(*job.args, **job.kwargs)
+            if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], bool):
+                status = JobRun.STATUS_SUCCESS if result[0] else JobRun.STATUS_FAILED
+                result = result[1]
+            else:
+                status = JobRun.STATUS_SUCCESS
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Scheduled job {job.name} error: {str(e)}")
+            status, result = JobRun.STATUS_FAILED, str(e)
+        duration = time.perf_counter() - started
+
+        with self._lock:
+            _, _, timed_out = self._active.pop(run_id, (None, None, False))
+        if timed_out:
+            status = JobRun.STATUS_TIMEOUT
+
+        finished_at = datetime.now()
+        text = None if result is None else str(result)[:RESULT_MAX_LENGTH]
+        jobs = ScheduledJob.__table__
+        with db.engine.begin() as conn:
+            conn.execute(runs.update().where(runs.c.id == run_id).values(
+                status=status, finished_at=finished_at, duration=duration, result=text,
+            ))
+            conn.execute(jobs.update().where(jobs.c.name == job.name).values(
+                last_run_at=started_at, last_status=status, last_duration=duration,
+            ))
+        # 超时已在 _check_timeouts 中计数
+        self._count(job.name, None if timed_out else status, duration, started_at)
+        return status, result
+
+    def _check_timeouts(self):
+        """标记超时的执行"""
+        from app.models import JobRun
+
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for run_id, (job, started, timed_out) in self._active.items():
+                if job.timeout and not timed_out and now - started > job.timeout:
+                    self._active[run_id] = (job, started, True)
+                    expired.append((run_id, job))
+        for run_id, job in expired:
+            current_app.logger.error(f"任务 {job.name} 执行超过 {job.timeout} 秒")
+            runs = JobRun.__table__
+            with db.engine.begin() as conn:
+                conn.execute(runs.update().where(runs.c.id == run_id).values(status=JobRun.STATUS_TIMEOUT))
+            self._count(job.name, JobRun.STATUS_TIMEOUT)
+
+    def _count(self, name, status, duration=None, started_at=None):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'runs': {}, 'last_duration': None, 'last_run': None})
+            if status:
+                stats['runs'][status] = stats['runs'].get(status, 0) + 1
+            if duration is not None:
+                stats['last_duration'] = duration
+                stats['last_run'] = started_at
+
+    # ---- 管理 ----
+
+    def set_paused(self, name, paused):
+        """暂停/恢复任务(任意进程调用, leader 在下一次调度时生效)"""
+        from app.models import ScheduledJob
+
+        job = self.get_job(name)
+        if job is None:
+            return False, f'任务不存在: {name}'
+        try:
+            table = ScheduledJob.__table__
+            with db.engine.begin() as conn:
+                result = conn.execute(table.update().where(table.c.name == name).values(paused=paused))
+                if not result.rowcount:
+                    conn.execute(table.insert().values(name=name, paused=paused))
+            return True, paused
+        except Exception as e:
+            current_app.logger.error(f"Set job paused error: {str(e)}")
+            return False, str(e)
+
+    def get_status(self):
+        """所有任务的状态(读取数据库, 任意进程结果一致)"""
+        from app.models import ScheduledJob
+
+        states = {row.name: row for row in ScheduledJob.query.all()}
+        jobs = []
+        for job in self.jobs:
+            state = states.get(job.name)
+            jobs.append({
+                'name': job.name,
+                'description': job.description,
+                'schedule': job.schedule,
+                'paused': state.paused if state else job.paused,
+                'next_run': _format_time(state.next_run_at) if state and not state.paused else None,
+                'last_run': _format_time(state.last_run_at) if state else None,
+                'last_status': state.last_status if state else None,
+                'last_duration': state.last_duration if state else None,
+            })
+        return {'running': self.running, 'leader': self._is_leader, 'owner': self._owner, 'jobs': jobs}
+
+    def get_history(self, name=None, limit=20):
+        from app.models import JobRun
+
+        query = JobRun.query
+        if name:
+            query = query.filter(JobRun.job_name == name)
+        return query.order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit).all()
+
+    def prune_history(self, days):
+        """删除 days 天之前的执行历史"""
+        from app.models import JobRun
+
+        try:
+            cutoff = datetime.now() - timedelta(days=days)
+            deleted = JobRun.query.filter(JobRun.started_at < cutoff).delete(synchronize_session=False)
+            db.session.commit()
+            return True, deleted
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Prune job history error: {str(e)}")
+            return False, str(e)
+
+    def metrics_snapshot(self):
+        """本进程的执行统计(供 /metrics 使用)"""
+        with self._lock:
+            running = dict(self._running)
+            stats = {name: {'runs': dict(item['runs']), 'last_duration': item['last_duration'],
+                            'last_run': item['last_run']} for name, item in self._stats.items()}
+        return {'leader': self._is_leader, 'jobs': [job.name for job in self.jobs],
+                'running': running, 'stats': stats}
+
+
+def _format_time(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+scheduler = Scheduler()
+
+
+def init_scheduler(app):
+    """注册内置任务(不启动调度线程)
+
+    调度线程只在服务进程中启动(run.py 和 gunicorn post_fork, 见 app/utils/process_state.py),
+    命令行和脚本中创建应用不会运行定时任务。
+    """
+    from app.utils.scheduled_jobs import register_jobs
+
+    register_jobs(scheduler, app)
+
+
+def start_scheduler(app):
+    """按配置启动调度线程(任务已在 init_scheduler 中注册)"""
+    if not app.config.get('SCHEDULER_ENABLED'):
+        app.logger.info("定时任务调度器未启用")
+        return False
+    scheduler.start(app)
+    return True
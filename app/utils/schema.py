@@ -0,0 +1,105 @@
+from flask import current_app
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from app import db
+
+
+def _managed_tables():
+    """升级后新增的数据表及其首次创建后的初始化函数"""
+    from app.models import CategoryArticleIndex, ArticleBody, ScheduledJob, JobRun, SchedulerLease, EntityVersion
+    from app.services.category_index_service import CategoryIndexService
+
+    return [
+        (CategoryArticleIndex, CategoryIndexService.rebuild_index),
+        (ArticleBody, None),
+        (ScheduledJob, None),
+        (JobRun, None),
+        (SchedulerLease, None),
+        (EntityVersion, None),
+    ]
+
+
+def _managed_indexes():
+    """升级后新增的索引"""
+    from app.models import Article, Comment
+
+    return list(Comment.__table__.indexes) + [
+        index for index in Article.__table__.indexes
+        if index.name in ('ix_articles_comment_count', 'ix_articles_last_commented_at', 'ix_articles_updated_at')
+    ]
+
+
+def _managed_columns():
+    """升级后新增的字段及其全部添加完成后的回填函数"""
+    from app.models import Article, CustomPage, File
+    from app.services.comment_service import CommentService
+    from app.services.blog_service import BlogService
+
+    def backfill_summaries():
+        BlogService.rebuild_article_summaries(only_missing=True)
+
+    return [
+        (Article.__table__.c.comment_count, CommentService.backfill_stats),
+        (Article.__table__.c.last_commented_at, CommentService.backfill_stats),
+        (CustomPage.__table__.c.comment_count, CommentService.backfill_stats),
+        (CustomPage.__table__.c.last_commented_at, CommentService.backfill_stats),
+        (Article.__table__.c.excerpt, backfill_summaries),
+        (Article.__table__.c.word_count, backfill_summaries),
+        (Article.__table__.c.reading_time, backfill_summaries),
+        (Article.__table__.c.toc, backfill_summaries),
+        (File.__table__.c.variants, None),
+    ]
+
+
+def _add_column(column):
+    """ALTER TABLE ADD COLUMN, 字段定义由当前方言编译"""
+    definition = CreateColumn(column).compile(dialect=db.engine.dialect)
+    with db.engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE {column.table.name} ADD COLUMN {definition}'))
+
+
+def ensure_schema():
+    """补建已安装站点缺少的数据表、字段和索引
+
+    项目没有迁移框架, 新版本新增的表、字段和索引在启动时按需创建,
+    新建后执行对应的初始化(如从现有数据回填)。
+
+    Returns:
+        list: 本次新建的表名/字段名/索引名
+    """
+    created = []
+    try:
+        existing = set(inspect(db.engine).get_table_names())
+        for model, on_create in _managed_tables():
+            table = model.__table__
+            if table.name in existing:
+                continue
+            table.create(db.engine, checkfirst=True)
+            created.append(table.name)
+            if on_create:
+                on_create()
+
+        inspector = inspect(db.engine)
+        backfills = []
+        for column, on_create in _managed_columns():
+            existing_columns = {item['name'] for item in inspector.get_columns(column.table.name)}
+            if column.name in existing_columns:
+                continue
+            _add_column(column)
+            created.append(f'{column.table.name}.{column.name}')
+            if on_create and on_create not in backfills:
+                backfills.append(on_create)
+        for backfill in backfills:
+            backfill()
+
+        inspector = inspect(db.engine)
+        for index in _managed_indexes():
+            existing_indexes = {item['name'] for item in inspector.get_indexes(index.table.name)}
+            if index.name in existing_indexes:
+                continue
+            index.create(db.engine, checkfirst=True)
+            created.append(index.name)
+    except Exception as e:
+        current_app.logger.error(f"Ensure schema error: {str(e)}")
+    return created
@@ -0,0 +1,223 @@
+import re
+import time
+from collections import Counter, deque
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+from app.utils.metrics import ENV_KEY, UNMATCHED_ENDPOINT
+
+# g 上保存当前请求 SQL 统计的属性名
+_STATS_ATTR = '_sql_stats'
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+# MySQL/PostgreSQL 驱动的 %s 和 %(name)s 占位符
+_PARAM_RE = re.compile(r'%\(\w+\)s|%s')
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_RE = re.compile(r'VALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\1)+', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement):
+    """归一化 SQL: 字面量和占位符替换为 ?, IN 列表和多行 VALUES 折叠, 空白合并"""
+    sql = _STRING_RE.sub('?', statement)
+    sql = _PARAM_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _SPACE_RE.sub(' ', sql).strip()
+    sql = _VALUES_RE.sub(r'VALUES \1...', sql)
+    sql = _IN_LIST_RE.sub('(?...)', sql)
+    return sql
+
+
+class RequestSqlStats:
+    """单个请求内的 SQL 统计"""
+    __slots__ = ('count', 'total_time', 'fingerprints')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+
+
+class SqlMonitor:
+    """SQL 监控: 每请求查询数/耗时、N+1 检测、慢查询环形缓冲和按端点汇总
+
+    通过 before/after_cursor_execute 事件计时, 请求结束时汇总到进程内统计。
+    统计只保存在当前进程内存中, 多进程部署时各进程分别统计。
+    """
+
+    SLOW_LOG_SIZE = 100
+    N_PLUS_ONE_LOG_SIZE = 50
+
+    def __init__(self):
+        self._lock = Lock()
+        self.enabled = False
+        self.slow_query_ms = 100
+        self.n_plus_one_threshold = 5
+        self.debug_header = False
+        self.reset()
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._endpoints = {}
+            self._slow_queries = deque(maxlen=self.SLOW_LOG_SIZE)
+            self._n_plus_one = deque(maxlen=self.N_PLUS_ONE_LOG_SIZE)
+            self._started_at = datetime.now()
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: 重建锁并清空统计"""
+        self._lock = Lock()
+        self.reset()
+
+    def init_app(self, app):
+        """注册数据库事件和请求钩子"""
+        self.enabled = app.config.get('SQL_MONITOR', True)
+        if not self.enabled:
+            return
+        self.slow_query_ms = app.config.get('SQL_SLOW_QUERY_MS', 100)
+        self.n_plus_one_threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+        self.debug_header = app.config.get('SQL_DEBUG_HEADER', False)
+
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # ---- 数据库事件 ----
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('sql_monitor_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('sql_monitor_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+
+        stats = g.get(_STATS_ATTR) if has_request_context() else None
+        if stats is not None:
+            stats.count += 1
+            stats.total_time += elapsed
+            stats.fingerprints[fingerprint(statement)] += 1
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            entry = {
+                'statement': statement[:1000],
+                'duration_ms': round(elapsed * 1000, 1),
+                'endpoint': request.endpoint if has_request_context() else None,
+                'at': datetime.now()
+            }
+            with self._lock:
+                self._slow_queries.append(entry)
+
+    # ---- 请求钩子 ----
+
+    def _start_request(self):
+        setattr(g, _STATS_ATTR, RequestSqlStats())
+
+    def _finish_request(self, response):
+        stats = g.pop(_STATS_ATTR, None)
+        if stats is None:
+            return response
+
+        # 供 WSGI 指标中间件统计数据库耗时
+        metrics_info = request.environ.get(ENV_KEY)
+        if metrics_info is not None:
+            metrics_info['db_time'] = stats.total_time
+
+        # 未匹配路由的请求(404 扫描等)归入同一项, 避免按路径无限增长
+        endpoint = request.endpoint or UNMATCHED_ENDPOINT
+        repeated = [
+            (sql, count) for sql, count in stats.fingerprints.items()
+            if count >= self.n_plus_one_threshold
+        ]
+
+        with self._lock:
+            item = self._endpoints.get(endpoint)
+            if item is None:
+                item = self._endpoints[endpoint] = {
+                    'endpoint': endpoint,
+                    'requests': 0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'db_time': 0.0,
+                    'max_db_time': 0.0,
+                    'n_plus_one': 0
+                }
+            item['requests'] += 1
+            item['queries'] += stats.count
+            item['max_queries'] = max(item['max_queries'], stats.count)
+            item['db_time'] += stats.total_time
+            item['max_db_time'] = max(item['max_db_time'], stats.total_time)
+            if repeated:
+                item['n_plus_one'] += 1
+            for sql, count in repeated:
+                self._n_plus_one.append({
+                    'endpoint': endpoint,
+                    'path': request.full_path.rstrip('?'),
+                    'statement': sql[:1000],
+                    'count': count,
+                    'at': datetime.now()
+                })
+
+        # 调试模式下总是输出
+        if self.debug_header or current_app.debug:
+            response.headers['X-DB-Queries'] = str(stats.count)
+            response.headers['X-DB-Time'] = f'{stats.total_time * 1000:.1f}ms'
+        return response
+
+    # ---- 读取统计 ----
+
+    def current_request_stats(self):
+        """当前请求到目前为止的统计, 不在请求中时返回 None"""
+        return g.get(_STATS_ATTR) if has_request_context() else None
+
+    def get_endpoint_stats(self, sort='db_time', limit=20):
+        """按端点汇总, 按 sort 字段(平均值)倒序
+
+        Args:
+            sort: db_time / queries / max_queries / n_plus_one
+        """
+        with self._lock:
+            items = [dict(item) for item in self._endpoints.values()]
+        for item in items:
+            item['avg_queries'] = round(item['queries'] / item['requests'], 1)
+            item['avg_db_time_ms'] = round(item['db_time'] * 1000 / item['requests'], 1)
+            item['max_db_time_ms'] = round(item['max_db_time'] * 1000, 1)
+
+        sort_keys = {
+            'db_time': lambda x: x['avg_db_time_ms'],
+            'queries': lambda x: x['avg_queries'],
+            'max_queries': lambda x: x['max_queries'],
+            'n_plus_one': lambda x: x['n_plus_one'],
+        }
+        items.sort(key=sort_keys.get(sort, sort_keys['db_time']), reverse=True)
+        return items[:limit]
+
+    def get_slow_queries(self):
+        """慢查询, 最新的在前"""
+        with self._lock:
+            return list(reversed(self._slow_queries))
+
+    def get_n_plus_one(self):
+        """疑似 N+1 记录, 最新的在前"""
+        with self._lock:
+            return list(reversed(self._n_plus_one))
+
+    @property
+    def started_at(self):
+        return self._started_at
+
+
+sql_monitor = SqlMonitor()
@@ -0,0 +1,642 @@
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app
+
+# 队列后端: sqlite 为本机持久化文件(默认), redis 为多台机器共享, inline 为在当前请求内同步执行
+BACKEND_SQLITE = 'sqlite'
+BACKEND_REDIS = 'redis'
+BACKEND_INLINE = 'inline'
+
+# 执行方式: thread 在 worker 进程的线程中执行, process 交给独立进程池(CPU 密集任务)
+POOL_THREAD = 'thread'
+POOL_PROCESS = 'process'
+
+# 任务状态
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DEAD = 'dead'        # 重试次数用尽
+
+# 错误信息保存的最大长度
+ERROR_MAX_LENGTH = 1000
+
+
+def task_name(func):
+    """任务函数的导入路径 module:qualname, 只支持模块级函数和类的静态方法"""
+    name = f'{func.__module__}:{func.__qualname__}'
+    if '<' in name or resolve_task(name) is not func:
+        raise ValueError(f'任务函数必须是模块级函数或类的静态方法: {name}')
+    return name
+
+
+def resolve_task(name):
+    module_name, _, qualname = name.partition(':')
+    target = importlib.import_module(module_name)
+    for attr in qualname.split('.'):
+        target = getattr(target, attr)
+    return target
+
+
+def is_failure(result):
+    """按项目惯例, 返回 False 或 (False, 错误信息) 视为失败"""
+    if result is False:
+        return True
+    return isinstance(result, tuple) and len(result) == 2 and result[0] is False
+
+
+class Task:
+    def __init__(self, id, name, payload, attempts=0, max_retries=3, timeout=None, last_error=None, created_at=None):
+        self.id = id
+        self.name = name
+        self.payload = payload
+        self.attempts = int(attempts or 0)
+        self.max_retries = int(max_retries)
+        self.timeout = float(timeout) if timeout not in (None, '') else None
+        self.last_error = last_error
+        self.created_at = float(created_at) if created_at else None
+
+    @property
+    def args(self):
+        return json.loads(self.payload)['args']
+
+    @property
+    def kwargs(self):
+        return json.loads(self.payload)['kwargs']
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'payload': self.payload,
+            'attempts': self.attempts,
+            'max_retries': self.max_retries,
+            'last_error': self.last_error,
+            'created_at': self.created_at,
+        }
+
+
+class SqliteQueueBackend:
+    """SQLite 文件队列(默认 instance/tasks.db, WAL 模式)
+
+    与主库分开存放, 主库为 MySQL 时同样可用; 同一台机器上的所有进程共享。
+    领取任务时在 BEGIN IMMEDIATE 事务内选取并加锁, locked_until 过期的任务
+    (执行它的进程已退出)会被重新领取。
+    """
+
+    name = BACKEND_SQLITE
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS tasks ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' name TEXT NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' status TEXT NOT NULL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0,'
+                ' max_retries INTEGER NOT NULL,'
+                ' timeout REAL,'
+                ' available_at REAL NOT NULL,'
+                ' locked_until REAL,'
+                ' locked_by TEXT,'
+                ' created_at REAL NOT NULL,'
+                ' last_error TEXT)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks (status, available_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_locked ON tasks (status, locked_until)')
+
+    def reset_after_fork(self):
+        # 不关闭继承的连接(其他进程仍在使用同一文件句柄), 直接丢弃
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def push(self, name, payload, max_retries, timeout=None, delay=0):
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'INSERT INTO tasks (name, payload, status, max_retries, timeout, available_at, created_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (name, payload, STATUS_QUEUED, max_retries, timeout, now + delay, now)
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id, visibility_timeout):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT * FROM tasks WHERE status = ? AND locked_until < ? ORDER BY locked_until LIMIT 1',
+                (STATUS_RUNNING, now)
+            ).fetchone() or conn.execute(
+                'SELECT * FROM tasks WHERE status = ? AND available_at <= ? ORDER BY available_at, id LIMIT 1',
+                (STATUS_QUEUED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            timeout = row['timeout'] or visibility_timeout
+            conn.execute(
+                'UPDATE tasks SET status = ?, attempts = attempts + 1, locked_until = ?, locked_by = ? WHERE id = ?',
+                (STATUS_RUNNING, now + timeout, worker_id, row['id'])
+            )
+        return Task(row['id'], row['name'], row['payload'], row['attempts'] + 1, row['max_retries'],
+                    row['timeout'], row['last_error'], row['created_at'])
+
+    def ack(self, task):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM tasks WHERE id = ?', (task.id,))
+
+    def retry(self, task, error, retry_at):
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE tasks SET status = ?, available_at = ?, locked_until = NULL, locked_by = NULL,'
+                ' last_error = ? WHERE id = ?',
+                (STATUS_QUEUED, retry_at, error, task.id)
+            )
+
+    def bury(self, task, error):
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE tasks SET status = ?, locked_until = NULL, locked_by = NULL, last_error = ? WHERE id = ?',
+                (STATUS_DEAD, error, task.id)
+            )
+
+    def stats(self):
+        now = time.time()
+        conn = self._connect()
+        counts = {STATUS_QUEUED: 0, STATUS_RUNNING: 0, STATUS_DEAD: 0}
+        for row in conn.execute('SELECT status, COUNT(*) AS count FROM tasks GROUP BY status'):
+            counts[row['status']] = row['count']
+        delayed = conn.execute('SELECT COUNT(*) FROM tasks WHERE status = ? AND available_at > ?',
+                               (STATUS_QUEUED, now)).fetchone()[0]
+        oldest = conn.execute('SELECT MIN(available_at) FROM tasks WHERE status = ? AND available_at <= ?',
+                              (STATUS_QUEUED, now)).fetchone()[0]
+        return {
+            'ready': counts[STATUS_QUEUED] - delayed,
+            'delayed': delayed,
+            'running': counts[STATUS_RUNNING],
+            'dead': counts[STATUS_DEAD],
+            'oldest_wait': now - oldest if oldest else 0,
+        }
+
+    def dead_tasks(self, limit=50):
+        rows = self._connect().execute(
+            'SELECT * FROM tasks WHERE status = ? ORDER BY id DESC LIMIT ?', (STATUS_DEAD, limit)
+        ).fetchall()
+        return [Task(row['id'], row['name'], row['payload'], row['attempts'], row['max_retries'],
+                     row['timeout'], row['last_error'], row['created_at']) for row in rows]
+
+    def requeue_dead(self, task_id=None):
+        with self._transaction() as conn:
+            if task_id is None:
+                cursor = conn.execute('UPDATE tasks SET status = ?, attempts = 0, available_at = ? WHERE status = ?',
+                                      (STATUS_QUEUED, time.time(), STATUS_DEAD))
+            else:
+                cursor = conn.execute(
+                    'UPDATE tasks SET status = ?, attempts = 0, available_at = ? WHERE status = ? AND id = ?',
+                    (STATUS_QUEUED, time.time(), STATUS_DEAD, task_id)
+                )
+            return cursor.rowcount
+
+    def delete_dead(self, task_id=None):
+        with self._transaction() as conn:
+            if task_id is None:
+                cursor = conn.execute('DELETE FROM tasks WHERE status = ?', (STATUS_DEAD,))
+            else:
+                cursor = conn.execute('DELETE FROM tasks WHERE status = ? AND id = ?', (STATUS_DEAD, task_id))
+            return cursor.rowcount
+
+
+# 原子领取: 到期的延迟任务和超时未确认的任务先放回就绪队列, 再取出一个放入处理中集合
+_REDIS_CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, id in ipairs(due) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('LPUSH', KEYS[1], id)
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[3], id)
+    redis.call('RPUSH', KEYS[1], id)
+end
+local id = redis.call('RPOP', KEYS[1])
+if not id then
+    return nil
+end
+local key = KEYS[4] .. id
+local timeout = tonumber(redis.call('HGET', key, 'timeout') or '') or tonumber(ARGV[2])
+redis.call('ZADD', KEYS[3], tonumber(ARGV[1]) + timeout, id)
+redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'locked_by', ARGV[3])
+return id
+"""
+
+
+class RedisQueueBackend:
+    """Redis 队列, 多台机器共享
+
+    ready 列表存待执行任务 ID, delayed / processing / dead 为按时间排序的有序集合,
+    任务数据存在 task:<id> 哈希中。
+    """
+
+    name = BACKEND_REDIS
+
+    def __init__(self, client, prefix='ppress:tasks'):
+        self.client = client
+        self.prefix = prefix
+        self.ready_key = f'{prefix}:ready'
+        self.delayed_key = f'{prefix}:delayed'
+        self.processing_key = f'{prefix}:processing'
+        self.dead_key = f'{prefix}:dead'
+        self.task_prefix = f'{prefix}:task:'
+        self._claim = client.register_script(_REDIS_CLAIM_SCRIPT)
+
+    def reset_after_fork(self):
+        # 共享客户端的连接池在 reset_redis_client 中重置
+        pass
+
+    def _load(self, task_id):
+        data = self.client.hgetall(f'{self.task_prefix}{task_id}')
+        if not data:
+            return None
+        return Task(int(task_id), data['name'], data['payload'], data.get('attempts'), data['max_retries'],
+                    data.get('timeout'), data.get('last_error'), data.get('created_at'))
+
+    def push(self, name, payload, max_retries, timeout=None, delay=0):
+        task_id = self.client.incr(f'{self.prefix}:id')
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.hset(f'{self.task_prefix}{task_id}', mapping={
+            'name': name, 'payload': payload, 'attempts': 0, 'max_retries': max_retries,
+            'timeout': timeout if timeout is not None else '', 'created_at': now,
+        })
+        if delay:
+            pipe.zadd(self.delayed_key, {task_id: now + delay})
+        else:
+            pipe.lpush(self.ready_key, task_id)
+        pipe.execute()
+        return task_id
+
+    def claim(self, worker_id, visibility_timeout):
+        keys = [self.ready_key, self.delayed_key, self.processing_key, self.task_prefix]
+        task_id = self._claim(keys=keys, args=[time.time(), visibility_timeout, worker_id])
+        if task_id is None:
+            return None
+        task = self._load(task_id)
+        if task is None:
+            # 数据已被删除(例如手动清理), 丢弃这个 ID
+            self.client.zrem(self.processing_key, task_id)
+        return task
+
+    def ack(self, task):
+        pipe = self.client.pipeline()
+        pipe.zrem(self.processing_key, task.id)
+        pipe.delete(f'{self.task_prefix}{task.id}')
+        pipe.execute()
+
+    def retry(self, task, error, retry_at):
+        pipe = self.client.pipeline()
+        pipe.zrem(self.processing_key, task.id)
+        pipe.hset(f'{self.task_prefix}{task.id}', 'last_error', error)
+        pipe.zadd(self.delayed_key, {task.id: retry_at})
+        pipe.execute()
+
+    def bury(self, task, error):
+        pipe = self.client.pipeline()
+        pipe.zrem(self.processing_key, task.id)
+        pipe.hset(f'{self.task_prefix}{task.id}', 'last_error', error)
+        pipe.zadd(self.dead_key, {task.id: time.time()})
+        pipe.execute()
+
+    def stats(self):
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.llen(self.ready_key)
+        pipe.zcount(self.delayed_key, '-inf', now)
+        pipe.zcard(self.delayed_key)
+        pipe.zcard(self.processing_key)
+        pipe.zcard(self.dead_key)
+        pipe.lindex(self.ready_key, -1)
+        ready, due, delayed, running, dead, oldest_id = pipe.execute()
+        oldest = self._load(oldest_id) if oldest_id else None
+        return {
+            'ready': ready + due,
+            'delayed': delayed - due,
+            'running': running,
+            'dead': dead,
+            'oldest_wait': now - oldest.created_at if oldest and oldest.created_at else 0,
+        }
+
+    def dead_tasks(self, limit=50):
+        ids = self.client.zrevrange(self.dead_key, 0, limit - 1)
+        return [task for task in (self._load(task_id) for task_id in ids) if task is not None]
+
+    def requeue_dead(self, task_id=None):
+        ids = [task_id] if task_id is not None else self.client.zrange(self.dead_key, 0, -1)
+        count = 0
+        for item in ids:
+            if self.client.zrem(self.dead_key, item):
+                pipe = self.client.pipeline()
+                pipe.hset(f'{self.task_prefix}{item}', 'attempts', 0)
+                pipe.lpush(self.ready_key, item)
+                pipe.execute()
+                count += 1
+        return count
+
+    def delete_dead(self, task_id=None):
+        ids = [task_id] if task_id is not None else self.client.zrange(self.dead_key, 0, -1)
+        count = 0
+        for item in ids:
+            if self.client.zrem(self.dead_key, item):
+                self.client.delete(f'{self.task_prefix}{item}')
+                count += 1
+        return count
+
+
+# 进程池子进程中的应用实例
+_process_app = None
+
+
+def _init_process_worker():
+    """进程池子进程初始化: 创建不含路由、插件和后台任务的应用"""
+    global _process_app
+    from app import create_app
+
+    _process_app = create_app(init_components=False)
+    # 子进程中的任务再入队时只写入队列, 不在子进程启动 worker 线程
+    _process_app.config['TASK_QUEUE_WORKERS'] = 0
+
+
+def _run_in_process(name, payload):
+    data = json.loads(payload)
+    with _process_app.app_context():
+        result = resolve_task(name)(*data['args'], **data['kwargs'])
+    if is_failure(result):
+        return False, str(result[1] if isinstance(result, tuple) else result)
+    return True, None
+
+
+class TaskQueue:
+    """后台任务队列
+
+    enqueue(fn, *args, **kwargs) 把任务写入队列后立即返回, 由 worker 线程异步执行;
+    参数需能被 JSON 序列化, 函数需能按导入路径找到(模块级函数或静态方法)。
+    失败(抛出异常或返回 False / (False, 错误信息))按指数退避重试, 次数用尽后转入 dead,
+    可在后台或 flask tasks 命令中重新入队。执行中的任务在 visibility timeout 内未确认
+    (进程退出)会被其他 worker 重新领取, 因此任务需要能安全地重复执行。
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._app = None
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._executor = None
+        self._worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._counters = {'succeeded': 0, 'retried': 0, 'failed': 0}
+
+    def reset_after_fork(self):
+        """fork 后在子进程调用: worker 线程和进程池不随 fork 继承"""
+        self._lock = threading.Lock()
+        self._reset_state()
+        if self._backend is not None:
+            self._backend.reset_after_fork()
+
+    def init_app(self, app):
+        self._app = app
+        backend = app.config.get('TASK_QUEUE_BACKEND')
+        try:
+            if backend == BACKEND_REDIS:
+                from app.utils.redis_client import redis_client
+                self._backend = RedisQueueBackend(redis_client)
+            elif backend == BACKEND_INLINE:
+                self._backend = None
+            else:
+                path = app.config.get('TASK_QUEUE_PATH') or os.path.join(app.instance_path, 'tasks.db')
+                self._backend = SqliteQueueBackend(path)
+        except Exception as e:
+            app.logger.error(f"Init task queue error: {str(e)}")
+            self._backend = None
+
+    @property
+    def backend_name(self):
+        return self._backend.name if self._backend is not None else BACKEND_INLINE
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    # ---- 入队 ----
+
+    def enqueue(self, func, *args, **kwargs):
+        """把 func(*args, **kwargs) 放入队列, 返回任务 ID(同步执行时返回 None)"""
+        return self.submit(func, args, kwargs)
+
+    def submit(self, func, args=(), kwargs=None, max_retries=None, delay=0, timeout=None):
+        """带选项入队
+
+        Args:
+            max_retries: 失败后的重试次数, 默认 TASK_QUEUE_MAX_RETRIES
+            delay: 延迟执行(秒)
+            timeout: 单次执行超时(秒), 超时未确认的任务会被重新领取, 默认 TASK_QUEUE_VISIBILITY_TIMEOUT
+        """
+        name = task_name(func)
+        payload = json.dumps({'args': list(args), 'kwargs': kwargs or {}}, ensure_ascii=False)
+        config = current_app.config
+        if max_retries is None:
+            max_retries = config.get('TASK_QUEUE_MAX_RETRIES', 3)
+
+        if self._backend is not None:
+            try:
+                task_id = self._backend.push(name, payload, max_retries, timeout, delay)
+                self._wakeup.set()
+                if not self.running and config.get('TASK_QUEUE_WORKERS', 2) > 0:
+                    self._start_on_demand()
+                return task_id
+            except Exception as e:
+                # 队列不可用时退回同步执行, 不丢失副作用
+                current_app.logger.error(f"Enqueue task {name} error: {str(e)}")
+        self._run_inline(func, args, kwargs or {})
+        return None
+
+    def _start_on_demand(self):
+        """当前进程没有 worker 线程时(如 flask run 或其他 WSGI 服务器)按需启动, 避免任务积压无人执行
+
+        TASK_QUEUE_WORKERS 为 0 表示由 flask tasks worker 单独执行, 不会走到这里。
+        """
+        with self._lock:
+            if self.running:
+                return
+            current_app.logger.warning(f"进程 {os.getpid()} 没有运行任务队列 worker, 已在入队时按需启动")
+            self.start(current_app._get_current_object())
+
+    @staticmethod
+    def _run_inline(func, args, kwargs):
+        try:
+            result = func(*args, **kwargs)
+            if is_failure(result):
+                current_app.logger.error(f"Task {task_name(func)} failed: {result}")
+        except Exception as e:
+            current_app.logger.error(f"Task {task_name(func)} error: {str(e)}")
+
+    # ---- worker ----
+
+    def start(self, app, workers=None):
+        """在当前进程启动 worker 线程"""
+        if self._backend is None or self.running:
+            return
+        self._app = app
+        workers = app.config.get('TASK_QUEUE_WORKERS', 2) if workers is None else workers
+        if workers <= 0:
+            return
+        if app.config.get('TASK_QUEUE_POOL') == POOL_PROCESS:
+            # spawn 启动, 避免子进程继承本进程的线程和连接
+            self._executor = ProcessPoolExecutor(max_workers=workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_process_worker)
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f'ppress-task-{index}', daemon=True)
+            for index in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        app.logger.info(f"任务队列 worker 已启动: {workers} 个, 后端 {self.backend_name}")
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wakeup.set()
+        if wait:
+            for thread in self._threads:
+                if thread is not threading.current_thread():
+                    thread.join(timeout=5)
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _worker_loop(self):
+        app = self._app
+        poll = app.config.get('TASK_QUEUE_POLL_SECONDS', 1)
+        while not self._stop.is_set():
+            try:
+                if not self.process_one():
+                    self._wakeup.wait(poll)
+                    self._wakeup.clear()
+            except Exception as e:
+                app.logger.error(f"Task worker error: {str(e)}")
+                self._stop.wait(poll)
+
+    def process_one(self):
+        """领取并执行一个任务, 队列为空时返回 False"""
+        app = self._app
+        task = self._backend.claim(self._worker_id, app.config.get('TASK_QUEUE_VISIBILITY_TIMEOUT', 300))
+        if task is None:
+            return False
+        with app.app_context():
+            error = self._execute(task)
+            if error is None:
+                self._backend.ack(task)
+                self._count('succeeded')
+            elif task.attempts <= task.max_retries:
+                delay = app.config.get('TASK_QUEUE_RETRY_DELAY', 10) * 2 ** (task.attempts - 1)
+                self._backend.retry(task, error, time.time() + delay)
+                self._count('retried')
+                current_app.logger.warning(f"任务 {task.name}#{task.id} 第 {task.attempts} 次执行失败, "
+                                           f"{delay} 秒后重试: {error}")
+            else:
+                self._backend.bury(task, error)
+                self._count('failed')
+                current_app.logger.error(f"任务 {task.name}#{task.id} 重试 {task.max_retries} 次后仍失败: {error}")
+        return True
+
+    def _execute(self, task):
+        """执行任务, 成功返回 None, 失败返回错误信息"""
+        try:
+            if self._executor is not None:
+                future = self._executor.submit(_run_in_process, task.name, task.payload)
+                timeout = task.timeout or current_app.config.get('TASK_QUEUE_VISIBILITY_TIMEOUT', 300)
+                success, error = future.result(timeout=timeout)
+                return None if success else error[:ERROR_MAX_LENGTH]
+            result = resolve_task(task.name)(*task.args, **task.kwargs)
+            if is_failure(result):
+                return str(result[1] if isinstance(result, tuple) else result)[:ERROR_MAX_LENGTH]
+            return None
+        except FutureTimeoutError:
+            return '执行超时'
+        except Exception as e:
+            from app.extensions import db
+            db.session.rollback()
+            return f'{type(e).__name__}: {e}'[:ERROR_MAX_LENGTH]
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    # ---- 管理 ----
+
+    def stats(self):
+        """队列深度与本进程的执行计数"""
+        data = {'backend': self.backend_name, 'workers': len(self._threads), 'worker_id': self._worker_id,
+                'ready': 0, 'delayed': 0, 'running': 0, 'dead': 0, 'oldest_wait': 0}
+        with self._lock:
+            data.update(self._counters)
+        if self._backend is not None:
+            data.update(self._backend.stats())
+        return data
+
+    def dead_tasks(self, limit=50):
+        return self._backend.dead_tasks(limit) if self._backend is not None else []
+
+    def requeue_dead(self, task_id=None):
+        if self._backend is None:
+            return 0
+        count = self._backend.requeue_dead(task_id)
+        self._wakeup.set()
+        return count
+
+    def delete_dead(self, task_id=None):
+        return self._backend.delete_dead(task_id) if self._backend is not None else 0
+
+
+task_queue = TaskQueue()
+
+
+def enqueue(func, *args, **kwargs):
+    """把 func(*args, **kwargs) 放入后台任务队列"""
+    return task_queue.enqueue(func, *args, **kwargs)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import shutil
+
+from jinja2 import FileSystemBytecodeCache, TemplateNotFound, TemplateSyntaxError
+
+# 模板目录之外的模板(如插件模板)的字节码放在这个目录下
+OTHER_THEME = '_other'
+
+# 不是主题的模板目录(始终编译)
+SHARED_DIRS = ('admin', 'errors')
+
+TEMPLATE_EXTENSIONS = ('.html', '.htm', '.xml', '.txt', '.j2')
+
+# 模板扩展生成的代码或缓存键格式变化时递增, 使已有字节码失效
+BYTECODE_VERSION = 3
+
+
+class ThemeBytecodeCache(FileSystemBytecodeCache):
+    """按主题分目录保存的模板字节码缓存
+
+    缓存文件为 <目录>/<主题>/<键>.cache, 键由 BYTECODE_VERSION、文件路径和修改时间计算,
+    同一文件以不同模板名加载(如 blog/index.html 和 default/blog/index.html)时共用字节码,
+    模板修改后自动使用新键; Jinja 加载时还会校验源码摘要, 内容不一致时重新编译。
+    字节码写入临时文件后原子替换, 多个 worker 进程可共用同一目录。
+    """
+
+    def __init__(self, directory, templates_root):
+        super().__init__(directory, '%s.cache')
+        self.templates_root = os.path.abspath(templates_root)
+        self._ready_dirs = set()
+
+    def theme_of(self, filename):
+        """模板文件所属主题(模板目录下的第一级目录)"""
+        if not filename:
+            return OTHER_THEME
+        relative = os.path.relpath(os.path.abspath(filename), self.templates_root)
+        if relative.startswith('..') or os.sep not in relative:
+            return OTHER_THEME
+        return relative.split(os.sep, 1)[0]
+
+    def get_cache_key(self, name, filename=None):
+        try:
+            mtime = os.path.getmtime(filename) if filename else 0
+        except OSError:
+            mtime = 0
+        digest = hashlib.sha1(f'{BYTECODE_VERSION}|{filename or name}|{mtime}'.encode('utf-8')).hexdigest()
+        return f'{self.theme_of(filename)}/{digest}'
+
+    def _get_cache_filename(self, bucket):
+        theme, _, digest = bucket.key.partition('/')
+        theme_dir = os.path.join(self.directory, theme)
+        if theme_dir not in self._ready_dirs:
+            os.makedirs(theme_dir, exist_ok=True)
+            self._ready_dirs.add(theme_dir)
+        return os.path.join(theme_dir, self.pattern % (digest,))
+
+    def clear(self, theme=None):
+        """删除全部或指定主题的字节码"""
+        themes = [theme] if theme else [
+            name for name in os.listdir(self.directory) if os.path.isdir(os.path.join(self.directory, name))
+        ]
+        for name in themes:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            self._ready_dirs.discard(os.path.join(self.directory, name))
+
+
+def init_template_cache(app):
+    """启用模板字节码缓存(TEMPLATE_BYTECODE_CACHE_DIR 为空时不启用)"""
+    directory = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = ThemeBytecodeCache(directory, os.path.join(app.root_path, 'templates'))
+    return app.jinja_env.bytecode_cache
+
+
+def theme_names(app):
+    """模板目录下的主题名(不含 admin/errors 等公共目录)"""
+    templates_root = os.path.join(app.root_path, 'templates')
+    return sorted(
+        name for name in os.listdir(templates_root)
+        if name not in SHARED_DIRS and os.path.isdir(os.path.join(templates_root, name))
+    )
+
+
+def compile_templates(app, themes=None, progress=None):
+    """预编译模板并写入字节码缓存
+
+    对每个主题按切换到该主题后的加载器编译, 包括主题自身、后台(admin)和公共模板, 默认只编译当前主题;
+    字节码按文件缓存, 同一文件有多个模板名时只编译一次; 带本主题目录前缀的名称(default/base.html)
+    排在最后, 只编译被后台模板遮挡、无法按主题内名称加载的文件。
+
+    Returns:
+        tuple: (编译数量, [(模板名, 错误信息)])
+    """
+    from app.models.site_config import SiteConfig
+    from app.utils.theme_manager import ThemeManager
+
+    if app.jinja_env.bytecode_cache is None:
+        return 0, [('*', '未启用字节码缓存(TEMPLATE_BYTECODE_CACHE_DIR)')]
+    theme_dirs = set(theme_names(app))
+    themes = themes or [SiteConfig.get_config('site_theme', 'default')]
+
+    compiled, errors, seen = 0, [], set()
+    for theme in themes:
+        env = app.jinja_env.overlay(loader=ThemeManager.get_theme_loader(app, theme))
+        # 其他主题目录下的模板(如 other/base.html)不属于本主题
+        others = theme_dirs - {theme}
+        names = env.list_templates(filter_func=lambda name: name.endswith(TEMPLATE_EXTENSIONS))
+        for name in sorted(names, key=lambda name: name.split('/', 1)[0] == theme):
+            if name.split('/', 1)[0] in others:
+                continue
+            try:
+                filename = env.loader.get_source(env, name)[1]
+            except TemplateNotFound:
+                continue
+            if filename in seen:
+                continue
+            seen.add(filename)
+            try:
+                env.get_template(name)
+                compiled += 1
+            except TemplateSyntaxError as e:
+                errors.append((f'{theme}:{name}', f'{e.filename or name}:{e.lineno} {e.message}'))
+            except Exception as e:
+                errors.append((f'{theme}:{name}', str(e)))
+            if progress:
+                progress(theme, name)
+    return compiled, errors
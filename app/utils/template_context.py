@@ -0,0 +1,64 @@
+import time
+from functools import wraps
+
+from werkzeug.local import LocalProxy
+
+from app.utils.cache_manager import cache_manager
+from app.utils.entity_versions import entity_versions
+from app.utils.metrics import metrics
+from app.utils.request_cache import request_memo
+
+# 进程内缓存的上下文值的键前缀
+KEY_PREFIX = 'template_context:'
+
+
+def _timed(name, factory):
+    started = time.perf_counter()
+    try:
+        return factory()
+    finally:
+        metrics.context_observed(name, time.perf_counter() - started)
+
+
+def lazy_value(name, factory, namespace='template_context'):
+    """模板上下文中的惰性值
+
+    返回代理对象, 模板首次访问(取属性、下标、迭代、判断真假等)时才调用 factory,
+    同一请求内只计算一次; namespace 设为依赖的模型名时, 该模型在请求内有写入后重新计算。
+    """
+    return LocalProxy(lambda: request_memo(namespace, f'lazy:{name}', lambda: _timed(f'lazy:{name}', factory)))
+
+
+def shared_value(key, deps, factory, ttl=300):
+    """进程内缓存的上下文值, 依赖的模型有写入后自动失效(缓存键包含模型版本号)
+
+    只用于可在请求间共享的普通数据(dict/list/str 等), 不要缓存 ORM 对象。
+    """
+    return cache_manager.get_plain(f'{KEY_PREFIX}{key}:{entity_versions.key(*deps)}',
+                                   lambda: _timed(f'shared:{key}', factory), ttl=ttl)
+
+
+def _instrument(name, func):
+    @wraps(func)
+    def timed_processor():
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            metrics.context_observed(name, time.perf_counter() - started)
+
+    timed_processor._context_timed = True
+    return timed_processor
+
+
+def instrument_context_processors(app):
+    """给已注册的上下文处理器(含蓝图的)加上计时, 耗时记入 /metrics
+
+    在所有蓝图和插件注册完成后调用; 已包装过的处理器不会重复包装。
+    """
+    for blueprint, processors in app.template_context_processors.items():
+        for index, func in enumerate(processors):
+            if getattr(func, '_context_timed', False):
+                continue
+            name = f'{blueprint}.{func.__name__}' if blueprint else func.__name__
+            processors[index] = _instrument(name, func)
@@ -10,8 +10,8 @@ from app.models.theme_settings import ThemeSettings
 
 class ThemeManager:
     @staticmethod
-    def get_theme_loader(app):
-        """获取主题模板加载器"""
+    def get_theme_loader(app, theme=None):
+        """获取主题模板加载器(theme 为空时使用当前主题)"""
         templates_dir = os.path.join(app.root_path, 'templates')
         theme_loaders = []
         
@@ -20,13 +20,16 @@ class ThemeManager:
         if os.path.isdir(admin_dir):
             theme_loaders.append(FileSystemLoader(admin_dir))
         
-        try:
-            # 在应用上下文中获取当前主题
-            with app.app_context():
-                current_theme = SiteConfig.get_config('site_theme', 'default')
-        except RuntimeError:
-            # 如果没有应用上下文，使用默认主题
-            current_theme = 'default'
+        if theme:
+            current_theme = theme
+        else:
+            try:
+                # 在应用上下文中获取当前主题
+                with app.app_context():
+                    current_theme = SiteConfig.get_config('site_theme', 'default')
+            except RuntimeError:
+                # 如果没有应用上下文，使用默认主题
+                current_theme = 'default'
         
         # 添加当前主题目录
         current_theme_dir = os.path.join(templates_dir, current_theme)
@@ -40,7 +43,8 @@ class ThemeManager:
                 theme_loaders.append(FileSystemLoader(default_theme_dir))
         
         # 最后添加原始模板目录作为后备
-        theme_loaders.append(app.jinja_loader)
+        # (不使用 app.jinja_loader: 切换主题后它已是上一次的 ChoiceLoader, 会越套越深)
+        theme_loaders.append(FileSystemLoader(templates_dir))
         
         return ChoiceLoader(theme_loaders)
 
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import tempfile
+
+from flask import current_app
+
+# 视频类扩展名存到 uploads/videos, 其余存到 uploads/images
+VIDEO_EXTENSIONS = {'mp4', 'webm', 'mov', 'm4v'}
+
+# multipart 表单中除文件内容外的边界和字段开销, 计算请求长度上限时预留
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """上传内容超过大小限制"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        super().__init__(f'文件大小超过限制({max_size / 1024 / 1024:.0f}MB)')
+
+
+def upload_category(ext):
+    return 'videos' if ext in VIDEO_EXTENSIONS else 'images'
+
+
+def content_path(category, file_hash, ext):
+    """按内容哈希分片的相对路径: <category>/ab/cd/abcd....ext"""
+    return f'{category}/{file_hash[:2]}/{file_hash[2:4]}/{file_hash}.{ext}'
+
+
+class StagedUpload:
+    """已写入临时文件并计算好哈希的上传内容
+
+    commit() 原子地移动到内容寻址目录, discard() 丢弃临时文件。
+    """
+
+    def __init__(self, temp_path, file_hash, size, upload_root):
+        self.temp_path = temp_path
+        self.md5 = file_hash
+        self.size = size
+        self.upload_root = upload_root
+
+    def commit(self, relative_path):
+        """移动到 uploads/<relative_path>, 返回绝对路径; 相同内容已存在时直接复用"""
+        target = os.path.join(self.upload_root, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            self.discard()
+        else:
+            os.replace(self.temp_path, target)
+        self.temp_path = None
+        return target
+
+    def discard(self):
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.temp_path = None
+
+
+def stage_upload(stream, max_size=None, chunk_size=None):
+    """分块读取上传流, 边写临时文件边计算 MD5
+
+    临时文件放在 uploads/.tmp 下, 与目标目录同一文件系统, 保证 commit 时 rename 是原子的。
+    超过 max_size(字节)立即中止并删除临时文件, 抛出 UploadTooLarge。
+    """
+    upload_root = current_app.config['UPLOAD_FOLDER']
+    chunk_size = chunk_size or current_app.config.get('UPLOAD_CHUNK_SIZE', 64 * 1024)
+    temp_dir = os.path.join(upload_root, '.tmp')
+    os.makedirs(temp_dir, exist_ok=True)
+
+    digest = hashlib.md5()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise UploadTooLarge(max_size)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return StagedUpload(temp_path, digest.hexdigest(), size, upload_root)
@@ -8,8 +8,17 @@ socketio = SocketIO(
 )
 
 def init_socketio(app):
-    """初始化 SocketIO"""
-    socketio.init_app(app)
+    """初始化 SocketIO
+
+    SOCKETIO_ASYNC_MODE 需与 gunicorn worker 类型一致(gthread -> threading, gevent -> gevent);
+    多个 worker 时需设置 SOCKETIO_MESSAGE_QUEUE(如 redis://...)并在前端代理开启会话粘滞。
+    """
+    options = {}
+    if app.config.get('SOCKETIO_ASYNC_MODE'):
+        options['async_mode'] = app.config['SOCKETIO_ASYNC_MODE']
+    if app.config.get('SOCKETIO_MESSAGE_QUEUE'):
+        options['message_queue'] = app.config['SOCKETIO_MESSAGE_QUEUE']
+    socketio.init_app(app, **options)
     
     # 导入 WebSocket 处理模块
     from . import chat
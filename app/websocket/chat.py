@@ -1,20 +1,12 @@
 from flask import request, session
 from flask_login import current_user
 from flask_socketio import emit, join_room, leave_room, Namespace
-import redis
 import json
 from datetime import datetime
 from . import socketio
-from config.database import REDIS_CONFIG
+from app.utils.redis_client import redis_client
+from app.utils.metrics import metrics
 
-# Redis 客户端
-redis_client = redis.Redis(
-    host=REDIS_CONFIG['host'],
-    port=REDIS_CONFIG['port'],
-    password=REDIS_CONFIG['password'],
-    db=REDIS_CONFIG['db'],
-    decode_responses=True
-)
 
 # 最大聊天记录保存数量
 MAX_CHAT_HISTORY = 100
@@ -27,6 +19,7 @@ ONLINE_USERS_KEY = 'chat:online_users'
 class ChatNamespace(Namespace):
     def on_connect(self):
         """处理连接"""
+        metrics.socketio_connected()
         user_id = current_user.id if current_user.is_authenticated else None
         username = current_user.username if current_user.is_authenticated else f'游客_{request.sid[:6]}'
         
@@ -64,6 +57,7 @@ class ChatNamespace(Namespace):
 
     def on_disconnect(self):
         """处理断开连接"""
+        metrics.socketio_disconnected()
         user_data = json.loads(redis_client.hget(ONLINE_USERS_KEY, request.sid) or '{}')
         username = user_data.get('username', f'游客_{request.sid[:6]}')
         
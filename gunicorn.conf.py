@@ -0,0 +1,63 @@
+"""gunicorn 配置(生产环境)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+环境变量:
+    PPRESS_BIND              监听地址, 默认 0.0.0.0:5000
+    PPRESS_WORKERS           worker 进程数, 默认 CPU 核数 * 2 + 1
+    PPRESS_THREADS           每个 worker 的线程数(gthread), 默认 8
+    PPRESS_WORKER_CLASS      gthread(默认) / gevent
+    PPRESS_TIMEOUT           请求超时(秒), 默认 60
+    PPRESS_MAX_REQUESTS      worker 处理多少请求后自动重启, 默认 0(不重启)
+    SOCKETIO_MESSAGE_QUEUE   多 worker 时 Socket.IO 消息队列, 如 redis://:password@host:6379/0
+                             (多 worker 还需要代理开启会话粘滞, 否则使用单个 gevent worker)
+
+应用在主进程预加载(preload_app)后 fork 出 worker, 模块级单例(缓存、锁、连接池、
+后台线程)在 post_fork 中重置, 定时任务和任务队列线程也在 post_fork 中启动,
+见 app/utils/process_state.py。
+"""
+import multiprocessing
+import os
+
+worker_class = os.environ.get('PPRESS_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # 必须在预加载应用之前打补丁, 否则主进程中已导入的模块仍使用原生线程/socket
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = os.environ.get('PPRESS_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('PPRESS_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('PPRESS_THREADS', 8))
+worker_connections = int(os.environ.get('PPRESS_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('PPRESS_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('PPRESS_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+preload_app = True
+accesslog = '-'
+errorlog = '-'
+
+# 在预加载应用之前设置, 由 create_app 读取: Socket.IO 异步模式与 worker 类型保持一致
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'gevent' if worker_class == 'gevent' else 'threading')
+
+
+def when_ready(server):
+    """主进程: 应用已预加载, fork worker 之前关闭主进程持有的数据库连接"""
+    from app.utils.process_state import dispose_engines
+
+    dispose_engines(server.app.wsgi())
+    if workers > 1:
+        # 长轮询的多次请求必须落到同一 worker, 消息队列只负责跨 worker 广播
+        message = '多个 worker 运行 Socket.IO 时代理必须开启会话粘滞(sticky session), 否则 /chat 长轮询连接会失败'
+        if not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+            message += '; 未设置 SOCKETIO_MESSAGE_QUEUE, 消息不会跨 worker 广播'
+        server.log.warning(message)
+
+
+def post_fork(server, worker):
+    """worker 进程: 重置继承的进程内状态并启动后台任务"""
+    from app.utils.process_state import init_worker_process
+
+    init_worker_process(server.app.wsgi())
@@ -3,4 +3,7 @@ from app import create_app
 app = create_app()
 
 if __name__ == '__main__':
+    from app.utils.process_state import start_background_tasks
+
+    start_background_tasks(app)
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""生产环境入口
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+开发调试仍使用 run.py。
+"""
+from app import create_app
+
+app = create_app()